@@ -0,0 +1,173 @@
+"""
+Benchmark por etapa do pipeline, sobre PDFs gerados por benchmarks.gerador_perdcomp:
+extração de texto, extração por regex, montagem do DataFrame, explode das tabelas
+filhas, criar_tabelona e exportação para Excel. Grava o resultado em JSON para
+comparar execuções (--comparar com um JSON anterior).
+
+Uso:
+    python -m benchmarks.bench_etapas --quantidade 40 --debitos 30 --saida bench.json
+    python -m benchmarks.bench_etapas --saida novo.json --comparar bench.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.gerador_perdcomp import gerar_lote
+from exportar_dados.gerar_excel import ExportarDados, MOTORES_EXCEL
+from limpeza_dos_dados.montagem_tabelas import (
+    MontagemTabelas, TABELA1_COLS, TABELA2_COLS, TABELA3_COLS, TABELA4_COLS, TABELA5_COLS
+)
+from limpeza_dos_dados.tratamentos_dados import LimpezaETratamentoDados
+from processamento_de_arquivos.processamento import Processamento
+from regex_rules.regex_ import RegexRules
+from regex_rules.texto_paginas import TextoPaginas, MOTORES_TEXTO
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def extrair_textos(arquivos, motor):
+    """Abre cada PDF e extrai o texto de todas as páginas. Retorna [(documento, paginas)]."""
+    documentos = []
+    for _, pdf_bytes in arquivos:
+        documento = Processamento.abrir_pdf(pdf_bytes, motor)
+        paginas = TextoPaginas(documento, motor)
+        paginas.juntar()
+        documentos.append((documento, paginas))
+    return documentos
+
+
+def explodir(df_result):
+    df_tabela2 = LimpezaETratamentoDados.explodir_tabela2(df_result[TABELA2_COLS])
+    df_tabela3 = LimpezaETratamentoDados.explodir_origem_credito(df_result[TABELA3_COLS])
+    df_tabela4 = LimpezaETratamentoDados.explodir_darf(df_result[TABELA4_COLS])
+    df_tabela5 = LimpezaETratamentoDados.explodir_gps(df_result[TABELA5_COLS])
+    df_tabela3, df_tabela4 = LimpezaETratamentoDados.limpar_tabelas_3_e_4(df_tabela3, df_tabela4)
+    return df_tabela2, df_tabela3, df_tabela4, df_tabela5
+
+
+def rodar_uma_vez(arquivos, motor, motor_excel):
+    """Executa o pipeline uma vez e retorna {etapa: segundos}."""
+    tempos = {}
+
+    tempos['texto'], documentos = cronometrar(lambda: extrair_textos(arquivos, motor))
+    # O texto já está extraído: aqui só conta o trabalho das regras
+    tempos['regex'], infos = cronometrar(
+        lambda: [RegexRules.extract_info_from_pages(paginas, motor) for _, paginas in documentos]
+    )
+    for documento, _ in documentos:
+        documento.close()
+    for (nome, _), info in zip(arquivos, infos):
+        info['Arquivo'] = nome
+
+    tempos['dataframe'], df_result = cronometrar(lambda: Processamento.montar_dataframe(infos))
+    tempos['explode'], (df_tabela2, df_tabela3, df_tabela4, df_tabela5) = cronometrar(lambda: explodir(df_result))
+    df_tabela1 = LimpezaETratamentoDados.converter_colunas_valor(df_result[TABELA1_COLS])
+    tempos['tabelona'], _ = cronometrar(
+        lambda: LimpezaETratamentoDados.criar_tabelona(df_tabela1, df_tabela2, df_tabela3, df_tabela4, df_tabela5)
+    )
+
+    tabelas = MontagemTabelas.formatar_tabelas(MontagemTabelas.montar_tabelas(df_result))
+    tempos['excel'], _ = cronometrar(lambda: ExportarDados.gerar_excel_em_memoria(
+        tabelas['tabela1'], tabelas['tabela2'], tabelas['tabelona'],
+        tabelas['tabela3'], tabelas['tabela4'], tabelas['tabela5'],
+        motor=motor_excel
+    ))
+    return tempos, df_result, tabelas
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual, anterior):
+    print(f"\nComparação com {anterior.get('commit')} ({anterior.get('data')}):")
+    for etapa, tempo in atual['etapas'].items():
+        tempo_anterior = anterior.get('etapas', {}).get(etapa)
+        if not tempo_anterior:
+            continue
+        razao = tempo['mediana'] / tempo_anterior['mediana'] if tempo_anterior['mediana'] else float('nan')
+        print(f"  {etapa:<10} {tempo_anterior['mediana']:8.3f}s -> {tempo['mediana']:8.3f}s  ({razao:.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark por etapa do pipeline de extração.")
+    parser.add_argument("--quantidade", type=int, default=40, help="PDFs no lote")
+    parser.add_argument("--debitos", type=int, default=30, help="Máximo de débitos por documento")
+    parser.add_argument("--darfs", type=int, default=3)
+    parser.add_argument("--gps", type=int, default=2)
+    parser.add_argument("--origens", type=int, default=3)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--motor", choices=MOTORES_TEXTO, default="pdfplumber")
+    parser.add_argument("--motor-excel", choices=MOTORES_EXCEL, default="openpyxl")
+    parser.add_argument("--saida", default="bench_etapas.json", help="Arquivo JSON de resultado")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    args = parser.parse_args(argv)
+
+    arquivos = gerar_lote(args.quantidade, args.debitos, args.darfs, args.gps, args.origens)
+
+    execucoes = []
+    for _ in range(args.repeticoes):
+        tempos, df_result, tabelas = rodar_uma_vez(arquivos, args.motor, args.motor_excel)
+        execucoes.append(tempos)
+
+    etapas = {}
+    for etapa in execucoes[0]:
+        amostras = [tempos[etapa] for tempos in execucoes]
+        etapas[etapa] = {
+            'mediana': round(statistics.median(amostras), 4),
+            'minimo': round(min(amostras), 4),
+            'amostras': [round(amostra, 4) for amostra in amostras],
+        }
+
+    resultado = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_atual(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'parametros': vars(args),
+        'lote': {
+            'arquivos': len(arquivos),
+            'bytes': sum(len(pdf_bytes) for _, pdf_bytes in arquivos),
+            'debitos': len(tabelas['tabela2']),
+            'origens_credito': len(tabelas['tabela3']),
+            'darfs': len(tabelas['tabela4']),
+            'gps': len(tabelas['tabela5']),
+            'colunas_tabelona': tabelas['tabelona'].shape[1],
+        },
+        'etapas': etapas,
+    }
+
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+
+    print(f"{len(arquivos)} PDF(s), {resultado['lote']['debitos']} débito(s), {args.repeticoes} repetição(ões)")
+    for etapa, tempo in etapas.items():
+        print(f"  {etapa:<10} mediana {tempo['mediana']:8.3f}s  mínimo {tempo['minimo']:8.3f}s")
+    print(f"Resultado gravado em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(resultado, json.load(arquivo))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
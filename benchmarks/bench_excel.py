@@ -0,0 +1,116 @@
+"""
+Benchmark da exportação para Excel: motor 'openpyxl' (pd.ExcelWriter) x 'streaming'
+(openpyxl write-only), medindo tempo e pico de memória (RSS) de cada motor em um
+processo separado, sobre um conjunto sintético de PER/DCOMPs.
+
+Uso:
+    python -m benchmarks.bench_excel [--perdcomps 5000] [--max-debitos 20]
+"""
+import sys
+import json
+import time
+import random
+import resource
+import argparse
+import subprocess
+
+import pandas as pd
+
+from exportar_dados.gerar_excel import ExportarDados
+from limpeza_dos_dados.tratamentos_dados import LimpezaETratamentoDados
+from limpeza_dos_dados.montagem_tabelas import TABELA1_COLS
+
+COLS_TABELA2 = [
+    'cnpj_detentor_debito', 'debito_sucedida', 'grupo_tributo', 'codigos_receita',
+    'debito_controlado_processo', 'periodo_apuracao', 'periodicidade', 'data_vencimento_tributo',
+    'numero_recibo_dctfweb', 'data_transmissao_dctfweb', 'categoria_dcftweb', 'periodicidade_dctfweb',
+    'periodo_apuracao_dctfweb', 'valor_principal_tributo', 'valor_multa_tributo',
+    'valor_juros_tributo', 'valor_total_tributo',
+]
+COLS_DARF = [
+    'periodo_apuracao_darf', 'cnpj_darf', 'codigo_receita_darf', 'numero_documento_arrecadacao',
+    'data_vencimento_darf', 'data_arrecadacao_darf', 'valor_principal_darf', 'valor_multa_darf',
+    'valor_juros_darf', 'valor_total_darf', 'valor_original_credito_darf',
+]
+
+
+def gerar_tabelas(perdcomps, max_debitos, semente=7):
+    """Tabelas 1-5 e Tabela Geral sintéticas, com a largura típica da Tabela Geral."""
+    rnd = random.Random(semente)
+
+    def valor():
+        return f"{rnd.randint(1, 999999)},{rnd.randint(0, 99):02d}"
+
+    linhas_t1, linhas_t2, linhas_t3, linhas_t4, linhas_t5 = [], [], [], [], []
+    for i in range(perdcomps):
+        cod = f"{10000 + i}.{20000 + i}.230101.1.3.02-{1000 + i % 9000}"
+        linha = {col: f"{col[:8]}_{rnd.randint(0, 9999)}" for col in TABELA1_COLS}
+        linha['cod_perdcomp'] = cod
+        linhas_t1.append(linha)
+        for _ in range(rnd.randint(1, max_debitos)):
+            linhas_t2.append({'cod_perdcomp': cod, **{col: valor() for col in COLS_TABELA2}})
+        for _ in range(rnd.randint(0, 3)):
+            linhas_t3.append({'cod_perdcomp': cod, 'codigo_receita_origem_credito': '2362', 'valor_total_origem_credito': valor()})
+        for _ in range(rnd.randint(0, 3)):
+            linhas_t4.append({'cod_perdcomp': cod, **{col: valor() for col in COLS_DARF}})
+        for _ in range(rnd.randint(0, 2)):
+            linhas_t5.append({'cod_perdcomp': cod, 'codigo_pagamento_gps': '2100', 'valor_total_gps': valor()})
+
+    df1, df2, df3, df4, df5 = (pd.DataFrame(linhas) for linhas in (linhas_t1, linhas_t2, linhas_t3, linhas_t4, linhas_t5))
+    df_tabelona = LimpezaETratamentoDados.criar_tabelona(df1, df2, df3, df4, df5)
+    return df1, df2, df_tabelona, df3, df4, df5
+
+
+def pico_rss_mb():
+    # ru_maxrss é em KiB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir_motor(motor, perdcomps, max_debitos):
+    """Executado no processo filho: gera os dados, exporta e mede."""
+    tabelas = gerar_tabelas(perdcomps, max_debitos)
+    rss_antes = pico_rss_mb()
+    inicio = time.perf_counter()
+    excel = ExportarDados.gerar_excel_em_memoria(*tabelas, motor=motor)
+    tempo = time.perf_counter() - inicio
+    return {
+        'motor': motor,
+        'segundos': round(tempo, 3),
+        'pico_rss_mb': round(pico_rss_mb(), 1),
+        'rss_adicional_mb': round(pico_rss_mb() - rss_antes, 1),
+        'bytes_xlsx': len(excel.getvalue()),
+        'colunas_tabela_geral': tabelas[2].shape[1],
+        'linhas_tabela_tributos': len(tabelas[1]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--perdcomps", type=int, default=5000)
+    parser.add_argument("--max-debitos", type=int, default=20)
+    parser.add_argument("--motor", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.motor:
+        print(json.dumps(medir_motor(args.motor, args.perdcomps, args.max_debitos)))
+        return 0
+
+    print(f"{args.perdcomps} PER/DCOMPs, até {args.max_debitos} débitos cada")
+    for motor in ('openpyxl', 'streaming'):
+        # Processo novo por motor, para o pico de RSS de um não contaminar o outro
+        saida = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_excel", "--motor", motor,
+             "--perdcomps", str(args.perdcomps), "--max-debitos", str(args.max_debitos)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        resultado = json.loads(saida.strip().splitlines()[-1])
+        print(
+            f"{motor:<10} {resultado['segundos']:8.1f}s  pico RSS {resultado['pico_rss_mb']:8.1f} MB  "
+            f"(+{resultado['rss_adicional_mb']:.1f} MB na exportação)  "
+            f"Tabela Geral com {resultado['colunas_tabela_geral']} colunas"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
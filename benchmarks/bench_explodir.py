@@ -0,0 +1,142 @@
+"""
+Benchmark da montagem das tabelas filhas: implementação anterior (iterrows sobre
+textos unidos por ';' e listas por campo) x LimpezaETratamentoDados montando as
+tabelas direto dos registros (tabela_de_registros), em entrada sintética. As
+duas saem com as colunas valor_* em centavos (converter_colunas_valor), então a
+referência é cronometrada com a conversão. Termina com código 1 se os resultados
+diferirem.
+
+Uso:
+    python -m benchmarks.bench_explodir [--linhas 50000] [--max-itens 6]
+"""
+import sys
+import time
+import random
+import argparse
+
+import pandas as pd
+
+from limpeza_dos_dados.tratamentos_dados import LimpezaETratamentoDados
+
+COLS_TABELA2 = [
+    'cnpj_detentor_debito', 'debito_sucedida', 'grupo_tributo', 'codigos_receita',
+    'debito_controlado_processo', 'periodo_apuracao', 'periodicidade', 'data_vencimento_tributo',
+    'numero_recibo_dctfweb', 'data_transmissao_dctfweb', 'categoria_dcftweb', 'periodicidade_dctfweb',
+    'periodo_apuracao_dctfweb', 'valor_principal_tributo', 'valor_multa_tributo',
+    'valor_juros_tributo', 'valor_total_tributo',
+]
+COLS_DARF = [
+    'periodo_apuracao_darf', 'cnpj_darf', 'codigo_receita_darf', 'numero_documento_arrecadacao',
+    'data_vencimento_darf', 'data_arrecadacao_darf', 'valor_principal_darf', 'valor_multa_darf',
+    'valor_juros_darf', 'valor_total_darf', 'valor_original_credito_darf',
+]
+
+
+def explodir_tabela2_iterrows(df_tabela2):
+    """Implementação anterior de explodir_tabela2, mantida como referência."""
+    linhas_expandidas = []
+    for _, row in df_tabela2.iterrows():
+        splitted = {}
+        max_len = 1
+        for col in COLS_TABELA2:
+            if (col not in row) or pd.isna(row[col]) or row[col] == '---':
+                splitted[col] = []
+            else:
+                partes = [p.strip() for p in row[col].split(';')]
+                splitted[col] = partes
+                max_len = max(max_len, len(partes))
+        for i in range(max_len):
+            nova_linha = {'cod_perdcomp': row['cod_perdcomp']}
+            for col in COLS_TABELA2:
+                valores = splitted[col]
+                nova_linha[col] = valores[i] if i < len(valores) else ''
+            linhas_expandidas.append(nova_linha)
+    df_explodido = pd.DataFrame(linhas_expandidas)
+    return df_explodido[
+        df_explodido["codigos_receita"].notna() & (df_explodido["codigos_receita"].str.strip() != "")
+    ]
+
+
+def explodir_darf_iterrows(df_darf):
+    """Implementação anterior de explodir_darf, mantida como referência."""
+    linhas_expandidas = []
+    for _, row in df_darf.iterrows():
+        valores_colunas = {col: row[col] if isinstance(row[col], list) else [row[col]] for col in COLS_DARF}
+        max_len = max(len(valores) for valores in valores_colunas.values())
+        for i in range(max_len):
+            nova = {'cod_perdcomp': row['cod_perdcomp']}
+            for col in COLS_DARF:
+                valor = valores_colunas[col]
+                nova[col] = valor[i] if i < len(valor) else ''
+            linhas_expandidas.append(nova)
+    return pd.DataFrame(linhas_expandidas)
+
+
+def gerar_entrada(linhas, max_itens, semente=42):
+    """
+    Gera a mesma entrada nos dois formatos: registros (atual) e, para a referência,
+    campos unidos por ';' (débitos) e uma lista por campo (DARF).
+    """
+    rnd = random.Random(semente)
+    registros = []
+    linhas_t2 = []
+    linhas_darf = []
+    for i in range(linhas):
+        cod = f"{10000 + i}.{20000 + i}.230101.1.3.02-{1000 + i % 9000}"
+        debitos = [
+            {col: f"{rnd.randint(1, 99999)},{rnd.randint(0, 99):02d}" for col in COLS_TABELA2}
+            for _ in range(rnd.randint(0, max_itens))
+        ]
+        darfs = [
+            {col: f"{rnd.randint(1, 99999)},00" for col in COLS_DARF}
+            for _ in range(rnd.randint(0, max_itens))
+        ]
+        registros.append({'cod_perdcomp': cod, 'debitos': debitos, 'darfs': darfs})
+
+        linha_t2 = {'cod_perdcomp': cod}
+        for col in COLS_TABELA2:
+            linha_t2[col] = ";".join(debito[col] for debito in debitos) if debitos else '---'
+        linhas_t2.append(linha_t2)
+        linhas_darf.append({'cod_perdcomp': cod, **{col: [darf[col] for darf in darfs] for col in COLS_DARF}})
+
+    return pd.DataFrame(registros), pd.DataFrame(linhas_t2), pd.DataFrame(linhas_darf)
+
+
+def com_centavos(explodir):
+    """A implementação de referência seguida da conversão dos valores, como nas atuais."""
+    return lambda df: LimpezaETratamentoDados.converter_colunas_valor(explodir(df))
+
+
+def cronometrar(funcao, df):
+    inicio = time.perf_counter()
+    resultado = funcao(df.copy())
+    return time.perf_counter() - inicio, resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=50000)
+    parser.add_argument("--max-itens", type=int, default=6)
+    args = parser.parse_args(argv)
+
+    df_registros, df_t2, df_darf = gerar_entrada(args.linhas, args.max_itens)
+    casos = [
+        ("explodir_tabela2", df_t2, explodir_tabela2_iterrows, LimpezaETratamentoDados.explodir_tabela2),
+        ("explodir_darf", df_darf, explodir_darf_iterrows, LimpezaETratamentoDados.explodir_darf),
+    ]
+    print(f"Entrada: {args.linhas} linhas, até {args.max_itens} itens por linha")
+    falhou = False
+    for nome, df_antes, antes, depois in casos:
+        tempo_antes, resultado_antes = cronometrar(com_centavos(antes), df_antes)
+        tempo_depois, resultado_depois = cronometrar(depois, df_registros)
+        iguais = resultado_antes.reset_index(drop=True).equals(resultado_depois.reset_index(drop=True))
+        print(
+            f"{nome:<18} {len(resultado_depois):>8} linhas  iterrows {tempo_antes:8.2f}s  "
+            f"registros {tempo_depois:8.2f}s  ({tempo_antes / tempo_depois:5.1f}x)  resultados iguais: {iguais}"
+        )
+        falhou = falhou or not iguais
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
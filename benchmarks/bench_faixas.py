@@ -0,0 +1,55 @@
+"""
+Documentos grandes divididos em faixas de páginas: tempo de parede da extração
+serial (workers=1) x paralela (faixas de páginas extraídas no pool), no
+mesmo lote. Termina com código 1 se os `info` das duas execuções diferirem.
+
+Uso:
+    python -m benchmarks.bench_faixas [--paginas 400] [--pequenos 8] [--workers 4]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+from benchmarks.gerador_perdcomp import gerar_pdf, gerar_lote
+from benchmarks.bench_memoria import LINHAS_POR_PAGINA, LINHAS_POR_DEBITO
+from processamento_de_arquivos.processamento import Processamento
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paginas", type=int, default=400, help="Páginas do documento grande")
+    parser.add_argument("--pequenos", type=int, default=8, help="PER/DCOMPs comuns no mesmo lote")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--motor", default="pdfplumber")
+    args = parser.parse_args(argv)
+
+    debitos = max(1, (args.paginas - 3) * LINHAS_POR_PAGINA // LINHAS_POR_DEBITO)
+    with tempfile.TemporaryDirectory(prefix="bench_faixas_") as pasta:
+        caminho = os.path.join(pasta, "grande.pdf")
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(gerar_pdf(debitos=debitos, darfs=3, gps=3, origens=3, linhas_por_pagina=LINHAS_POR_PAGINA))
+        fontes = [caminho] + [pdf_bytes for _, pdf_bytes in gerar_lote(args.pequenos, 8, 2, 2, 2)]
+
+        planos = Processamento.planejar_faixas(fontes, args.workers)
+        print(
+            f"Lote: 1 documento de {Processamento.contar_paginas(caminho)} páginas ({debitos} débitos, "
+            f"{len(planos[0] or [])} faixas) + {args.pequenos} PER/DCOMPs comuns"
+        )
+
+        resultados = {}
+        for workers in (1, args.workers):
+            inicio = time.perf_counter()
+            resultados[workers] = Processamento.extrair_infos(fontes, workers, args.motor)
+            print(f"workers={workers:<3d} {time.perf_counter() - inicio:8.2f} s")
+
+    if resultados[1] != resultados[args.workers]:
+        print("FALHOU: a extração em faixas difere da extração serial")
+        return 1
+    print(f"Resultados idênticos ({len(resultados[1][0]['debitos'])} débitos no documento grande)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Pico de memória da extração em função do número de páginas: modo normal (bytes
+em memória, layout das páginas mantido até o fim) x baixa_memoria (PDF lido do
+disco, layout descartado página a página). Cada medição roda em um processo
+separado. Termina com código 1 se, no modo baixa_memoria, o pico crescer mais
+que --limite-mb entre o menor e o maior documento.
+
+Uso:
+    python -m benchmarks.bench_memoria [--paginas 50 100 200 400] [--limite-mb 64]
+"""
+import os
+import sys
+import json
+import argparse
+import resource
+import tempfile
+import subprocess
+
+from benchmarks.gerador_perdcomp import gerar_pdf
+
+LINHAS_POR_PAGINA = 45
+LINHAS_POR_DEBITO = 13
+
+
+def pico_rss_mb():
+    # ru_maxrss é em KiB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir(caminho, motor, baixa_memoria):
+    """Executado no processo filho."""
+    from processamento_de_arquivos.processamento import Processamento
+
+    if baixa_memoria:
+        fonte = caminho
+    else:
+        with open(caminho, "rb") as arquivo:
+            fonte = arquivo.read()
+
+    rss_antes = pico_rss_mb()
+    info = Processamento.extrair_info_pdf(fonte, motor, baixa_memoria)
+    return {
+        'pico_rss_mb': round(pico_rss_mb(), 1),
+        'rss_adicional_mb': round(pico_rss_mb() - rss_antes, 1),
+        'debitos': len(info['debitos']),
+    }
+
+
+def gerar_documento(pasta, paginas):
+    """PDF com ~`paginas` páginas, quase todas de débitos."""
+    debitos = max(1, (paginas - 3) * LINHAS_POR_PAGINA // LINHAS_POR_DEBITO)
+    caminho = os.path.join(pasta, f"perdcomp_{paginas}_paginas.pdf")
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(gerar_pdf(debitos=debitos, darfs=2, gps=2, origens=2, linhas_por_pagina=LINHAS_POR_PAGINA))
+    return caminho
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paginas", type=int, nargs="+", default=[50, 100, 200, 400])
+    parser.add_argument("--motor", default="pdfplumber")
+    parser.add_argument("--limite-mb", type=float, default=64.0,
+                        help="Crescimento máximo do pico no modo baixa_memoria")
+    parser.add_argument("--medir", help=argparse.SUPPRESS)
+    parser.add_argument("--baixa-memoria", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.motor, args.baixa_memoria)))
+        return 0
+
+    resultados = {False: [], True: []}
+    with tempfile.TemporaryDirectory(prefix="bench_memoria_") as pasta:
+        for paginas in sorted(args.paginas):
+            caminho = gerar_documento(pasta, paginas)
+            for baixa_memoria in (False, True):
+                comando = [sys.executable, "-m", "benchmarks.bench_memoria", "--medir", caminho, "--motor", args.motor]
+                if baixa_memoria:
+                    comando.append("--baixa-memoria")
+                saida = subprocess.run(comando, check=True, capture_output=True, text=True).stdout
+                resultado = json.loads(saida.strip().splitlines()[-1])
+                resultados[baixa_memoria].append(resultado['rss_adicional_mb'])
+                modo = "baixa_memoria" if baixa_memoria else "normal"
+                print(
+                    f"{paginas:5d} páginas  {modo:<14} +{resultado['rss_adicional_mb']:8.1f} MB  "
+                    f"(pico {resultado['pico_rss_mb']:.1f} MB, {resultado['debitos']} débitos)"
+                )
+
+    crescimento = resultados[True][-1] - resultados[True][0]
+    crescimento_normal = resultados[False][-1] - resultados[False][0]
+    print(
+        f"Crescimento do pico de {min(args.paginas)} para {max(args.paginas)} páginas: "
+        f"normal {crescimento_normal:.1f} MB, baixa_memoria {crescimento:.1f} MB (limite {args.limite_mb:.0f} MB)"
+    )
+    if crescimento > args.limite_mb:
+        print("FALHOU: o pico de memória no modo baixa_memoria cresce com o número de páginas")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
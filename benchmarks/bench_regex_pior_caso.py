@@ -0,0 +1,207 @@
+"""
+Pior caso das regras de extração: cada regra do registro REGRAS recebe textos
+adversariais em dois tamanhos (n e fator * n) e o tempo tem de crescer quase
+linearmente. Os textos são montados a partir de uma amostra de cada regra (o
+trecho mínimo que casa com o rótulo antes do primeiro grupo):
+  - rotulos / rotulos_linhas: o rótulo repetido, sem valor;
+  - digitos: o rótulo e uma sequência de dígitos e pontos sem vírgula;
+  - espacos: o rótulo e uma sequência longa de espaços;
+  - palavras: o rótulo e palavras soltas, sem o que deveria fechar o valor;
+  - valores: rótulo e valor repetidos, sem o fechamento do padrão;
+  - documento: as amostras completas de todas as regras, repetidas.
+Por fim, RegexRules.extract_info_from_pages roda sobre documentos com essas
+páginas adversariais, nos mesmos dois tamanhos.
+
+Cada medição roda com REGRAS.orcamento(--limite): uma regra catastrófica é
+interrompida e reportada, em vez de travar o benchmark. Termina com código 1 se
+alguma medição passar do limite ou crescer com expoente acima de --expoente.
+
+Uso:
+    python -m benchmarks.bench_regex_pior_caso [--tamanho 20000] [--fator 4] [--expoente 1.3] [--regra debito.]
+"""
+import sys
+import math
+import time
+import argparse
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from regex_rules.regex_ import RegexRules, REGRAS
+from regex_rules.registro_regras import TempoRegrasEsgotado
+from regex_rules.texto_paginas import TextoPaginas, clean_text
+
+# Tempos abaixo disto são ruído: o expoente não é avaliado
+TEMPO_MINIMO_S = 0.002
+REPETICOES = 3
+# Os blocos de débito chegam às regras já normalizados por clean_text (sem
+# quebras de linha nem sequências de espaços); os textos adversariais também
+PREPARO_POR_GRUPO = {'debito': clean_text}
+
+EXEMPLOS_CATEGORIA = {
+    sre_parse.CATEGORY_DIGIT: '1',
+    sre_parse.CATEGORY_SPACE: ' ',
+    sre_parse.CATEGORY_WORD: 'a',
+    sre_parse.CATEGORY_NOT_DIGIT: 'a',
+    sre_parse.CATEGORY_NOT_SPACE: 'a',
+    sre_parse.CATEGORY_NOT_WORD: ' ',
+}
+
+
+def _exemplo_classe(itens):
+    for operador, argumento in itens:
+        if operador is sre_parse.LITERAL:
+            return chr(argumento)
+        if operador is sre_parse.RANGE:
+            return chr(argumento[0])
+        if operador is sre_parse.CATEGORY:
+            return EXEMPLOS_CATEGORIA.get(argumento, 'a')
+    return 'a'
+
+
+def _gerar(itens, saida, ate_grupo):
+    """Escreve em `saida` um texto mínimo que casa com `itens`; True se parou no primeiro grupo."""
+    for operador, argumento in itens:
+        if operador is sre_parse.LITERAL:
+            saida.append(chr(argumento))
+        elif operador is sre_parse.ANY:
+            saida.append('a')
+        elif operador is sre_parse.IN:
+            saida.append(_exemplo_classe(argumento))
+        elif operador in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, 'POSSESSIVE_REPEAT', None)):
+            minimo, _, sub = argumento
+            for _ in range(minimo):
+                if _gerar(sub, saida, ate_grupo):
+                    return True
+        elif operador is sre_parse.SUBPATTERN:
+            grupo, _, _, sub = argumento
+            if ate_grupo and grupo is not None:
+                return True
+            if _gerar(sub, saida, ate_grupo):
+                return True
+        elif operador is sre_parse.BRANCH:
+            if _gerar(argumento[1][0], saida, ate_grupo):
+                return True
+        # AT, ASSERT, ASSERT_NOT e GROUPREF não consomem texto na amostra
+    return False
+
+
+def amostras(padrao):
+    """(rótulo, completa): o texto mínimo até o primeiro grupo e um match mínimo inteiro do padrão."""
+    arvore = sre_parse.parse(padrao.pattern, padrao.flags)
+    rotulo, completa = [], []
+    _gerar(arvore, rotulo, True)
+    _gerar(arvore, completa, False)
+    rotulo, completa = ''.join(rotulo), ''.join(completa)
+    if not padrao.groups:
+        rotulo = completa[:-1]
+    return rotulo, completa
+
+
+def textos_adversariais(rotulo, completa, tamanho, documento):
+    """{família: texto de ~`tamanho` caracteres}."""
+    rotulo = rotulo or 'a'
+
+    def repetir(trecho):
+        return trecho * max(1, tamanho // len(trecho))
+
+    return {
+        'rotulos': repetir(rotulo + ' '),
+        'rotulos_linhas': repetir(rotulo + '\n'),
+        'digitos': rotulo + repetir('1.111'),
+        'espacos': rotulo + ' ' * tamanho + '.',
+        'palavras': rotulo + repetir(' palavra'),
+        'valores': repetir(rotulo + ' 1.234,56 '),
+        'documento': repetir(documento),
+    }
+
+
+def medir(funcao, limite):
+    """Menor tempo de REPETICOES execuções, ou None se o orçamento estourar (com a regra culpada)."""
+    melhor = math.inf
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        try:
+            with REGRAS.orcamento(limite):
+                funcao()
+        except TempoRegrasEsgotado as e:
+            return None, e.regra
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, None
+
+
+def expoente(t1, t2, fator):
+    if t2 < TEMPO_MINIMO_S:
+        return 1.0
+    return math.log(max(t2, 1e-9) / max(t1, 1e-9)) / math.log(fator)
+
+
+def avaliar(nome, funcao_por_tamanho, tamanho, fator, limite, max_expoente):
+    """Mede nos dois tamanhos: (descrição do problema ou None, linha com a medição ou None)."""
+    t1, culpada = medir(funcao_por_tamanho(tamanho), limite)
+    if t1 is not None:
+        t2, culpada = medir(funcao_por_tamanho(tamanho * fator), limite)
+    if t1 is None or t2 is None:
+        return f"{nome}: passou de {limite:.1f} s (regra {culpada})", None
+    k = expoente(t1, t2, fator)
+    linha = f"{nome}: {t1 * 1000:8.2f} ms -> {t2 * 1000:8.2f} ms, expoente {k:4.2f}"
+    return (linha if k > max_expoente else None), linha
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanho", type=int, default=20000, help="Tamanho menor dos textos, em caracteres")
+    parser.add_argument("--fator", type=int, default=4, help="O tamanho maior é fator * tamanho")
+    parser.add_argument("--expoente", type=float, default=1.3, help="Expoente máximo de crescimento do tempo")
+    parser.add_argument("--limite", type=float, default=5.0, help="Orçamento de cada medição, em segundos")
+    parser.add_argument("--regra", default="", help="Só as regras cujo nome começa por este prefixo")
+    parser.add_argument("--verboso", action="store_true", help="Lista todas as medições")
+    args = parser.parse_args(argv)
+
+    regras = {nome: padrao for nome, padrao in REGRAS.regras.items() if nome.startswith(args.regra)}
+    exemplos = {nome: amostras(padrao) for nome, padrao in regras.items()}
+    documento = "\n".join(completa for _, completa in exemplos.values()) + "\n"
+
+    problemas = []
+    inicio = time.perf_counter()
+    for nome in regras:
+        rotulo, completa = exemplos[nome]
+        preparar = PREPARO_POR_GRUPO.get(nome.split('.')[0], str)
+        for familia in textos_adversariais(rotulo, completa, 1, documento):
+            def funcao_por_tamanho(tamanho, nome=nome, familia=familia, preparar=preparar, rotulo=rotulo, completa=completa):
+                texto = preparar(textos_adversariais(rotulo, completa, tamanho, documento)[familia])
+                return lambda: REGRAS.search(nome, texto)
+            problema, linha = avaliar(f"{nome} [{familia}]", funcao_por_tamanho, args.tamanho, args.fator, args.limite, args.expoente)
+            if args.verboso and linha:
+                print(linha)
+            if problema:
+                problemas.append(problema)
+    print(f"{len(regras)} regras x {len(textos_adversariais('', '', 1, documento))} famílias em {time.perf_counter() - inicio:.1f} s")
+
+    if not args.regra:
+        # Documento inteiro: cada página é um texto adversarial; os débitos ficam a partir da 4ª
+        for familia in textos_adversariais('', '', 1, documento):
+            def funcao_por_tamanho(tamanho, familia=familia):
+                paginas = [
+                    textos_adversariais(rotulo, completa, tamanho // len(exemplos), documento)[familia]
+                    for rotulo, completa in exemplos.values()
+                ]
+                textos = [paginas[0], paginas[1], "\n".join(paginas), "001. Débito\n" + "\n".join(paginas)]
+                return lambda: RegexRules.extract_info_from_pages(TextoPaginas.de_textos(textos))
+            problema, linha = avaliar(f"extract_info_from_pages [{familia}]", funcao_por_tamanho, args.tamanho * 10, args.fator, args.limite, args.expoente)
+            if linha:
+                print(linha)
+            if problema:
+                problemas.append(problema)
+
+    for problema in problemas:
+        print(f"FALHOU: {problema}")
+    if not problemas:
+        print(f"Todas as regras crescem com expoente <= {args.expoente}")
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
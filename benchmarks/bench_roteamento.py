@@ -0,0 +1,78 @@
+"""
+Roteamento de páginas (RoteamentoPaginas) x documento inteiro, em PDFs gerados
+por benchmarks.gerador_perdcomp com o layout normal e com os blocos quebrados
+entre páginas. O texto das páginas é extraído uma vez; depois
+RegexRules.extract_info_from_pages roda com o roteamento e com cada seção
+(débito, origem, DARF e GPS) lida do documento inteiro, como antes do
+roteamento, e os `info` têm de ser idênticos. Termina com código 1 em qualquer
+diferença.
+
+Uso:
+    python -m benchmarks.bench_roteamento [--quantidade 40] [--debitos 10]
+"""
+import io
+import sys
+import time
+import argparse
+
+import pdfplumber
+
+from benchmarks.gerador_perdcomp import gerar_lote
+from regex_rules.regex_ import RegexRules
+from regex_rules.roteamento_paginas import RoteamentoPaginas
+from regex_rules.texto_paginas import TextoPaginas
+
+
+def extrair_textos(arquivos):
+    textos = []
+    for _, pdf_bytes in arquivos:
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            paginas = TextoPaginas(pdf)
+            textos.append([paginas.texto(page_num) for page_num in range(len(paginas))])
+    return textos
+
+
+def extrair_infos(textos, documento_inteiro=False):
+    """`info` de cada documento; com documento_inteiro=True, as seções são lidas de todas as páginas."""
+    intervalo = RoteamentoPaginas.intervalo
+    if documento_inteiro:
+        def intervalo_documento(self, tipo):
+            return intervalo(self, tipo) if tipo == 'credito' else (0, len(self.paginas))
+        RoteamentoPaginas.intervalo = intervalo_documento
+    try:
+        inicio = time.perf_counter()
+        infos = [RegexRules.extract_info_from_pages(TextoPaginas.de_textos(paginas)) for paginas in textos]
+        return time.perf_counter() - inicio, infos
+    finally:
+        RoteamentoPaginas.intervalo = intervalo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quantidade", type=int, default=40)
+    parser.add_argument("--debitos", type=int, default=10, help="Máximo de débitos por documento")
+    args = parser.parse_args(argv)
+
+    falhou = False
+    for blocos_quebrados in (False, True):
+        layout = "blocos quebrados" if blocos_quebrados else "layout normal"
+        textos = extrair_textos(gerar_lote(args.quantidade, args.debitos, 3, 3, 3, blocos_quebrados=blocos_quebrados))
+        segundos_roteamento, infos = extrair_infos(textos)
+        segundos_inteiro, infos_referencia = extrair_infos(textos, documento_inteiro=True)
+        print(
+            f"{layout}: {len(textos)} documentos, {sum(len(paginas) for paginas in textos)} páginas; "
+            f"roteamento {segundos_roteamento:.3f} s, documento inteiro {segundos_inteiro:.3f} s"
+        )
+        for indice, (info, referencia) in enumerate(zip(infos, infos_referencia)):
+            if info != referencia:
+                falhou = True
+                campos = [campo for campo in referencia if info.get(campo) != referencia[campo]]
+                print(f"FALHOU ({layout}): documento {indice}, campos {campos}")
+
+    if not falhou:
+        print("Resultados idênticos")
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Leitura do TXT de situação das PER/DCOMP (e-CAC) com muitas linhas: tempo e pico
+de memória de Processamento.ler_arquivo_txt, medidos em um processo separado.
+O arquivo é gerado em Windows-1252, como os exports do e-CAC. Também confere
+arquivos pequenos em que as linhas têm campos a mais que o cabeçalho (';' no fim
+da linha, campo extra) ou a menos: os campos têm de ser lidos pela posição.
+Termina com código 1 se a leitura passar de --limite-s segundos ou de
+--limite-mb de memória adicional, ou se as linhas lidas não baterem.
+
+Uso:
+    python -m benchmarks.bench_txt [--linhas 1000000] [--limite-s 15] [--limite-mb 400]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import subprocess
+
+SITUACOES = ('Em análise', 'Homologado', 'Não homologado', 'Homologado parcialmente', 'Cancelado', 'Retificado')
+CABECALHO = "Número de PER/DCOMP;Tipo de Documento;Tipo de Crédito;Data de Transmissão;Situação;Motivo\n"
+
+
+# (conteúdo, [(número, situação)] esperados)
+CASOS_POSICAO = [
+    ("Número;a;b;c;Situação\n111;x;y;z;Deferido;\n", [('111', 'Deferido')]),
+    ("Número;a;b;c;Situação\n111;x;y;z;Deferido;\n222;x;y;z;Cancelado;;\n", [('111', 'Deferido'), ('222', 'Cancelado')]),
+    ("Número;a;b;c;Situação\n111;x;y;z;Deferido\n222;x;y;z;Cancelado;extra\n", [('111', 'Deferido'), ('222', 'Cancelado')]),
+    ("Número;a;b;c;Situação\n111;x;y;z;Deferido;\n222;x\n", [('111', 'Deferido')]),
+]
+
+
+def pico_rss_mb():
+    # ru_maxrss é em KiB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def gerar_txt(caminho, linhas, semente=0):
+    rnd = random.Random(semente)
+    with open(caminho, "w", encoding="cp1252", newline="\r\n") as arquivo:
+        arquivo.write(CABECALHO)
+        for i in range(linhas):
+            cod = f"{10000 + i % 90000}.{rnd.randint(10000, 99999)}.{rnd.randint(100000, 999999)}.1.3.02-{i % 10000:04d}"
+            arquivo.write(f"{cod};Declaração de Compensação;Saldo Negativo de IRPJ;01/02/2024;{rnd.choice(SITUACOES)};\n")
+
+
+def medir(caminho):
+    """Executado no processo filho."""
+    from processamento_de_arquivos.processamento import Processamento
+
+    rss_antes = pico_rss_mb()
+    inicio = time.perf_counter()
+    with open(caminho, "rb") as arquivo:
+        df_txt = Processamento.ler_arquivo_txt(arquivo, 'cod_perdcomp', 'situacao_perdcomp')
+    return {
+        'segundos': round(time.perf_counter() - inicio, 2),
+        'rss_adicional_mb': round(pico_rss_mb() - rss_antes, 1),
+        'linhas': len(df_txt),
+        'situacoes': sorted(df_txt['situacao_perdcomp'].unique().tolist()),
+    }
+
+
+def conferir_posicoes():
+    """Casos de CASOS_POSICAO cuja leitura não bate com o esperado."""
+    import io
+    import warnings
+    from processamento_de_arquivos.processamento import Processamento
+
+    falhas = []
+    for conteudo, esperado in CASOS_POSICAO:
+        with warnings.catch_warnings():
+            # O pandas avisa (ParserWarning) sobre linhas com campos a mais
+            warnings.simplefilter("ignore")
+            df_txt = Processamento.ler_arquivo_txt(io.BytesIO(conteudo.encode("cp1252")))
+        lido = list(df_txt.itertuples(index=False, name=None))
+        if lido != esperado:
+            falhas.append(f"{conteudo!r}: lido {lido}, esperado {esperado}")
+    return falhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--limite-s", type=float, default=15.0, help="Tempo máximo da leitura")
+    parser.add_argument("--limite-mb", type=float, default=400.0, help="Memória adicional máxima da leitura")
+    parser.add_argument("--medir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.medir:
+        print(json.dumps(medir(args.medir)))
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix="bench_txt_") as pasta:
+        caminho = os.path.join(pasta, "situacao.txt")
+        gerar_txt(caminho, args.linhas)
+        tamanho_mb = os.path.getsize(caminho) / 1024 / 1024
+        comando = [sys.executable, "-m", "benchmarks.bench_txt", "--medir", caminho]
+        saida = subprocess.run(comando, check=True, capture_output=True, text=True).stdout
+        resultado = json.loads(saida.strip().splitlines()[-1])
+
+    print(
+        f"{args.linhas} linhas ({tamanho_mb:.0f} MB): {resultado['segundos']:.2f} s, "
+        f"+{resultado['rss_adicional_mb']:.1f} MB (limites {args.limite_s:.0f} s, {args.limite_mb:.0f} MB)"
+    )
+    falhas = conferir_posicoes()
+    if resultado['linhas'] != args.linhas:
+        falhas.append(f"{resultado['linhas']} linhas lidas")
+    if sorted(SITUACOES) != resultado['situacoes']:
+        falhas.append(f"situações lidas: {resultado['situacoes']}")
+    if resultado['segundos'] > args.limite_s:
+        falhas.append("tempo acima do limite")
+    if resultado['rss_adicional_mb'] > args.limite_mb:
+        falhas.append("memória acima do limite")
+    if falhas:
+        print("FALHOU: " + "; ".join(falhas))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Varredura de campos em uma passada (VarreduraCampos) x uma busca por campo, em
+PDFs gerados por benchmarks.gerador_perdcomp. O texto das páginas é extraído uma
+vez; depois:
+  - os `info` de RegexRules.extract_info_from_pages têm de ser idênticos aos de
+    REFERENCIA, gravados com o extract_info_from_pages de antes da varredura em
+    uma passada (um re.findall/re.search por campo) sobre o mesmo lote;
+  - RegexRules.extract_info_from_pages roda com as varreduras e com a busca por
+    campo e os `info` têm de ser idênticos;
+  - cada varredura de regex_ é comparada com a busca por campo em versões
+    alteradas das páginas e dos blocos de débito (caixa trocada, texto
+    duplicado ou cortado, 's' -> 'ſ'), match a match.
+Termina com código 1 em qualquer diferença. A referência só vale para o lote
+padrão (--quantidade 40 --debitos 30); depois de uma mudança intencional nas
+regras, --gravar-referencia a regrava com o resultado atual.
+
+Uso:
+    python -m benchmarks.bench_varredura [--quantidade 40] [--debitos 30] [--variacoes 20] [--gravar-referencia]
+"""
+import io
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import argparse
+
+import pdfplumber
+
+from benchmarks.gerador_perdcomp import gerar_lote
+from regex_rules import regex_
+from regex_rules.regex_ import RegexRules
+from regex_rules.texto_paginas import TextoPaginas, clean_text
+from regex_rules.indice_secoes import IndiceSecoes
+from regex_rules.varredura_campos import VarreduraCampos
+
+REFERENCIA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados", "infos_varredura.json.gz")
+# Lote de benchmarks.gerador_perdcomp.gerar_lote usado na referência
+LOTE_REFERENCIA = {'quantidade': 40, 'debitos': 30, 'darfs': 3, 'gps': 3, 'origens': 3}
+
+
+def extrair_textos(arquivos):
+    textos = []
+    for _, pdf_bytes in arquivos:
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            paginas = TextoPaginas(pdf)
+            textos.append([paginas.texto(page_num) for page_num in range(len(paginas))])
+    return textos
+
+
+def extrair_infos(textos, por_campo=False):
+    """`info` de cada documento; com por_campo=True, cada varredura faz uma busca por campo."""
+    varrer = VarreduraCampos.varrer
+    if por_campo:
+        VarreduraCampos.varrer = VarreduraCampos.varrer_por_campo
+    try:
+        inicio = time.perf_counter()
+        infos = [RegexRules.extract_info_from_pages(TextoPaginas.de_textos(paginas)) for paginas in textos]
+        return time.perf_counter() - inicio, infos
+    finally:
+        VarreduraCampos.varrer = varrer
+
+
+def ler_referencia():
+    """{'lote': LOTE_REFERENCIA, 'infos': [info]} gravado em REFERENCIA, ou None se o arquivo não existe."""
+    if not os.path.exists(REFERENCIA):
+        return None
+    with gzip.open(REFERENCIA, "rt", encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def gravar_referencia(infos):
+    os.makedirs(os.path.dirname(REFERENCIA), exist_ok=True)
+    with gzip.open(REFERENCIA, "wt", encoding="utf-8") as arquivo:
+        json.dump({'lote': LOTE_REFERENCIA, 'infos': infos}, arquivo, ensure_ascii=False, sort_keys=True)
+
+
+def comparar_referencia(infos):
+    """Mensagens de diferença entre `infos` e a referência gravada (lote padrão)."""
+    referencia = ler_referencia()
+    if referencia is None:
+        return [f"referência {REFERENCIA} não encontrada"]
+    if referencia['lote'] != LOTE_REFERENCIA or len(referencia['infos']) != len(infos):
+        return [f"referência gravada para outro lote: {referencia['lote']}"]
+    diferencas = []
+    for indice, (info, esperado) in enumerate(zip(infos, referencia['infos'])):
+        campos = sorted(campo for campo in set(info) | set(esperado) if info.get(campo) != esperado.get(campo))
+        if campos:
+            diferencas.append(f"documento {indice}: {campos}")
+    return diferencas
+
+
+def variacoes(texto, rnd, quantidade):
+    """O texto e versões alteradas dele, com os rótulos em posições e caixas diferentes."""
+    yield texto
+    yield texto.upper()
+    yield texto.lower()
+    yield texto + "\n" + texto
+    yield texto.replace("s", "ſ")
+    for _ in range(quantidade):
+        corte = rnd.randrange(len(texto) + 1)
+        trocados = "".join(c.swapcase() if rnd.random() < 0.1 else c for c in texto)
+        yield rnd.choice((texto[corte:], texto[:corte], trocados, texto[corte:] + texto[:corte]))
+
+
+def resumo(achados):
+    return {campo: [(match.span(), match.groups()) for match in matches] for campo, matches in achados.items()}
+
+
+def comparar_varreduras(textos, quantidade, semente=0):
+    """(textos comparados, diferenças, segundos varrer, segundos por campo)."""
+    rnd = random.Random(semente)
+    alvos = []
+    for paginas in textos:
+        for page_num, varredura in regex_.VARREDURAS_PAGINAS.items():
+            alvos.append((varredura, "\n".join(paginas[page_num:page_num + 1] if page_num < 2 else paginas[2:])))
+        texto_debitos = clean_text("\n" + "\n".join(paginas[3:]))
+        alvos += [(regex_.VARREDURA_DEBITOS, bloco) for bloco in IndiceSecoes(texto_debitos, tipos=('debito',)).blocos('debito')]
+
+    comparados = 0
+    diferencas = []
+    tempos = [0.0, 0.0]
+    for varredura, texto in alvos:
+        for variacao in variacoes(texto, rnd, quantidade):
+            inicio = time.perf_counter()
+            novo = resumo(varredura.varrer(variacao))
+            tempos[0] += time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            referencia = resumo(varredura.varrer_por_campo(variacao))
+            tempos[1] += time.perf_counter() - inicio
+            comparados += 1
+            if novo != referencia:
+                diferencas.append((variacao[:80], [campo for campo in novo if novo[campo] != referencia[campo]]))
+    return comparados, diferencas, tempos[0], tempos[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quantidade", type=int, default=40)
+    parser.add_argument("--debitos", type=int, default=30, help="Máximo de débitos por documento")
+    parser.add_argument("--variacoes", type=int, default=20, help="Versões aleatórias de cada texto")
+    parser.add_argument("--gravar-referencia", action="store_true",
+                        help="Regrava a referência com o resultado atual (lote padrão) e termina")
+    args = parser.parse_args(argv)
+
+    lote_padrao = args.quantidade == LOTE_REFERENCIA['quantidade'] and args.debitos == LOTE_REFERENCIA['debitos']
+    textos = extrair_textos(gerar_lote(
+        args.quantidade, args.debitos, LOTE_REFERENCIA['darfs'], LOTE_REFERENCIA['gps'], LOTE_REFERENCIA['origens']
+    ))
+    print(f"{len(textos)} documentos, {sum(len(paginas) for paginas in textos)} páginas")
+
+    falhou = False
+    segundos_varrer, infos = extrair_infos(textos)
+    if args.gravar_referencia:
+        if not lote_padrao:
+            print(f"A referência é gravada só para o lote padrão: {LOTE_REFERENCIA}")
+            return 1
+        gravar_referencia(infos)
+        print(f"Referência gravada em {REFERENCIA}")
+        return 0
+    if lote_padrao:
+        diferencas_referencia = comparar_referencia(infos)
+        for diferenca in diferencas_referencia[:10]:
+            print(f"FALHOU (referência): {diferenca}")
+        falhou = bool(diferencas_referencia)
+        if not falhou:
+            print(f"info idêntico à referência em {len(infos)} documentos")
+    else:
+        print("Lote diferente do padrão: comparação com a referência gravada ignorada")
+    segundos_por_campo, infos_referencia = extrair_infos(textos, por_campo=True)
+    print(f"extract_info_from_pages: varredura {segundos_varrer:.3f} s, busca por campo {segundos_por_campo:.3f} s")
+    documentos_diferentes = [i for i, (info, referencia) in enumerate(zip(infos, infos_referencia)) if info != referencia]
+    if documentos_diferentes:
+        falhou = True
+        print(f"FALHOU: info diferente nos documentos {documentos_diferentes[:10]}")
+
+    comparados, diferencas, segundos_varrer, segundos_por_campo = comparar_varreduras(textos, args.variacoes)
+    print(
+        f"{comparados} textos alterados: varredura {segundos_varrer:.3f} s, "
+        f"busca por campo {segundos_por_campo:.3f} s"
+    )
+    for texto, campos in diferencas[:10]:
+        print(f"FALHOU: {campos} em {texto!r}")
+    falhou = falhou or bool(diferencas)
+
+    if not falhou:
+        print("Resultados idênticos")
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Gerador de PDFs sintéticos de PER/DCOMP (PyMuPDF), com o layout de texto que
+RegexRules espera: cabeçalho nas páginas 1 a 3 e os blocos de débitos, DARF,
+GPS e origem do crédito nas páginas seguintes.
+
+Com blocos quebrados, "ORIGEM DO CRÉDITO" aparece uma só vez, antes do primeiro
+bloco de origem ou DARF (os DARF não têm a linha "DARF" no topo), e as páginas
+seguintes têm LINHAS_POR_PAGINA_QUEBRADOS linhas: os blocos ficam divididos em
+várias páginas, com o início em uma página que não tem o marcador da seção.
+
+Uso:
+    python -m benchmarks.gerador_perdcomp /tmp/pdfs --quantidade 50 --debitos 20 [--blocos-quebrados]
+"""
+import os
+import sys
+import random
+import argparse
+
+import fitz
+
+LINHAS_POR_PAGINA_QUEBRADOS = 5
+CABECALHOS_BLOCO = ("ORIGEM DO CRÉDITO", "DARF")
+
+TIPOS_DOCUMENTO = (
+    'Declaração de Compensação',
+    'Pedido de Restituição',
+    'Pedido de Ressarcimento',
+    'Pedido de Cancelamento',
+)
+
+
+def formatar_valor(valor):
+    """1234.5 -> '1.234,50'"""
+    return f"{valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def linhas_cabecalho(tipo, i):
+    cnpj = f"{10 + i % 80:02d}.345.678/0001-{i % 100:02d}"
+    cod = f"{10000 + i}.{20000 + i}.{230101 + i % 9}.1.3.02-{1000 + i % 9000}"
+    pagina1 = [
+        f"CNPJ {cnpj} {cod}",
+        f"Nome Empresarial EMPRESA TESTE {i} LTDA",
+        "Data de Transmissão 10/01/2023",
+        f"Tipo de Documento {tipo}",
+        "Tipo de Crédito Saldo Negativo de IRPJ",
+    ]
+    if tipo == 'Pedido de Cancelamento':
+        pagina1 += [f"Número do PER/DCOMP a Cancelar 11111.22222.230101.1.3.02-{i % 9000 + 1000}"]
+    else:
+        pagina1 += ["PER/DCOMP Retificador Não", "Crédito Oriundo de Ação Judicial Não"]
+    pagina1 += ["Nome FULANO DE TAL CPF 123.456.789-00"]
+
+    pagina2 = ["Responsável pelo preenchimento", "Nome MARIA SILVA CPF 987.654.321-00"]
+
+    pagina3 = [
+        "Informado em Outro PER/DCOMP Não",
+        "Data Inicial do Período 01/01/2022",
+        "Data Final do Período 31/12/2022",
+        "Forma de Tributação do Lucro Lucro Real",
+        "Forma de Apuração Anual",
+        "Exercício 2023",
+        "Valor do Saldo Negativo 12.345,67",
+        "Crédito Original na Data da Entrega 10.000,00",
+        "Selic Acumulada 12,34",
+        "Crédito Atualizado 11.234,56",
+        "Total dos Débitos deste Documento 5.000,00",
+        "Total do Crédito Original Utilizado neste Documento 4.000,00 ",
+        "Saldo do Crédito Original 6.000,00",
+        "Imposto Devido 1.000,00",
+    ]
+    if tipo == 'Pedido de Ressarcimento':
+        pagina3 += ["Ano 2022", "1º Trimestre"]
+    return pagina1, pagina2, pagina3
+
+
+def linhas_debito(n, rnd):
+    principal = rnd.randint(1, 500000) + rnd.randint(0, 99) / 100
+    juros = rnd.randint(0, 9999) / 100
+    return [
+        f"{n:03d}. Débito",
+        "CNPJ do Detentor do Débito 12.345.678/0001-90",
+        "Débito de Sucedida Não",
+        "Grupo de Tributo IRPJ",
+        "Código da Receita/Denominação 2362-01 - IRPJ - PJ obrigadas ao lucro real",
+        "Débito Controlado em Processo Não",
+        "Período de Apuração Janeiro de 2023",
+        "Periodicidade Mensal",
+        "Data de Vencimento do Tributo/Quota 28/02/2023",
+        f"Principal {formatar_valor(principal)}",
+        "Multa 0,00",
+        f"Juros {formatar_valor(juros)}",
+        f"Total {formatar_valor(principal + juros)}",
+    ]
+
+
+def linhas_darf(n, rnd):
+    principal = rnd.randint(1, 100000)
+    return [
+        "ORIGEM DO CRÉDITO",
+        "DARF",
+        f"Período de Apuração 31/0{1 + n % 9}/2022",
+        " CNPJ 12.345.678/0001-90 ",
+        "Código da Receita 2362",
+        f"Número do Documento de Arrecadação 0{n}.123.456",
+        "Data de Vencimento 28/02/2022",
+        "Data da Arrecadação 28/02/2022",
+        f"Valor do Principal {formatar_valor(principal)}",
+        "Valor da Multa 0,00",
+        "Valor dos Juros 0,00",
+        f"Valor Total do DARF {formatar_valor(principal)}",
+        f"Valor Original do Crédito {formatar_valor(principal * 0.9)}",
+    ]
+
+
+def linhas_origem(n, rnd):
+    principal = rnd.randint(1, 100000)
+    return [
+        "ORIGEM DO CRÉDITO",
+        f"{n}. Período de Apuração 31/12/2022",
+        "CNPJ do Pagamento 12.345.678/0001-90",
+        "Código da Receita 2362-01",
+        "Grupo de Tributo IRPJ",
+        "Data de Arrecadação 31/01/2023",
+        f"Valor do Principal {formatar_valor(principal)}",
+        "Valor da Multa 10,00",
+        "Valor dos Juros 5,00",
+        f"Valor Total {formatar_valor(principal + 15)}",
+        f"Valor Original do Crédito {formatar_valor(principal * 0.75)}",
+    ]
+
+
+def linhas_gps(n, rnd):
+    inss = rnd.randint(1, 50000)
+    return [
+        f"{n:04d}. Código do Pagamento 2100",
+        "Competência Janeiro de 2022",
+        "Identificador do Detentor do Crédito 12.345.678/0001-90",
+        "Data da Arrecadação 20/02/2022",
+        f"Valor do INSS {formatar_valor(inss)}",
+        "Valor de Outras Entidades 50,00",
+        "Valor de ATM, Multa e Juros 0,00",
+        f"Valor Total da GPS {formatar_valor(inss + 50)}",
+    ]
+
+
+def gerar_pdf(tipo='Declaração de Compensação', debitos=3, darfs=1, gps=1, origens=0, indice=0, linhas_por_pagina=45,
+              blocos_quebrados=False):
+    """
+    Bytes de um PDF de PER/DCOMP sintético. `indice` muda CNPJ e número do
+    PER/DCOMP e é a semente dos valores, então o mesmo indice gera o mesmo PDF.
+    Com blocos_quebrados=True, os blocos são divididos entre páginas (ver o
+    docstring do módulo).
+    """
+    if tipo not in TIPOS_DOCUMENTO:
+        raise ValueError(f"Tipo de documento desconhecido: {tipo}. Opções: {TIPOS_DOCUMENTO}")
+    rnd = random.Random(indice)
+
+    pagina1, pagina2, pagina3 = linhas_cabecalho(tipo, indice)
+    blocos = []
+    for n in range(1, origens + 1):
+        blocos += linhas_origem(n, rnd)
+    for n in range(1, darfs + 1):
+        blocos += linhas_darf(n, rnd)
+    for n in range(1, gps + 1):
+        blocos += linhas_gps(n, rnd)
+    for n in range(1, debitos + 1):
+        blocos += linhas_debito(n, rnd)
+    if blocos_quebrados:
+        linhas_por_pagina = LINHAS_POR_PAGINA_QUEBRADOS
+        cabecalho = ["ORIGEM DO CRÉDITO"] if origens or darfs else []
+        blocos = cabecalho + [linha for linha in blocos if linha not in CABECALHOS_BLOCO]
+
+    paginas = [pagina1, pagina2, pagina3]
+    paginas += [blocos[inicio:inicio + linhas_por_pagina] for inicio in range(0, len(blocos), linhas_por_pagina)]
+
+    documento = fitz.open()
+    for linhas in paginas:
+        pagina = documento.new_page()
+        y = 40
+        for linha in linhas:
+            pagina.insert_text((40, y), linha, fontsize=9, fontname="helv")
+            y += 16
+    pdf_bytes = documento.tobytes()
+    documento.close()
+    return pdf_bytes
+
+
+def gerar_lote(quantidade, debitos=10, darfs=1, gps=1, origens=1, variar=True, blocos_quebrados=False):
+    """
+    Lista de (nome, pdf_bytes) alternando os quatro tipos de documento.
+    Com variar=True, a quantidade de cada bloco vai de 0 ao valor informado.
+    """
+    arquivos = []
+    for indice in range(quantidade):
+        rnd = random.Random(indice)
+        tipo = TIPOS_DOCUMENTO[indice % len(TIPOS_DOCUMENTO)]
+        quantidades = {
+            'debitos': debitos, 'darfs': darfs, 'gps': gps, 'origens': origens,
+        }
+        if variar:
+            quantidades = {bloco: rnd.randint(0, maximo) for bloco, maximo in quantidades.items()}
+        if tipo != 'Declaração de Compensação':
+            # Somente declarações de compensação trazem débitos
+            quantidades['debitos'] = 0
+        arquivos.append((f"perdcomp_{indice:05d}.pdf", gerar_pdf(tipo, indice=indice, blocos_quebrados=blocos_quebrados, **quantidades)))
+    return arquivos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera PDFs sintéticos de PER/DCOMP.")
+    parser.add_argument("pasta", help="Pasta de destino")
+    parser.add_argument("--quantidade", type=int, default=20)
+    parser.add_argument("--debitos", type=int, default=10, help="Máximo de débitos por documento")
+    parser.add_argument("--darfs", type=int, default=1)
+    parser.add_argument("--gps", type=int, default=1)
+    parser.add_argument("--origens", type=int, default=1)
+    parser.add_argument("--fixo", action="store_true", help="Usa exatamente as quantidades informadas")
+    parser.add_argument("--blocos-quebrados", action="store_true", help="Divide os blocos entre páginas")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.pasta, exist_ok=True)
+    arquivos = gerar_lote(args.quantidade, args.debitos, args.darfs, args.gps, args.origens, variar=not args.fixo,
+                          blocos_quebrados=args.blocos_quebrados)
+    for nome, pdf_bytes in arquivos:
+        with open(os.path.join(args.pasta, nome), "wb") as arquivo:
+            arquivo.write(pdf_bytes)
+    print(f"{len(arquivos)} PDF(s) gravados em {args.pasta}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Perfil das regras de extração (RegexRules): chamadas, taxa de match e tempo de
+cada regra do registro REGRAS, para achar as regras lentas e as que nunca casam.
+O texto das páginas é extraído antes, fora da medição; a análise roda em um só
+processo com o registro instrumentado. Com --cache-textos, o texto vem do cache
+de textos (CacheTextos) e é guardado nele na primeira execução: ao iterar sobre
+uma regra, as execuções seguintes não leem os PDFs de novo.
+
+Uso:
+    python -m benchmarks.perfil_regras [PASTA_COM_PDFS] [--quantidade 40] [--limite 20] [--json perfil.json]
+                                       [--cache-textos [CAMINHO]]
+
+Sem pasta, usa PDFs gerados por benchmarks.gerador_perdcomp.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from benchmarks.gerador_perdcomp import gerar_lote
+from processamento_de_arquivos.processamento import Processamento
+from processamento_de_arquivos.cache_textos import CacheTextos, CAMINHO_PADRAO as CACHE_TEXTOS_PADRAO
+from regex_rules.regex_ import RegexRules, REGRAS
+from regex_rules.texto_paginas import TextoPaginas, MOTORES_TEXTO
+
+
+def extrair_textos(arquivos, motor, cache_textos=None):
+    textos = []
+    for nome, pdf_bytes in arquivos:
+        try:
+            textos.append(Processamento.textos_pdf(pdf_bytes, motor, cache_textos=cache_textos))
+        except Exception as e:
+            print(f"[AVISO] {nome} ignorado: {e}")
+    return textos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pasta", nargs="?", help="Pasta com PDFs de PER/DCOMP")
+    parser.add_argument("--quantidade", type=int, default=40, help="PDFs gerados, se não houver pasta")
+    parser.add_argument("--motor", default="pdfplumber", choices=MOTORES_TEXTO)
+    parser.add_argument("--limite", type=int, default=20, help="Regras mais lentas listadas")
+    parser.add_argument("--json", help="Grava as estatísticas de todas as regras neste arquivo")
+    parser.add_argument("--cache-textos", nargs="?", const=CACHE_TEXTOS_PADRAO, metavar="CAMINHO",
+                        help="Lê e guarda o texto das páginas no cache de textos")
+    args = parser.parse_args(argv)
+
+    if args.pasta:
+        arquivos = []
+        for nome in sorted(os.listdir(args.pasta)):
+            if nome.lower().endswith(".pdf"):
+                with open(os.path.join(args.pasta, nome), "rb") as arquivo:
+                    arquivos.append((nome, arquivo.read()))
+    else:
+        arquivos = gerar_lote(args.quantidade, 30, 3, 3, 3)
+    cache_textos = CacheTextos(args.cache_textos) if args.cache_textos else None
+    inicio = time.perf_counter()
+    textos = extrair_textos(arquivos, args.motor, cache_textos)
+    print(f"Texto de {len(textos)} documentos em {time.perf_counter() - inicio:.3f} s"
+          + (f" ({cache_textos.acertos} do cache de textos)" if cache_textos is not None else ""))
+
+    REGRAS.instrumentar()
+    inicio = time.perf_counter()
+    for paginas in textos:
+        RegexRules.extract_info_from_pages(TextoPaginas.de_textos(paginas, args.motor))
+    segundos = time.perf_counter() - inicio
+    REGRAS.instrumentar(False)
+
+    print(f"{len(textos)} documentos analisados em {segundos:.3f} s ({len(REGRAS.regras)} regras)")
+    print(REGRAS.relatorio(args.limite))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump({'versao': REGRAS.versao, 'regras': REGRAS.estatisticas()}, arquivo, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
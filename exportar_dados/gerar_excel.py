@@ -1,19 +1,73 @@
 import pandas as pd
 import io
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+MOTORES_EXCEL = ('openpyxl', 'streaming')
 
 class ExportarDados():
 
     @staticmethod
-    def gerar_excel_em_memoria(df1, df2, df_tabelona, df3, df4, df5):
+    def gerar_excel_em_memoria(df1, df2, df_tabelona, df3, df4, df5, motor='openpyxl'):
+        """
+        Gera o Excel com as seis planilhas em um BytesIO.
+        motor='streaming' grava as linhas em modo write-only do openpyxl, sem montar
+        a planilha inteira em memória; as planilhas e a ordem são as mesmas.
+        """
+        planilhas = [
+            ("Tabela Geral", df_tabelona),
+            ("Tabela PERDCOMP", df1),
+            ("Tabela Tributos", df2),
+            ("Tabela Origem Crédito", df3),
+            ("Tabela DARF", df4),
+            ("Tabela GPS", df5),
+        ]
 
         output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df_tabelona.to_excel(writer, sheet_name="Tabela Geral", index=False)
-            df1.to_excel(writer, sheet_name="Tabela PERDCOMP", index=False)
-            df2.to_excel(writer, sheet_name="Tabela Tributos", index=False)
-            df3.to_excel(writer, sheet_name="Tabela Origem Crédito", index=False)
-            df4.to_excel(writer, sheet_name="Tabela DARF", index=False) 
-            df5.to_excel(writer, sheet_name="Tabela GPS", index=False)
+        if motor == 'streaming':
+            ExportarDados.escrever_excel_streaming(output, planilhas)
+        elif motor == 'openpyxl':
+            with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                for nome, df in planilhas:
+                    df.to_excel(writer, sheet_name=nome, index=False)
+        else:
+            raise ValueError(f"Motor de Excel desconhecido: {motor}. Opções: {MOTORES_EXCEL}")
         output.seek(0)
-        
+
         return output
+
+    @staticmethod
+    def escrever_excel_streaming(destino, planilhas, linhas_por_bloco=2000):
+        """
+        Escreve [(nome, df)] em `destino` (caminho ou arquivo) linha a linha.
+        Os DataFrames são convertidos em blocos, então a memória extra não cresce
+        com o número de linhas.
+        """
+        workbook = Workbook(write_only=True)
+        # Mesmo estilo de cabeçalho do pandas.to_excel
+        borda = Side(style='thin')
+        fonte_cabecalho = Font(bold=True)
+        borda_cabecalho = Border(left=borda, right=borda, top=borda, bottom=borda)
+        alinhamento_cabecalho = Alignment(horizontal='center', vertical='top')
+
+        for nome, df in planilhas:
+            worksheet = workbook.create_sheet(title=nome)
+
+            cabecalho = []
+            for coluna in df.columns:
+                celula = WriteOnlyCell(worksheet, value=str(coluna))
+                celula.font = fonte_cabecalho
+                celula.border = borda_cabecalho
+                celula.alignment = alinhamento_cabecalho
+                cabecalho.append(celula)
+            worksheet.append(cabecalho)
+
+            for inicio in range(0, len(df), linhas_por_bloco):
+                bloco = df.iloc[inicio:inicio + linhas_por_bloco].astype(object)
+                # NaN/None viram células vazias, como no to_excel
+                bloco = bloco.where(bloco.notna(), None)
+                for linha in bloco.itertuples(index=False, name=None):
+                    worksheet.append(linha)
+
+        workbook.save(destino)
@@ -1,11 +1,180 @@
+import io
 import re
+import time
+import hashlib
+import tempfile
 import pandas as pd
 #import calendar
 import streamlit as st
 
 from exportar_dados.gerar_excel import ExportarDados
 from processamento_de_arquivos.processamento import Processamento
-from limpeza_dos_dados.tratamentos_dados import LimpezaETratamentoDados
+from processamento_de_arquivos.cache_resultados import CacheResultados, hash_pdf
+from processamento_de_arquivos.cache_textos import CacheTextos
+from processamento_de_arquivos.fila_trabalhos import FilaTrabalhos, PENDENTE, EXECUTANDO, CONCLUIDO, CANCELADO
+from limpeza_dos_dados.montagem_tabelas import MontagemTabelas, TABELA1_COLS
+
+# Resultados completos (tabelas + Excel) guardados entre reruns do Streamlit
+CACHE_TTL_SEGUNDOS = 60 * 60
+CACHE_MAX_ENTRADAS = 10
+# Acima deste total, os PDFs enviados são gravados em disco antes da extração
+LIMITE_BAIXA_MEMORIA_BYTES = 100 * 1024 * 1024
+# Intervalo entre consultas ao status de um trabalho da fila
+INTERVALO_CONSULTA_FILA_S = 2
+
+
+class LoteNaoProcessado(Exception):
+    """Sinaliza que o lote ainda não está no cache e precisa ser extraído."""
+
+
+@st.cache_data(ttl=CACHE_TTL_SEGUNDOS, max_entries=CACHE_MAX_ENTRADAS, show_spinner="Montando as tabelas...")
+def montar_resultado(chave_pdfs, chave_txt, _infos, _erros, _txt_bytes):
+    """
+    Montagem das tabelas e geração do Excel de um lote já extraído.
+    O Streamlit só usa `chave_pdfs` (nome + SHA-256 de cada PDF) e `chave_txt`
+    para identificar o lote; os parâmetros com '_' não entram no hash.
+
+    Chamada com `_infos=None` apenas consulta o cache: exceções não são
+    guardadas pelo st.cache_data, então LoteNaoProcessado indica um miss.
+    """
+    if _infos is None:
+        raise LoteNaoProcessado()
+
+    df_result = Processamento.montar_dataframe(_infos)
+
+    df_txt = None
+    if _txt_bytes is not None:
+        df_txt = Processamento.ler_arquivo_txt(io.BytesIO(_txt_bytes), 'cod_perdcomp', 'situacao_perdcomp')
+
+    # Valores em centavos até aqui; formato brasileiro só para exibir e exportar
+    tabelas = MontagemTabelas.formatar_tabelas(MontagemTabelas.montar_tabelas(df_result, df_txt))
+    excel_bytes = ExportarDados.gerar_excel_em_memoria(
+        tabelas['tabela1'], tabelas['tabela2'], tabelas['tabelona'],
+        tabelas['tabela3'], tabelas['tabela4'], tabelas['tabela5']
+    ).getvalue()
+    return tabelas, excel_bytes, MontagemTabelas.nome_arquivo_excel(tabelas['tabela1']), _erros
+
+
+def extrair_com_progresso(arquivos_pdf, baixa_memoria=False):
+    """
+    Extrai os PDFs mostrando o andamento: barra de progresso com arquivos/s e ETA,
+    prévia da Tabela 1 crescendo a cada arquivo e falhas listadas sem parar o lote.
+    """
+    total = len(arquivos_pdf)
+    barra = st.progress(0.0, text=f"0/{total} arquivos")
+    previa = st.empty()
+    espaco_erros = st.empty()
+    area_erros = espaco_erros.container()
+
+    infos = [None] * total
+    erros = []
+    inicio = time.perf_counter()
+    ultima_previa = 0.0
+    eventos = Processamento.iterar_pdf_bytes(
+        arquivos_pdf, workers=None, cache=CacheResultados(), baixa_memoria=baixa_memoria, cache_textos=CacheTextos()
+    )
+    for concluidos, (indice, nome, info, erro) in enumerate(eventos, start=1):
+        if erro is not None:
+            erros.append((nome, erro))
+            area_erros.warning(f"Falha ao processar {nome}: {erro}")
+        else:
+            infos[indice] = info
+
+        decorrido = time.perf_counter() - inicio
+        taxa = concluidos / decorrido if decorrido > 0 else 0.0
+        eta = (total - concluidos) / taxa if taxa > 0 else 0.0
+        barra.progress(
+            concluidos / total,
+            text=f"{concluidos}/{total} arquivos · {taxa:.1f} arquivos/s · ETA {eta:.0f}s"
+        )
+
+        # Atualizar a prévia no máximo duas vezes por segundo
+        if concluidos == total or decorrido - ultima_previa >= 0.5:
+            ultima_previa = decorrido
+            registros = [info for info in infos if info is not None]
+            if registros:
+                previa.dataframe(pd.DataFrame(registros).reindex(columns=TABELA1_COLS))
+
+    # Ao final, as falhas são exibidas junto com o resultado do lote
+    barra.empty()
+    previa.empty()
+    espaco_erros.empty()
+    return [info for info in infos if info is not None], erros
+
+
+def acompanhar_trabalho(fila, id_trabalho):
+    """
+    Mostra o andamento de um trabalho da fila e retorna o resultado quando ele
+    termina (None se falhou, foi cancelado ou não existe). Enquanto o trabalho
+    está pendente ou executando, a página é recarregada a cada
+    INTERVALO_CONSULTA_FILA_S segundos.
+    """
+    status = fila.status(id_trabalho)
+    if status is None:
+        st.error(f"Trabalho {id_trabalho} não encontrado.")
+        return None
+
+    if status['status'] in (PENDENTE, EXECUTANDO):
+        if status['status'] == PENDENTE:
+            st.info(f"Trabalho na fila (posição {status['posicao']}). Você pode fechar esta aba e voltar pelo mesmo link.")
+            if st.button("Cancelar trabalho"):
+                fila.cancelar(id_trabalho)
+                st.rerun()
+        else:
+            st.progress(
+                status['concluidos'] / max(status['total'], 1),
+                text=f"{status['concluidos']}/{status['total']} arquivos processados em segundo plano"
+            )
+        time.sleep(INTERVALO_CONSULTA_FILA_S)
+        st.rerun()
+
+    if status['status'] == CANCELADO:
+        st.warning("Trabalho cancelado.")
+        return None
+    if status['status'] != CONCLUIDO:
+        st.error(f"O trabalho falhou: {status['mensagem']}")
+        return None
+    return fila.resultado(id_trabalho)
+
+
+def exibir_resultado(resultado):
+    tabelas, excel_bytes, nome_arquivo_excel, erros = resultado
+    for nome, erro in erros:
+        st.warning(f"Falha ao processar {nome}: {erro}")
+
+    df_tabela1 = tabelas['tabela1']
+    df_tabela2_explodida = tabelas['tabela2']
+    df_tabela3 = tabelas['tabela3']
+    df_tabela4 = tabelas['tabela4']
+    df_tabela5 = tabelas['tabela5']
+    df_tabelona = tabelas['tabelona']
+
+    st.subheader("Tabela Geral")
+    st.dataframe(df_tabelona)
+
+    st.subheader("Tabela 1 - Dados das PER/DCOMP")
+    st.dataframe(df_tabela1)
+
+    st.subheader("Tabela 2 - Detalhamento de Tributos Compensados da PER/DCOMP")
+    st.dataframe(df_tabela2_explodida)
+
+    st.subheader("Tabela 3 - Dados Origem do Créditos")
+    st.dataframe(df_tabela3)
+
+    st.subheader("Tabela 4 - Dados DARF Pagos")
+    st.dataframe(df_tabela4)
+
+    st.subheader("Tabela 5 - Dados GPS Pagos")
+    st.dataframe(df_tabela5)
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> ALTERAR AQUI <<
+   # Botão para download
+    st.download_button(
+        label="Baixar arquivo Excel",
+        data=excel_bytes,
+        file_name=nome_arquivo_excel,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+)
 
 
 def main():
@@ -38,231 +207,56 @@ def main():
         accept_multiple_files=False)
 # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> <
 
-    if uploaded_files_1:
-        df_result = Processamento.process_pdfs_in_memory(uploaded_files_1)
-
-        # Monta Tabela1 / Tabela2
-        tabela1_cols = [
-            'cod_cnpj',
-            'nome_cliente',
-            'cod_perdcomp',
-            'data_transmissao',
-            'tipo_documento',
-            'tipo_credito',
-            'perdcomp_retificador',
-            'cod_perdcomp_retificacao',
-            'origem_credito_judicial',
-            'nome_responsavel_preenchimento',
-            'cod_cpf_preenchimento',
-            'cod_perdcomp_inicial',
-            'data_inicial_periodo',
-            'data_final_periodo',
-            'data_competencia',
-            'competencia',
-            'forma_tributacao_lucro',
-            'forma_apuracao',
-            'exercicio',
-            'data_arrecadacao', 
-            'selic_acumulada',
-            'valor_credito_passivel_restituicao',
-            'valor_original_credito_utilizado_compensacoes_gfip',
-            'valor_disponivel_para_restituicao_apurado_documento_inicial', 
-            'imposto_devido', 
-            'csll_devida',
-            'total_parcelas_composicao_credito',
-            'valor_original_credito_inicial',
-            'valor_saldo_negativo',
-            'valor_credito_original_data_entrega',
-            'valor_pedido_restituicao',
-            'valor_credito_atualizado',
-            'valor_total_debitos_deste_documento',
-            'valor_total_credito_original_utilizado_documento',
-            'valor_total_debitos_desta_dcomp', 
-            'valor_total_credito_original_utilizado_dcomp',
-            'valor_saldo_credito_original',
-            'cod_perdcomp_cancelado',
-            'Arquivo', 
-        ]
-        tabela2_cols = [
-            'cod_perdcomp',
-            'cnpj_detentor_debito',
-            'debito_sucedida',
-            'grupo_tributo',
-            'debito_controlado_processo',
-            'periodo_apuracao',
-            'periodicidade',
-            'codigos_receita',
-            'data_vencimento_tributo',
-            'numero_recibo_dctfweb',
-            'data_transmissao_dctfweb',
-            'categoria_dcftweb',
-            'periodicidade_dctfweb',
-            'periodo_apuracao_dctfweb',
-            'valor_principal_tributo',
-            'valor_multa_tributo',
-            'valor_juros_tributo',
-            'valor_total_tributo'
-        ]
-
-        tabela3_cols =[   
-            'cod_perdcomp',
-            'periodo_apuracao_origem_credito',
-            'cnpj_pagamento_origem_credito',
-            'codigo_receita_origem_credito',
-            'grupo_tributo_origem_credito',
-            'data_arrecadacao_origem_credito', 
-            'valor_principal_origem_credito',
-            'valor_multa_origem_credito', 
-            'valor_juros_origem_credito',
-            'valor_total_origem_credito', 
-            'valor_original_credito_origem_credito',
-            ]
-
-        tabela4_cols = [
-            'cod_perdcomp',
-            'periodo_apuracao_darf',
-            'cnpj_darf',
-            'codigo_receita_darf',
-            'numero_documento_arrecadacao',
-            'data_vencimento_darf',
-            'data_arrecadacao_darf',
-            'valor_principal_darf',
-            'valor_multa_darf',
-            'valor_juros_darf',
-            'valor_total_darf',
-            'valor_original_credito_darf',
-        ]
-
-        tabela5_cols = [
-            'cod_perdcomp',
-            'codigo_pagamento_gps',
-            'data_competencia_gps',
-            'periodo_apuracao_gps',
-            'identificador_detentor_credito_gps',
-            'data_arrecadacao_gps',
-            'valor_inss_gps',
-            'valor_outras_entidades_gps',
-            'valor_atm_multa_juros_gps',
-            'valor_total_gps',
-        ]
-
-        df_tabela1 = df_result[tabela1_cols].copy()
-        df_tabela2 = df_result[tabela2_cols].copy()
-        df_tabela3 = df_result[tabela3_cols].copy()
-        df_tabela4 = df_result[tabela4_cols].copy()
-        df_tabela5 = df_result[tabela5_cols].copy()
-
-      # Explodir Tabela2 (múltiplas linhas viram colunas numeradas)
-        df_tabela2_explodida = LimpezaETratamentoDados.explodir_tabela2(df_tabela2)
-        df_tabela3 = LimpezaETratamentoDados.explodir_origem_credito(df_tabela3)
-        df_tabela4 = LimpezaETratamentoDados.explodir_darf(df_tabela4)
-        df_tabela5 = LimpezaETratamentoDados.explodir_gps(df_tabela5)
-        df_tabela3, df_tabela4 = LimpezaETratamentoDados.limpar_tabelas_3_e_4(df_tabela3, df_tabela4)
-
-
-        #Substituir '.' por ',' nas colunas de tributos na Tabela2 explodida
-        tributo_cols = ['valor_principal_tributo', 'valor_multa_tributo', 'valor_juros_tributo', 'valor_total_tributo']
-        for col in tributo_cols:
-            if col in df_tabela2_explodida.columns:
-                # Garantir que a coluna é string antes de replace, se não for string, converter
-                df_tabela2_explodida[col] = df_tabela2_explodida[col].astype(str).str.replace('.', ',', regex=False)
-
-        # Criar Tabelona com as colunas numeradas corretamente
-        df_tabelona = LimpezaETratamentoDados.criar_tabelona(df_tabela1, df_tabela2_explodida, df_tabela3, df_tabela4)
-
-        colunas_para_somar = [
-            'valor_principal_tributo',
-            'valor_multa_tributo',
-            'valor_juros_tributo',
-            'valor_total_tributo'
-        ]
-
-        df_totalizadores = df_tabela2_explodida.copy()
-
-        # Converter as colunas para números
-        for coluna in colunas_para_somar:
-            df_totalizadores[coluna] = (
-                df_totalizadores[coluna]
-                .str.replace('.', '', regex=False) 
-                .str.replace(',', '.', regex=False)  
-                .apply(pd.to_numeric, errors='coerce')
-        )
-        
-        df_totalizadores = (
-            df_totalizadores.groupby('cod_perdcomp')[colunas_para_somar]
-            .sum().round(2)
-            .reset_index()
-        )
-
-        for coluna in colunas_para_somar:
-            df_totalizadores[coluna] = df_totalizadores[coluna].astype(str).str.replace('.', ',', regex=False)
-
-
-        df_totalizadores.columns = [
-            'cod_perdcomp',
-            'total_valor_principal_tributo',
-            'total_valor_multa_tributo',
-            'total_valor_juros_tributo',
-            'total_valor_total_tributo'
-        ]
-        
-        # Mesclar os totais na Tabela 1
-        df_tabela1 = df_tabela1.merge(df_totalizadores, on='cod_perdcomp', how='left')
-
-
-         # Processar o arquivo TXT, se enviado
-        if uploaded_files_2:
-            df_txt = Processamento.ler_arquivo_txt(uploaded_files_2, 'cod_perdcomp', 'situacao_perdcomp')
-            
-            if not df_txt.empty:
-                #st.subheader("Dados do Arquivo TXT")
-                #st.dataframe(df_txt)  # Exibir o DataFrame do TXT para verificação
-
-                # Garantir que a coluna 'cod_perdcomp' em df_txt e df_tabela1 tenha o mesmo tipo
-                df_txt['cod_perdcomp'] = df_txt['cod_perdcomp'].astype(str)
-                df_tabela1['cod_perdcomp'] = df_tabela1['cod_perdcomp'].astype(str)
-
-                # Mesclar os dados do TXT na Tabela 1
-                df_tabela1 = df_tabela1.merge(df_txt, on='cod_perdcomp', how='left')
-
-                # Preencher valores ausentes na coluna 'situacao_perdcomp'
-                df_tabela1['situacao_perdcomp'] = df_tabela1['situacao_perdcomp'].fillna('---')
-
-        st.subheader("Tabela Geral")
-        st.dataframe(df_tabelona)
-
-        st.subheader("Tabela 1 - Dados das PER/DCOMP")
-        st.dataframe(df_tabela1)
-
-        st.subheader("Tabela 2 - Detalhamento de Tributos Compensados da PER/DCOMP")
-        st.dataframe(df_tabela2_explodida)
-
-        st.subheader("Tabela 3 - Dados Origem do Créditos")
-        st.dataframe(df_tabela3)
-
-        st.subheader("Tabela 4 - Dados DARF Pagos")
-        st.dataframe(df_tabela4)
-
-        st.subheader("Tabela 5 - Dados GPS Pagos")
-        st.dataframe(df_tabela5)
+    segundo_plano = st.sidebar.checkbox(
+        "Processar em segundo plano",
+        help="Envia o lote para a fila de extrações; o resultado fica disponível pelo link da página mesmo se a aba for fechada."
+    )
+    usuario = st.sidebar.text_input("Usuário", value="anonimo") or "anonimo"
 
-        nome_arquivo_excel = "extract_pdf_result.xlsx"
-        if not df_tabela1.empty:
-            nome_cliente = df_tabela1.iloc[0].get("nome_cliente", "")
-            if nome_cliente:
-                nome_cliente = nome_cliente.strip().split(" ")[0]
-                nome_arquivo_excel = f"{nome_cliente}_Export_PERDCOMPs.xlsx"
+    # Trabalho da fila indicado no link (?trabalho=<id>), p.ex. ao reabrir a aba
+    id_trabalho = st.query_params.get("trabalho")
+    if id_trabalho and not uploaded_files_1:
+        resultado = acompanhar_trabalho(FilaTrabalhos(), id_trabalho)
+        if resultado is not None:
+            exibir_resultado(resultado)
+        return
 
-        # Gerar Excel em memória
-        excel_bytes = ExportarDados.gerar_excel_em_memoria( df_tabela1, df_tabela2_explodida, df_tabelona, df_tabela3, df_tabela4, df_tabela5)
-# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> ALTERAR AQUI <<
-       # Botão para download
-        st.download_button(
-            label="Baixar arquivo Excel",
-            data=excel_bytes,
-            file_name=nome_arquivo_excel,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    if uploaded_files_1:
+        # getbuffer() expõe os bytes do upload sem copiá-los
+        chave_pdfs = tuple((uploaded_file.name, hash_pdf(uploaded_file.getbuffer())) for uploaded_file in uploaded_files_1)
+        baixa_memoria = sum(uploaded_file.size for uploaded_file in uploaded_files_1) > LIMITE_BAIXA_MEMORIA_BYTES
+
+        txt_bytes = uploaded_files_2.getvalue() if uploaded_files_2 else None
+        chave_txt = hashlib.sha256(txt_bytes).hexdigest() if txt_bytes is not None else None
+
+        try:
+            resultado = montar_resultado(chave_pdfs, chave_txt, None, None, None)
+        except LoteNaoProcessado:
+            if segundo_plano:
+                # Um trabalho por lote e sessão; reruns apenas acompanham o andamento
+                trabalhos = st.session_state.setdefault("trabalhos_fila", {})
+                fila = FilaTrabalhos()
+                if (chave_pdfs, chave_txt) not in trabalhos:
+                    trabalhos[(chave_pdfs, chave_txt)] = fila.enviar(uploaded_files_1, txt_bytes, usuario)
+                id_trabalho = trabalhos[(chave_pdfs, chave_txt)]
+                st.query_params["trabalho"] = id_trabalho
+                resultado = acompanhar_trabalho(fila, id_trabalho)
+                if resultado is not None:
+                    exibir_resultado(resultado)
+                return
+
+            with tempfile.TemporaryDirectory(prefix="perdcomp_") as pasta:
+                if baixa_memoria:
+                    arquivos_pdf = Processamento.gravar_em_disco(uploaded_files_1, pasta)
+                else:
+                    arquivos_pdf = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files_1]
+                infos, erros = extrair_com_progresso(arquivos_pdf, baixa_memoria)
+            if not infos:
+                st.error("Nenhum dos arquivos enviados pôde ser processado.")
+                return
+            resultado = montar_resultado(chave_pdfs, chave_txt, infos, erros, txt_bytes)
+
+        exibir_resultado(resultado)
 
     else:
         st.info("Por favor, faça o upload de um ou mais arquivos PDF.")
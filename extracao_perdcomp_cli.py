@@ -0,0 +1,188 @@
+"""
+Extração de PER/DCOMP em lote pela linha de comando (sem Streamlit).
+
+Exemplos:
+    python extracao_perdcomp_cli.py /dados/cliente_x --saida /dados/saida
+    python extracao_perdcomp_cli.py "/dados/**/*.pdf" --txt situacao.txt --workers 8
+    python extracao_perdcomp_cli.py /dados/cliente_x --catalogo   # só extrai os PDFs novos
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+from exportar_dados.gerar_excel import ExportarDados, MOTORES_EXCEL
+from processamento_de_arquivos.processamento import Processamento
+from processamento_de_arquivos.cache_resultados import CacheResultados, hash_pdf
+from processamento_de_arquivos.cache_textos import CacheTextos
+from processamento_de_arquivos.catalogo import CatalogoPerdcomp, CAMINHO_PADRAO as CATALOGO_PADRAO
+from limpeza_dos_dados.montagem_tabelas import MontagemTabelas
+from regex_rules.texto_paginas import MOTORES_TEXTO
+
+
+def listar_pdfs(entradas):
+    """Expande pastas (recursivamente) e padrões glob em uma lista ordenada de PDFs."""
+    caminhos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            caminhos.extend(glob.glob(os.path.join(entrada, "**", "*.pdf"), recursive=True))
+            caminhos.extend(glob.glob(os.path.join(entrada, "**", "*.PDF"), recursive=True))
+        else:
+            caminhos.extend(glob.glob(entrada, recursive=True))
+    return sorted(set(caminhos))
+
+
+def extrair(arquivos, cache, cache_textos, args):
+    """
+    Extrai os PDFs de `arquivos` sem parar nos que falham, como no app Streamlit.
+    Retorna ([info ou None, na ordem de `arquivos`], [(nome, erro)]).
+    """
+    infos = [None] * len(arquivos)
+    erros = []
+    for indice, nome, info, erro in Processamento.iterar_pdf_bytes(
+        arquivos, workers=args.workers, cache=cache,
+        motor=args.motor, baixa_memoria=args.baixa_memoria, cache_textos=cache_textos
+    ):
+        if erro is not None:
+            print(f" ======= > LOG ERROR < ======== :  {nome}: {erro}")
+            erros.append((nome, erro))
+        else:
+            infos[indice] = info
+    return infos, erros
+
+
+def extrair_com_catalogo(arquivos, catalogo, cache, cache_textos, args):
+    """
+    Cataloga os PDFs de `arquivos` que ainda não estão no catálogo, ou que foram
+    catalogados com outra versão das regras (com o cache de textos, esses são só
+    reanalisados), e retorna (df_result das PER/DCOMPs catalogadas dos CNPJs
+    desses PDFs, [info ou None] dos PDFs extraídos, [(nome, erro)]).
+    """
+    hashes = [hash_pdf(caminho) for _, caminho in arquivos]
+    conhecidos = catalogo.arquivos_conhecidos(hashes)
+    desatualizados = len(set(catalogo.arquivos_conhecidos(hashes, qualquer_versao=True)) - set(conhecidos))
+    novos = [(arquivo, sha256) for arquivo, sha256 in zip(arquivos, hashes) if sha256 not in conhecidos]
+
+    infos, erros = extrair([arquivo for arquivo, _ in novos], cache, cache_textos, args)
+    registrados = {'novo': 0, 'atualizado': 0, None: 0}
+    for (_, sha256), info in zip(novos, infos):
+        if info is not None:
+            registrados[catalogo.registrar(sha256, info)] += 1
+
+    print(
+        f"Catálogo: {len(arquivos) - len(novos)} PDF(s) já catalogado(s), "
+        f"{desatualizados} extraído(s) de novo por mudança nas regras, "
+        f"{registrados['novo']} PER/DCOMP(s) nova(s), {registrados['atualizado']} atualizada(s)"
+    )
+    cnpjs = {cod_cnpj for cod_cnpj, _ in catalogo.arquivos_conhecidos(hashes, qualquer_versao=True).values()}
+    df_result = Processamento.montar_dataframe(catalogo.infos(cnpjs))
+    return df_result, infos, erros
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Extração de dados de PER/DCOMP (PDF) em lote.")
+    parser.add_argument("entradas", nargs="+", help="Pastas ou padrões glob com os PDFs de PER/DCOMP")
+    parser.add_argument("--txt", help="Arquivo TXT de situação das PER/DCOMP (e-CAC)")
+    parser.add_argument("--saida", default=".", help="Pasta onde os arquivos serão gravados")
+    parser.add_argument("--nome-excel", help="Nome do arquivo Excel (padrão: <cliente>_Export_PERDCOMPs.xlsx)")
+    parser.add_argument("--csv", action="store_true", help="Grava também cada tabela em CSV")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de extração (padrão: todos os núcleos)")
+    parser.add_argument("--motor", choices=MOTORES_TEXTO, default="pdfplumber", help="Motor de extração de texto")
+    parser.add_argument("--motor-excel", choices=MOTORES_EXCEL, default="openpyxl",
+                        help="Motor do Excel ('streaming' grava em modo write-only, com memória constante)")
+    parser.add_argument("--baixa-memoria", action="store_true",
+                        help="Descarta o layout de cada página após extrair o texto (PDFs muito grandes)")
+    parser.add_argument("--max-registros-tabelona", type=int, default=None,
+                        help="Limite de registros (colunas _N) por tabela filha na Tabela Geral")
+    parser.add_argument("--catalogo", nargs="?", const=CATALOGO_PADRAO, metavar="CAMINHO",
+                        help="Catálogo incremental (SQLite): extrai só os PDFs ainda não catalogados e monta "
+                             "as tabelas a partir do catálogo, para os CNPJs dos PDFs informados")
+    parser.add_argument("--sem-cache", action="store_true", help="Não usa os caches de resultados e de textos em disco")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+
+    caminhos = listar_pdfs(args.entradas)
+    if not caminhos:
+        print("Nenhum PDF encontrado.")
+        return 2
+
+    inicio = time.perf_counter()
+    # Os PDFs são passados pelo caminho: cada processo lê o seu do disco
+    arquivos = [(os.path.basename(caminho), caminho) for caminho in caminhos]
+
+    cache = None if args.sem_cache else CacheResultados()
+    # Texto das páginas guardado à parte: com uma regra alterada, os PDFs são só reanalisados
+    cache_textos = None if args.sem_cache else CacheTextos()
+    if args.catalogo:
+        df_result, infos, erros = extrair_com_catalogo(arquivos, CatalogoPerdcomp(args.catalogo), cache, cache_textos, args)
+    else:
+        infos, erros = extrair(arquivos, cache, cache_textos, args)
+    infos = [info for info in infos if info is not None]
+    if not args.catalogo:
+        df_result = Processamento.montar_dataframe(infos)
+    tempo_extracao = time.perf_counter() - inicio
+    # Páginas contadas na própria extração (resultados antigos do cache não trazem o total)
+    total_paginas = sum(info.get('total_paginas') or 0 for info in infos)
+    sem_total_paginas = sum('total_paginas' not in info for info in infos)
+
+    if erros and not infos:
+        print(f"Nenhum dos {len(erros)} PDF(s) pôde ser extraído.")
+        return 1
+    if args.catalogo and df_result.empty:
+        print("Nenhuma PER/DCOMP no catálogo para os PDFs informados.")
+        return 1
+
+    df_txt = None
+    if args.txt:
+        with open(args.txt, "rb") as arquivo_txt:
+            df_txt = Processamento.ler_arquivo_txt(arquivo_txt, 'cod_perdcomp', 'situacao_perdcomp')
+
+    # Valores em centavos até aqui; formato brasileiro só para exibir e exportar
+    tabelas = MontagemTabelas.formatar_tabelas(MontagemTabelas.montar_tabelas(df_result, df_txt, args.max_registros_tabelona))
+
+    os.makedirs(args.saida, exist_ok=True)
+    nome_excel = args.nome_excel or MontagemTabelas.nome_arquivo_excel(tabelas['tabela1'])
+    excel_bytes = ExportarDados.gerar_excel_em_memoria(
+        tabelas['tabela1'], tabelas['tabela2'], tabelas['tabelona'],
+        tabelas['tabela3'], tabelas['tabela4'], tabelas['tabela5'],
+        motor=args.motor_excel
+    )
+    caminho_excel = os.path.join(args.saida, nome_excel)
+    with open(caminho_excel, "wb") as arquivo_excel:
+        arquivo_excel.write(excel_bytes.getvalue())
+
+    if args.csv:
+        for nome_tabela, df in tabelas.items():
+            df.to_csv(os.path.join(args.saida, f"{nome_tabela}.csv"), sep=';', index=False, encoding='utf-8-sig')
+
+    tempo_total = time.perf_counter() - inicio
+    print(f"Excel gravado em {caminho_excel}")
+    print(
+        f"{len(infos)} arquivo(s) extraído(s), {total_paginas} página(s) em {tempo_total:.1f}s "
+        f"(extração {tempo_extracao:.1f}s: {len(infos) / tempo_extracao:.2f} arquivos/s, "
+        f"{total_paginas / tempo_extracao:.2f} páginas/s)"
+    )
+    if sem_total_paginas:
+        print(f"({sem_total_paginas} resultado(s) antigo(s) do cache sem o total de páginas)")
+    if erros:
+        print(f"{len(erros)} arquivo(s) com erro:")
+        for nome, erro in erros:
+            print(f"  {nome}: {erro}")
+    if cache is not None:
+        estatisticas = cache.estatisticas()
+        print(f"Cache: {estatisticas['acertos']} acerto(s), {estatisticas['falhas']} falha(s)")
+    if cache_textos is not None:
+        estatisticas = cache_textos.estatisticas()
+        print(
+            f"Cache de textos: {estatisticas['acertos']} PDF(s) reanalisado(s) sem leitura do PDF, "
+            f"{estatisticas['entradas']} documento(s) guardado(s) ({estatisticas['bytes'] / 1024 / 1024:.1f} MB)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import pandas as pd
+
+from limpeza_dos_dados.tratamentos_dados import LimpezaETratamentoDados
+
+
+TABELA1_COLS = [
+    'cod_cnpj',
+    'nome_cliente',
+    'cod_perdcomp',
+    'data_transmissao',
+    'tipo_documento',
+    'tipo_credito',
+    'perdcomp_retificador',
+    'cod_perdcomp_retificacao',
+    'origem_credito_judicial',
+    'nome_responsavel_preenchimento',
+    'cod_cpf_preenchimento',
+    'cod_perdcomp_inicial',
+    'data_inicial_periodo',
+    'data_final_periodo',
+    'data_competencia',
+    'competencia',
+    'forma_tributacao_lucro',
+    'forma_apuracao',
+    'exercicio',
+    'data_arrecadacao',
+    'selic_acumulada',
+    'valor_credito_passivel_restituicao',
+    'valor_original_credito_utilizado_compensacoes_gfip',
+    'valor_disponivel_para_restituicao_apurado_documento_inicial',
+    'imposto_devido',
+    'csll_devida',
+    'total_parcelas_composicao_credito',
+    'valor_original_credito_inicial',
+    'valor_saldo_negativo',
+    'valor_credito_original_data_entrega',
+    'valor_pedido_restituicao',
+    'valor_credito_atualizado',
+    'valor_total_debitos_deste_documento',
+    'valor_total_credito_original_utilizado_documento',
+    'valor_total_debitos_desta_dcomp',
+    'valor_total_credito_original_utilizado_dcomp',
+    'valor_saldo_credito_original',
+    'cod_perdcomp_cancelado',
+    'Arquivo',
+]
+# Tabelas 2 a 5 vêm dos registros filhos extraídos por RegexRules
+TABELA2_COLS = ['cod_perdcomp', 'debitos']
+TABELA3_COLS = ['cod_perdcomp', 'origens_credito']
+TABELA4_COLS = ['cod_perdcomp', 'darfs']
+TABELA5_COLS = ['cod_perdcomp', 'gps']
+
+
+class MontagemTabelas():
+
+    @staticmethod
+    def montar_tabelas(df_result, df_txt=None, max_registros_tabelona=None):
+        """
+        Monta as tabelas de saída a partir do DataFrame de Processamento.process_pdfs_in_memory.
+        Usado pelo app Streamlit e pela linha de comando.
+        Retorna um dict com 'tabela1' ... 'tabela5' e 'tabelona'; as colunas valor_*
+        saem em centavos inteiros (Int64) — use formatar_tabelas para exibir/exportar.
+        max_registros_tabelona limita as colunas numeradas (_N) da Tabela Geral.
+        """
+        df_tabela1 = df_result[TABELA1_COLS].copy()
+        df_tabela2 = df_result[TABELA2_COLS].copy()
+        df_tabela3 = df_result[TABELA3_COLS].copy()
+        df_tabela4 = df_result[TABELA4_COLS].copy()
+        df_tabela5 = df_result[TABELA5_COLS].copy()
+
+        # Explodir Tabela2 (múltiplas linhas viram colunas numeradas)
+        df_tabela2_explodida = LimpezaETratamentoDados.explodir_tabela2(df_tabela2)
+        df_tabela3 = LimpezaETratamentoDados.explodir_origem_credito(df_tabela3)
+        df_tabela4 = LimpezaETratamentoDados.explodir_darf(df_tabela4)
+        df_tabela5 = LimpezaETratamentoDados.explodir_gps(df_tabela5)
+        df_tabela3, df_tabela4 = LimpezaETratamentoDados.limpar_tabelas_3_e_4(df_tabela3, df_tabela4)
+
+        # Valores monetários da Tabela 1 também em centavos
+        df_tabela1 = LimpezaETratamentoDados.converter_colunas_valor(df_tabela1)
+
+        # Criar Tabelona com as colunas numeradas corretamente
+        df_tabelona = LimpezaETratamentoDados.criar_tabelona(
+            df_tabela1, df_tabela2_explodida, df_tabela3, df_tabela4, df_tabela5, max_registros_tabelona
+        )
+
+        # Somas exatas (centavos) e contagens por PER/DCOMP das Tabelas 2 a 5
+        df_tabela1 = LimpezaETratamentoDados.adicionar_totais(df_tabela1, {
+            'debitos': df_tabela2_explodida,
+            'origens_credito': df_tabela3,
+            'darfs': df_tabela4,
+            'gps': df_tabela5,
+        })
+
+        # Situação do arquivo TXT, se houver, pelo índice de cod_perdcomp
+        if df_txt is not None and not df_txt.empty:
+            situacoes = MontagemTabelas.indexar_situacoes(df_txt)
+            df_tabela1 = df_tabela1.join(situacoes, on='cod_perdcomp')
+            df_tabela1['situacao_perdcomp'] = df_tabela1['situacao_perdcomp'].fillna('---')
+
+        return {
+            'tabela1': df_tabela1,
+            'tabela2': df_tabela2_explodida,
+            'tabela3': df_tabela3,
+            'tabela4': df_tabela4,
+            'tabela5': df_tabela5,
+            'tabelona': df_tabelona,
+        }
+
+    @staticmethod
+    def indexar_situacoes(df_txt):
+        """
+        Situações do TXT indexadas por cod_perdcomp (texto), uma por PER/DCOMP;
+        se a mesma PER/DCOMP aparece mais de uma vez, vale a última linha.
+        """
+        situacoes = df_txt.set_index(df_txt['cod_perdcomp'].astype(str))[['situacao_perdcomp']]
+        return situacoes[~situacoes.index.duplicated(keep='last')]
+
+    @staticmethod
+    def formatar_tabelas(tabelas):
+        """
+        Versão das tabelas de montar_tabelas para exibição e exportação: as colunas
+        de valor, em centavos, viram texto no formato brasileiro ("1.234,56").
+        """
+        return {
+            nome: LimpezaETratamentoDados.formatar_colunas_valor(df)
+            for nome, df in tabelas.items()
+        }
+
+    @staticmethod
+    def nome_arquivo_excel(df_tabela1):
+        nome_arquivo_excel = "extract_pdf_result.xlsx"
+        if not df_tabela1.empty:
+            nome_cliente = df_tabela1.iloc[0].get("nome_cliente", "")
+            if nome_cliente:
+                nome_cliente = nome_cliente.strip().split(" ")[0]
+                nome_arquivo_excel = f"{nome_cliente}_Export_PERDCOMPs.xlsx"
+        return nome_arquivo_excel
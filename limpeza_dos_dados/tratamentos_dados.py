@@ -1,9 +1,85 @@
 
 
+import time
+import numpy as np
 import pandas as pd
+from itertools import chain
+
+# "1.234,56", "-10,5", "7" -> sinal, parte inteira, centavos
+PADRAO_VALOR = r'^\s*(-?)\s*(\d[\d.]*)(?:,(\d{1,2}))?\s*$'
+
+
+def eh_coluna_valor(coluna):
+    return str(coluna).startswith(('valor_', 'total_valor_'))
+
 
 class LimpezaETratamentoDados():
 
+    @staticmethod
+    def valores_para_centavos(serie):
+        """
+        Converte uma coluna de valores no formato brasileiro ("1.234,56") em centavos
+        inteiros (Int64), de forma vetorizada e sem passar por float.
+        Vazios e textos fora do formato viram <NA>.
+        """
+        if pd.api.types.is_integer_dtype(serie):
+            return serie.astype('Int64')
+
+        partes = serie.astype('string').str.extract(PADRAO_VALOR)
+        inteiros = partes[1].str.replace('.', '', regex=False)
+        centavos = partes[2].str.ljust(2, '0').fillna('00')
+
+        valores = (inteiros + centavos).astype('Int64')
+        valores = valores.where(partes[0] != '-', -valores)
+
+        invalidos = valores.isna() & serie.notna() & (serie.astype('string').str.strip() != '')
+        if invalidos.any():
+            print(f"[AVISO] {int(invalidos.sum())} valor(es) fora do formato em '{serie.name}': {serie[invalidos].unique()[:5].tolist()}")
+        return valores
+
+    @staticmethod
+    def formatar_centavos(serie):
+        """Centavos inteiros -> texto no formato brasileiro ("1.234,56"); <NA> vira None."""
+        numeros = serie.to_numpy(dtype=object, na_value=None)
+        textos = [
+            None if valor is None else
+            f"{'-' if valor < 0 else ''}{abs(valor) // 100:,}".replace(',', '.') + f",{abs(valor) % 100:02d}"
+            for valor in numeros
+        ]
+        return pd.Series(textos, index=serie.index, name=serie.name, dtype=object)
+
+    @staticmethod
+    def converter_colunas_valor(df):
+        """Converte todas as colunas valor_* de uma tabela para centavos (Int64)."""
+        df = df.copy()
+        for coluna in df.columns:
+            if eh_coluna_valor(coluna):
+                df[coluna] = LimpezaETratamentoDados.valores_para_centavos(df[coluna])
+        return df
+
+    @staticmethod
+    def formatar_colunas_valor(df):
+        """Formata as colunas valor_* em centavos para exibição/exportação."""
+        df = df.copy()
+        for coluna in df.columns:
+            if eh_coluna_valor(coluna) and pd.api.types.is_integer_dtype(df[coluna]):
+                df[coluna] = LimpezaETratamentoDados.formatar_centavos(df[coluna])
+        return df
+
+    @staticmethod
+    def tabela_de_registros(df, coluna_registros, cols, chave='cod_perdcomp'):
+        """
+        Monta uma tabela filha a partir da coluna de registros (lista de dicts por
+        PER/DCOMP) gerada por RegexRules: uma linha por registro, com a chave da
+        linha de origem repetida por offsets, sem percorrer o DataFrame linha a linha.
+        """
+        registros = df[coluna_registros].tolist()
+        quantidades = np.fromiter(map(len, registros), dtype=np.int64, count=len(registros))
+
+        tabela = pd.DataFrame(list(chain.from_iterable(registros)), columns=cols, dtype=object)
+        tabela.insert(0, chave, np.repeat(df[chave].to_numpy(dtype=object), quantidades))
+        return tabela
+
     @staticmethod
     def explodir_tabela2(df_tabela2):
         cols_explodir = [
@@ -25,31 +101,14 @@ class LimpezaETratamentoDados():
             'valor_juros_tributo',
             'valor_total_tributo',
         ]
-        
-        linhas_expandidas = []
-        for idx, row in df_tabela2.iterrows():
-            splitted = {}
-            max_len = 1
-            for col in cols_explodir:
-                if (col not in row) or pd.isna(row[col]) or row[col] == '---':
-                    splitted[col] = []
-                else:
-                    partes = [p.strip() for p in row[col].split(';')]
-                    splitted[col] = partes
-                    max_len = max(max_len, len(partes))
-
-            for i in range(max_len):
-                nova_linha = {}
-                nova_linha['cod_perdcomp'] = row['cod_perdcomp']
-                for col in cols_explodir:
-                    valores = splitted[col]
-                    if i < len(valores):
-                        nova_linha[col] = valores[i]
-                    else:
-                        nova_linha[col] = ''
-                linhas_expandidas.append(nova_linha)
-
-        df_explodido = pd.DataFrame(linhas_expandidas)
+
+        df_explodido = LimpezaETratamentoDados.tabela_de_registros(df_tabela2, 'debitos', cols_explodir)
+        df_explodido = LimpezaETratamentoDados.converter_colunas_valor(df_explodido)
+
+        # Campos de texto não encontrados no bloco ficam vazios
+        cols_texto = [col for col in cols_explodir if not col.startswith('valor_')]
+        df_explodido[cols_texto] = df_explodido[cols_texto].fillna('')
+
         df_explodido = df_explodido[
             df_explodido["codigos_receita"].notna() &
             (df_explodido["codigos_receita"].str.strip() != "")
@@ -71,29 +130,7 @@ class LimpezaETratamentoDados():
             'valor_original_credito_origem_credito'
         ]
 
-        linhas_expandidas = []
-
-        for _, row in df_origem.iterrows():
-            # Extrair listas ou valores únicos
-            max_len = 1
-            valores_colunas = {}
-
-            for col in cols_origem_credito:
-                valor = row.get(col, '')
-                if isinstance(valor, list):
-                    valores_colunas[col] = valor
-                    max_len = max(max_len, len(valor))
-                else:
-                    valores_colunas[col] = [valor]  # transforma em lista para manter consistência
-
-            for i in range(max_len):
-                nova_linha = {'cod_perdcomp': row.get('cod_perdcomp', '')}
-                for col in cols_origem_credito:
-                    valores = valores_colunas.get(col, [])
-                    nova_linha[col] = valores[i] if i < len(valores) else ''
-                linhas_expandidas.append(nova_linha)
-
-        df_explodido = pd.DataFrame(linhas_expandidas)
+        df_explodido = LimpezaETratamentoDados.tabela_de_registros(df_origem, 'origens_credito', cols_origem_credito)
 
         # Filtrar linhas com código de receita válido
         df_explodido = df_explodido[
@@ -101,120 +138,194 @@ class LimpezaETratamentoDados():
             (df_explodido["codigo_receita_origem_credito"].astype(str).str.strip() != "")
         ]
 
-        # Converter colunas numéricas
+        # Converter colunas numéricas (valores ausentes contam como zero)
+        df_explodido = LimpezaETratamentoDados.converter_colunas_valor(df_explodido)
         colunas_numericas = [col for col in cols_origem_credito if 'valor_' in col]
-        for col in colunas_numericas:
-           df_explodido[col] = (
-            df_explodido[col]
-            .fillna('0,00')  # Preenche valores None com '0'
-            .replace('', '0,00')  # Garante que strings vazias também sejam '0'
-            #.astype(str)
-            #.str.replace('.', '', regex=False)
-            #.str.replace(',', '.', regex=False).astype(str).str.replace('.', ',', regex=False)
-        )
+        df_explodido[colunas_numericas] = df_explodido[colunas_numericas].fillna(0)
         return df_explodido
-    
+
     @staticmethod
     def explodir_darf(df_darf):
-        cols = [col for col in df_darf.columns if col.startswith('codigo_receita_darf') or 
-                'valor_' in col or 'data_' in col or 'periodo_apuracao' in col or 
-                'cnpj_darf' in col or 'numero_documento_arrecadacao' in col]
-        
-        linhas_expandidas = []
-
-        for _, row in df_darf.iterrows():
-            cod = row.get('cod_perdcomp', None)
-            if not cod:
-                print(f"[AVISO] Linha ignorada na função explodir_darf (sem cod_perdcomp): {row.to_dict()}")
-                continue
-
-            valores_colunas = {col: row[col] if isinstance(row[col], list) else [row[col]] for col in cols}
-            max_len = max(len(valores) for valores in valores_colunas.values())
-
-            for i in range(max_len):
-                nova = {'cod_perdcomp': cod}
-                for col in cols:
-                    valor = valores_colunas[col]
-                    nova[col] = valor[i] if i < len(valor) else ''
-                linhas_expandidas.append(nova)
-
-        return pd.DataFrame(linhas_expandidas)
+        cols = [
+            'periodo_apuracao_darf',
+            'cnpj_darf',
+            'codigo_receita_darf',
+            'numero_documento_arrecadacao',
+            'data_vencimento_darf',
+            'data_arrecadacao_darf',
+            'valor_principal_darf',
+            'valor_multa_darf',
+            'valor_juros_darf',
+            'valor_total_darf',
+            'valor_original_credito_darf',
+        ]
 
+        com_codigo = np.array([bool(cod) for cod in df_darf['cod_perdcomp']], dtype=bool)
+        for _, row in df_darf[~com_codigo].iterrows():
+            print(f"[AVISO] Linha ignorada na função explodir_darf (sem cod_perdcomp): {row.to_dict()}")
 
+        df_explodido = LimpezaETratamentoDados.tabela_de_registros(df_darf[com_codigo], 'darfs', cols)
+        return LimpezaETratamentoDados.converter_colunas_valor(df_explodido)
 
     @staticmethod
     def explodir_gps(df_gps):
-        cols = [col for col in df_gps.columns if col.startswith('codigo_pagamento_gps') or 'valor_' in col or 'data_' in col or 'periodo_apuracao' in col or 'identificador_detentor' in col or 'data_competencia_gps' in col]
-        linhas_expandidas = []
-
-        for _, row in df_gps.iterrows():
-            valores_colunas = {col: row[col] if isinstance(row[col], list) else [row[col]] for col in cols}
-            max_len = max(len(valores) for valores in valores_colunas.values())
-
-            for i in range(max_len):
-                nova = {'cod_perdcomp': row['cod_perdcomp']}
-                for col in cols:
-                    valor = valores_colunas[col]
-                    nova[col] = valor[i] if i < len(valor) else ''
-                linhas_expandidas.append(nova)
+        cols = [
+            'codigo_pagamento_gps',
+            'data_competencia_gps',
+            'periodo_apuracao_gps',
+            'identificador_detentor_credito_gps',
+            'data_arrecadacao_gps',
+            'valor_inss_gps',
+            'valor_outras_entidades_gps',
+            'valor_atm_multa_juros_gps',
+            'valor_total_gps',
+        ]
 
-        return pd.DataFrame(linhas_expandidas)
+        df_explodido = LimpezaETratamentoDados.tabela_de_registros(df_gps, 'gps', cols)
+        return LimpezaETratamentoDados.converter_colunas_valor(df_explodido)
 
+    @staticmethod
+    def colunas_numeradas(df_filha, chaves, max_registros=None, por_registro=False, chave='cod_perdcomp'):
+        """
+        Colunas numeradas (<coluna>_1, <coluna>_2, ...) de uma tabela filha, com uma
+        posição por chave de `chaves`. A posição de cada registro dentro da sua
+        PER/DCOMP é calculada de uma vez e os valores são espalhados em grades numpy,
+        sem pivot nem merge. Colunas inteiras saem como Int64; as demais como object.
+
+        por_registro=True agrupa as colunas por registro (todas as _1, depois as _2...);
+        senão, por coluna. Registros além de max_registros ficam de fora, com aviso.
+        Retorna um dict {nome da coluna: array}.
+        """
+        linhas = chaves.get_indexer(df_filha[chave])
+        df_filha = df_filha[linhas >= 0]
+        linhas = linhas[linhas >= 0]
+        posicoes = pd.Series(linhas).groupby(linhas, sort=False).cumcount().to_numpy()
+
+        if max_registros is not None and (posicoes >= max_registros).any():
+            excedentes = posicoes >= max_registros
+            print(
+                f"[AVISO] {int(excedentes.sum())} registro(s) além do limite de {max_registros} "
+                f"por PER/DCOMP ficaram fora da Tabela Geral"
+            )
+            df_filha = df_filha[~excedentes]
+            linhas = linhas[~excedentes]
+            posicoes = posicoes[~excedentes]
+
+        largura = int(posicoes.max()) + 1 if len(posicoes) else 0
+        colunas = [col for col in df_filha.columns if col != chave]
+
+        # Grades (posição, chave): cada linha da grade vira uma coluna numerada
+        grades = {}
+        for col in colunas:
+            serie = df_filha[col]
+            if pd.api.types.is_integer_dtype(serie):
+                valores = np.zeros((largura, len(chaves)), dtype=np.int64)
+                mascara = np.ones((largura, len(chaves)), dtype=bool)
+                valores[posicoes, linhas] = serie.to_numpy(dtype=np.int64, na_value=0)
+                mascara[posicoes, linhas] = serie.isna().to_numpy()
+                grades[col] = [pd.arrays.IntegerArray(valores[n], mascara[n]) for n in range(largura)]
+            else:
+                grade = np.full((largura, len(chaves)), np.nan, dtype=object)
+                grade[posicoes, linhas] = serie.to_numpy(dtype=object)
+                grades[col] = list(grade)
+
+        if por_registro:
+            ordem = [(col, n) for n in range(largura) for col in colunas]
+        else:
+            ordem = [(col, n) for col in colunas for n in range(largura)]
+        return {f"{col}_{n + 1}": grades[col][n] for col, n in ordem}
 
-        
     @staticmethod
-    def criar_tabelona(df_tabela1, df_tabela2_explodida, df_tabela3, df_tabela4):
+    def criar_tabelona(df_tabela1, df_tabela2_explodida, df_tabela3, df_tabela4, df_tabela5=None, max_registros=None):
         """
-        Converte múltiplas linhas das Tabelas 2, 3 e 4 em colunas numeradas e
-        mescla os dados com a Tabela 1 utilizando cod_perdcomp como chave.
+        Converte as múltiplas linhas das Tabelas 2, 3, 4 e 5 em colunas numeradas
+        (<coluna>_N) ao lado de cada linha da Tabela 1, usando cod_perdcomp como chave.
+        As colunas dos débitos saem agrupadas por registro; as de origem, DARF e GPS,
+        por coluna. max_registros limita o N de cada tabela filha.
+        O tempo de montagem e a largura ficam em df_tabelona.attrs['relatorio'].
         """
+        inicio = time.perf_counter()
+        chaves = pd.Index(df_tabela1['cod_perdcomp'].dropna().unique())
+
+        tabelas_filhas = {
+            'debitos': (df_tabela2_explodida, True),
+            'origens_credito': (df_tabela3, False),
+            'darfs': (df_tabela4, False),
+            'gps': (df_tabela5, False),
+        }
+        colunas = {}
+        registros = {}
+        for nome, (df_filha, por_registro) in tabelas_filhas.items():
+            if df_filha is None or df_filha.empty or 'cod_perdcomp' not in df_filha.columns:
+                registros[nome] = 0
+                continue
+            colunas_filha = LimpezaETratamentoDados.colunas_numeradas(
+                df_filha, chaves, max_registros, por_registro
+            )
+            registros[nome] = max((int(col.rsplit('_', 1)[1]) for col in colunas_filha), default=0)
+            colunas.update(colunas_filha)
+
+        # Uma linha da grade por PER/DCOMP; linhas repetidas (ou sem código) da
+        # Tabela 1 são resolvidas com um único take por coluna
+        linhas_tabela1 = chaves.get_indexer(df_tabela1['cod_perdcomp'])
+        if not np.array_equal(linhas_tabela1, np.arange(len(chaves))):
+            colunas = {
+                col: pd.api.extensions.take(valores, linhas_tabela1, allow_fill=True)
+                for col, valores in colunas.items()
+            }
+
+        # As grades já são arrays novos: nada precisa ser copiado de novo
+        df_numeradas = pd.DataFrame(colunas, index=pd.RangeIndex(len(df_tabela1)), copy=False)
+        df_tabelona = pd.concat([df_tabela1.reset_index(drop=True), df_numeradas], axis=1, copy=False)
+
+        relatorio = {
+            'linhas': df_tabelona.shape[0],
+            'colunas': df_tabelona.shape[1],
+            'registros_por_tabela': registros,
+            'tempo_s': round(time.perf_counter() - inicio, 3),
+        }
+        df_tabelona.attrs['relatorio'] = relatorio
+        print(
+            f"[INFO] Tabela Geral: {relatorio['linhas']} linhas x {relatorio['colunas']} colunas "
+            f"(registros por PER/DCOMP: {registros}) em {relatorio['tempo_s']:.2f}s"
+        )
+        return df_tabelona
 
-        # Lista dos códigos de PER/DCOMP
-        codigos_perdcomp = df_tabela1['cod_perdcomp'].dropna().unique()
-
-        # Preenche cod_perdcomp nos DataFrames vazios
-        for df in [df_tabela2_explodida, df_tabela3, df_tabela4]:
-            if 'cod_perdcomp' not in df.columns:
-                df['cod_perdcomp'] = codigos_perdcomp[0] if len(codigos_perdcomp) == 1 else ''
-            elif df.empty:
-                df['cod_perdcomp'] = codigos_perdcomp[0] if len(codigos_perdcomp) == 1 else ''
-
-        # Pivotar Tabela 2
-        tabela2_renomeada = df_tabela2_explodida.copy()
-        tabela2_renomeada["row_number"] = tabela2_renomeada.groupby("cod_perdcomp").cumcount() + 1
-
-        df_tabela2_pivot = tabela2_renomeada.pivot(index="cod_perdcomp", columns="row_number")
-        df_tabela2_pivot.columns = [f"{col}_{num}" for col, num in df_tabela2_pivot.columns]
-
-        colunas_tabela2 = sorted(df_tabela2_pivot.columns, key=lambda x: int(x.split('_')[-1]))
-
-        # Merge principal
-        df_tabelona = df_tabela1.copy()
-
-        if not df_tabela2_pivot.empty:
-            df_tabelona = df_tabelona.merge(df_tabela2_pivot[colunas_tabela2], on="cod_perdcomp", how="left")
-
-        # Pivotar Tabela 3 (Origem do Crédito)
-        if not df_tabela3.empty:
-            df_tabela3 = df_tabela3.copy()
-            df_tabela3["row_number"] = df_tabela3.groupby("cod_perdcomp").cumcount() + 1
-            df_tabela3_pivot = df_tabela3.pivot(index="cod_perdcomp", columns="row_number")
-            df_tabela3_pivot.columns = [f"{col}_{num}" for col, num in df_tabela3_pivot.columns]
-            df_tabela3_pivot = df_tabela3_pivot.reset_index()
-            df_tabelona = df_tabelona.merge(df_tabela3_pivot, on="cod_perdcomp", how="left")
-
-        # Pivotar Tabela 4 (DARFs)
-        if not df_tabela4.empty:
-            df_tabela4 = df_tabela4.copy()
-            df_tabela4["row_number"] = df_tabela4.groupby("cod_perdcomp").cumcount() + 1
-            df_tabela4_pivot = df_tabela4.pivot(index="cod_perdcomp", columns="row_number")
-            df_tabela4_pivot.columns = [f"{col}_{num}" for col, num in df_tabela4_pivot.columns]
-            df_tabela4_pivot = df_tabela4_pivot.reset_index()
-            df_tabelona = df_tabelona.merge(df_tabela4_pivot, on="cod_perdcomp", how="left")
+    @staticmethod
+    def calcular_totais(tabelas_filhas, chave='cod_perdcomp'):
+        """
+        Totais por PER/DCOMP das tabelas filhas ({nome: DataFrame}, com os nomes dos
+        registros de RegexRules: 'debitos', 'origens_credito', 'darfs', 'gps').
+        Cada tabela passa por um único groupby numérico: a soma exata, em centavos,
+        de cada coluna valor_* vira total_<coluna> e a contagem de registros vira
+        quantidade_<nome>. Retorna um DataFrame com uma linha por `chave`.
+        """
+        totais = []
+        for nome, df_filha in tabelas_filhas.items():
+            if df_filha is None or chave not in df_filha.columns:
+                continue
+            colunas_valor = [col for col in df_filha.columns if eh_coluna_valor(col)]
+            grupos = df_filha.groupby(chave, sort=False)
+            df_totais = grupos[colunas_valor].sum().add_prefix('total_')
+            df_totais[f'quantidade_{nome}'] = grupos.size()
+            totais.append(df_totais)
 
-        return df_tabelona
+        if not totais:
+            return pd.DataFrame(columns=[chave])
+        return pd.concat(totais, axis=1).rename_axis(chave).reset_index()
 
+    @staticmethod
+    def adicionar_totais(df_tabela1, tabelas_filhas, chave='cod_perdcomp'):
+        """
+        Mescla os totais de calcular_totais na Tabela 1 em um único merge.
+        PER/DCOMPs sem registros em uma tabela ficam com quantidade 0 e totais vazios.
+        """
+        df_totais = LimpezaETratamentoDados.calcular_totais(tabelas_filhas, chave)
+        df_tabela1 = df_tabela1.merge(df_totais, on=chave, how='left')
 
+        colunas_quantidade = [col for col in df_totais.columns if col.startswith('quantidade_')]
+        df_tabela1[colunas_quantidade] = df_tabela1[colunas_quantidade].fillna(0).astype('int64')
+        return df_tabela1
 
     @staticmethod
     def limpar_tabelas_3_e_4(df_tabela3, df_tabela4):
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+from contextlib import closing
+
+from regex_rules.regex_ import REGRAS
+
+CAMINHO_PADRAO = os.path.join(os.path.expanduser("~"), ".cache", "extracao_perdcomp", "resultados.sqlite3")
+ARQUIVOS_REGRAS = (
+    "regex_.py", "texto_paginas.py", "indice_secoes.py", "roteamento_paginas.py", "varredura_campos.py", "registro_regras.py"
+)
+TAMANHO_BLOCO = 1024 * 1024
+
+
+def versao_regras():
+    """
+    Versão do conjunto de regras de extração: a versão do registro de regexes
+    (REGRAS.versao, hash do conteúdo das regras) combinada com o código-fonte de
+    regex_rules, que decide como as regras são aplicadas. Qualquer alteração em uma
+    regra invalida os resultados guardados com a versão anterior.
+    """
+    pasta_regras = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "regex_rules")
+    sha = hashlib.sha256(REGRAS.versao.encode("utf-8"))
+    for nome in ARQUIVOS_REGRAS:
+        with open(os.path.join(pasta_regras, nome), "rb") as arquivo:
+            sha.update(arquivo.read())
+    return sha.hexdigest()[:16]
+
+
+def hash_pdf(pdf):
+    """SHA-256 do PDF; aceita os bytes (ou memoryview) ou o caminho do arquivo, lido em blocos."""
+    if isinstance(pdf, (str, os.PathLike)):
+        sha = hashlib.sha256()
+        with open(pdf, "rb") as arquivo:
+            for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO), b""):
+                sha.update(bloco)
+        return sha.hexdigest()
+    return hashlib.sha256(pdf).hexdigest()
+
+
+class CacheResultados():
+    """
+    Cache persistente (SQLite) dos dicionários `info` extraídos de cada PDF.
+
+    A chave é o SHA-256 dos bytes do PDF, a versão das regras e o motor de texto;
+    o tamanho total guardado é limitado por `max_bytes`, removendo primeiro as
+    entradas usadas há mais tempo (LRU). `acertos` e `falhas` contam os
+    hits/misses da instância.
+    """
+
+    def __init__(self, caminho=CAMINHO_PADRAO, max_bytes=256 * 1024 * 1024, versao=None):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self.versao = versao or versao_regras()
+        self.acertos = 0
+        self.falhas = 0
+
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with closing(self._conectar()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS resultados (
+                    sha256 TEXT NOT NULL,
+                    versao_regras TEXT NOT NULL,
+                    motor TEXT NOT NULL,
+                    info TEXT NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    ultimo_acesso REAL NOT NULL,
+                    PRIMARY KEY (sha256, versao_regras, motor)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_resultados_acesso ON resultados (ultimo_acesso)")
+
+    def _conectar(self):
+        # Uma conexão por operação: o Streamlit pode chamar a partir de threads diferentes
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def obter(self, sha256, motor='pdfplumber'):
+        """Retorna o `info` guardado para o hash ou None."""
+        with closing(self._conectar()) as conn, conn:
+            linha = conn.execute(
+                "SELECT info FROM resultados WHERE sha256 = ? AND versao_regras = ? AND motor = ?",
+                (sha256, self.versao, motor)
+            ).fetchone()
+            if linha is None:
+                self.falhas += 1
+                return None
+            conn.execute(
+                "UPDATE resultados SET ultimo_acesso = ? WHERE sha256 = ? AND versao_regras = ? AND motor = ?",
+                (time.time(), sha256, self.versao, motor)
+            )
+        self.acertos += 1
+        return json.loads(linha[0])
+
+    def guardar(self, sha256, info, motor='pdfplumber'):
+        conteudo = json.dumps(info, ensure_ascii=False)
+        with closing(self._conectar()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO resultados (sha256, versao_regras, motor, info, tamanho, ultimo_acesso) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, self.versao, motor, conteudo, len(conteudo.encode("utf-8")), time.time())
+            )
+            self._remover_excedente(conn)
+
+    def _remover_excedente(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        linhas = conn.execute(
+            "SELECT rowid, tamanho FROM resultados ORDER BY ultimo_acesso ASC"
+        ).fetchall()
+        remover = []
+        for rowid, tamanho in linhas:
+            if total <= self.max_bytes:
+                break
+            remover.append((rowid,))
+            total -= tamanho
+        conn.executemany("DELETE FROM resultados WHERE rowid = ?", remover)
+
+    def estatisticas(self):
+        with closing(self._conectar()) as conn:
+            entradas, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM resultados"
+            ).fetchone()
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'entradas': entradas,
+            'bytes': total,
+            'versao_regras': self.versao,
+        }
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import inspect
+import sqlite3
+from contextlib import closing
+
+import fitz
+import pdfminer
+import pdfplumber
+
+from regex_rules.texto_paginas import TextoPaginas, MOTORES_TEXTO
+
+CAMINHO_PADRAO = os.path.join(os.path.expanduser("~"), ".cache", "extracao_perdcomp", "textos.sqlite3")
+NIVEL_COMPRESSAO = 6
+
+
+def versao_texto(motor):
+    """
+    Versão da extração de texto com o motor: a biblioteca e a sua versão e o
+    código de TextoPaginas._extrair_texto, que define as configurações usadas.
+    Mudanças nas regras de extração (regex_rules) não alteram os textos e não
+    mudam esta versão.
+    """
+    if motor not in MOTORES_TEXTO:
+        raise ValueError(f"Motor de texto desconhecido: {motor}. Opções: {MOTORES_TEXTO}")
+    bibliotecas = f"fitz {fitz.VersionBind}" if motor == 'fitz' else f"pdfplumber {pdfplumber.__version__} pdfminer {pdfminer.__version__}"
+    sha = hashlib.sha256(f"{motor}\n{bibliotecas}\n".encode("utf-8"))
+    sha.update(inspect.getsource(TextoPaginas._extrair_texto).encode("utf-8"))
+    return sha.hexdigest()[:16]
+
+
+class CacheTextos():
+    """
+    Cache persistente (SQLite) do texto bruto de cada página dos PDFs, separado
+    do cache de resultados: ao alterar uma regra de extração, os documentos são
+    analisados de novo a partir do texto guardado, sem a leitura do layout do PDF.
+
+    A chave é o SHA-256 dos bytes do PDF, o motor de texto e a versão da
+    extração com esse motor (versao_texto). Os textos de um documento ficam em
+    uma linha, como uma lista JSON comprimida com zlib; o tamanho total é
+    limitado por `max_bytes`, removendo primeiro as entradas usadas há mais tempo
+    (LRU). `acertos` e `falhas` contam os hits/misses da instância no processo
+    atual.
+    """
+
+    def __init__(self, caminho=CAMINHO_PADRAO, max_bytes=1024 * 1024 * 1024):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self.versoes = {motor: versao_texto(motor) for motor in MOTORES_TEXTO}
+        self.acertos = 0
+        self.falhas = 0
+
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with closing(self._conectar()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS textos (
+                    sha256 TEXT NOT NULL,
+                    motor TEXT NOT NULL,
+                    versao_texto TEXT NOT NULL,
+                    paginas INTEGER NOT NULL,
+                    conteudo BLOB NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    ultimo_acesso REAL NOT NULL,
+                    PRIMARY KEY (sha256, motor, versao_texto)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_textos_acesso ON textos (ultimo_acesso)")
+
+    def _conectar(self):
+        # Uma conexão por operação, como em CacheResultados: a instância também é
+        # enviada aos processos do pool, que leem e gravam no mesmo arquivo
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def obter(self, sha256, motor='pdfplumber'):
+        """Lista com o texto de cada página do PDF, ou None se ele não está no cache."""
+        chave = (sha256, motor, self.versoes[motor])
+        with closing(self._conectar()) as conn, conn:
+            linha = conn.execute(
+                "SELECT conteudo FROM textos WHERE sha256 = ? AND motor = ? AND versao_texto = ?", chave
+            ).fetchone()
+            if linha is None:
+                self.falhas += 1
+                return None
+            conn.execute(
+                "UPDATE textos SET ultimo_acesso = ? WHERE sha256 = ? AND motor = ? AND versao_texto = ?",
+                (time.time(),) + chave
+            )
+        self.acertos += 1
+        return json.loads(zlib.decompress(linha[0]).decode("utf-8"))
+
+    def paginas(self, sha256, motor='pdfplumber'):
+        """
+        TextoPaginas sobre os textos guardados, pronto para
+        RegexRules.extract_info_from_pages, ou None se o PDF não está no cache.
+        """
+        textos = self.obter(sha256, motor)
+        return TextoPaginas.de_textos(textos, motor) if textos is not None else None
+
+    def guardar(self, sha256, textos, motor='pdfplumber'):
+        conteudo = zlib.compress(json.dumps(textos, ensure_ascii=False).encode("utf-8"), NIVEL_COMPRESSAO)
+        with closing(self._conectar()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO textos "
+                "(sha256, motor, versao_texto, paginas, conteudo, tamanho, ultimo_acesso) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (sha256, motor, self.versoes[motor], len(textos), conteudo, len(conteudo), time.time())
+            )
+            self._remover_excedente(conn)
+
+    def _remover_excedente(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM textos").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        linhas = conn.execute("SELECT rowid, tamanho FROM textos ORDER BY ultimo_acesso ASC").fetchall()
+        remover = []
+        for rowid, tamanho in linhas:
+            if total <= self.max_bytes:
+                break
+            remover.append((rowid,))
+            total -= tamanho
+        conn.executemany("DELETE FROM textos WHERE rowid = ?", remover)
+
+    def estatisticas(self):
+        with closing(self._conectar()) as conn:
+            entradas, paginas, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(paginas), 0), COALESCE(SUM(tamanho), 0) FROM textos"
+            ).fetchone()
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'entradas': entradas,
+            'paginas': paginas,
+            'bytes': total,
+        }
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import sqlite3
+from contextlib import closing
+
+from processamento_de_arquivos.cache_resultados import versao_regras
+
+CAMINHO_PADRAO = os.path.join(os.path.expanduser("~"), ".local", "share", "extracao_perdcomp", "catalogo.sqlite3")
+
+
+def cod_retificado(info):
+    """Número da PER/DCOMP retificada por este documento, ou None se ele não é retificador."""
+    if (info.get('perdcomp_retificador') or '').strip().lower() != 'sim':
+        return None
+    return info.get('cod_perdcomp_retificacao') or None
+
+
+class CatalogoPerdcomp():
+    """
+    Catálogo persistente (SQLite) das PER/DCOMPs já extraídas, para rodadas
+    incrementais: a cada mês só os PDFs novos passam pela extração e as tabelas
+    são montadas a partir do catálogo.
+
+    Cada PER/DCOMP é uma linha com chave (cod_cnpj, cod_perdcomp) e o `info`
+    extraído; um PDF novo com a mesma chave substitui a linha. A tabela
+    `arquivos` guarda o SHA-256 de cada PDF já catalogado. Um documento
+    retificador marca a PER/DCOMP retificada com `retificado_por`, que por padrão
+    deixa de sair nas tabelas — também quando a retificada chega depois.
+
+    Cada linha guarda a versão das regras (versao_regras) com que foi extraída:
+    depois de uma correção nas regras, o PDF de origem de uma linha de versão
+    anterior deixa de contar como conhecido e é extraído de novo.
+    """
+
+    def __init__(self, caminho=CAMINHO_PADRAO):
+        self.caminho = caminho
+        self.versao = versao_regras()
+
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with closing(self._conectar()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS perdcomps (
+                    cod_cnpj TEXT NOT NULL,
+                    cod_perdcomp TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    cod_perdcomp_retificado TEXT,
+                    retificado_por TEXT,
+                    versao_regras TEXT NOT NULL,
+                    info TEXT NOT NULL,
+                    atualizado_em REAL NOT NULL,
+                    PRIMARY KEY (cod_cnpj, cod_perdcomp)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS arquivos (
+                    sha256 TEXT PRIMARY KEY,
+                    nome TEXT NOT NULL,
+                    cod_cnpj TEXT NOT NULL,
+                    cod_perdcomp TEXT NOT NULL,
+                    registrado_em REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_perdcomps_retificado ON perdcomps (cod_cnpj, cod_perdcomp_retificado)"
+            )
+
+    def _conectar(self):
+        # Uma conexão por operação, como em CacheResultados
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def arquivos_conhecidos(self, hashes, qualquer_versao=False):
+        """
+        {sha256: (cod_cnpj, cod_perdcomp)} dos hashes que já estão no catálogo.
+        Sem qualquer_versao, ficam de fora os PDFs cuja PER/DCOMP foi extraída
+        deles com outra versão das regras; um PDF substituído por outro com a
+        mesma PER/DCOMP continua conhecido, para não sobrescrever o mais novo.
+        """
+        hashes = list(hashes)
+        conhecidos = {}
+        consulta = (
+            "SELECT a.sha256, a.cod_cnpj, a.cod_perdcomp FROM arquivos a "
+            "JOIN perdcomps p ON p.cod_cnpj = a.cod_cnpj AND p.cod_perdcomp = a.cod_perdcomp "
+            "WHERE a.sha256 IN ({})"
+        )
+        if not qualquer_versao:
+            consulta += " AND (p.sha256 <> a.sha256 OR p.versao_regras = ?)"
+        with closing(self._conectar()) as conn:
+            # Consultas em lotes, abaixo do limite de parâmetros do SQLite
+            for inicio in range(0, len(hashes), 500):
+                lote = hashes[inicio:inicio + 500]
+                parametros = lote if qualquer_versao else lote + [self.versao]
+                linhas = conn.execute(consulta.format(','.join('?' * len(lote))), parametros).fetchall()
+                conhecidos.update({sha256: (cod_cnpj, cod_perdcomp) for sha256, cod_cnpj, cod_perdcomp in linhas})
+        return conhecidos
+
+    def registrar(self, sha256, info):
+        """
+        Grava o `info` de um PDF no catálogo. Retorna 'novo', 'atualizado' (a
+        PER/DCOMP já existia e foi substituída) ou None quando o documento não tem
+        CNPJ ou número da PER/DCOMP e não pode ser catalogado.
+        """
+        cod_cnpj = info.get('cod_cnpj')
+        cod_perdcomp = info.get('cod_perdcomp')
+        if not cod_cnpj or not cod_perdcomp:
+            print(f"[AVISO] PDF sem CNPJ ou número da PER/DCOMP não foi catalogado: {info.get('Arquivo')}")
+            return None
+
+        retificado = cod_retificado(info)
+        agora = time.time()
+        with closing(self._conectar()) as conn, conn:
+            existente = conn.execute(
+                "SELECT 1 FROM perdcomps WHERE cod_cnpj = ? AND cod_perdcomp = ?", (cod_cnpj, cod_perdcomp)
+            ).fetchone()
+            # Um retificador já catalogado vale também para a retificada que chega depois
+            retificador = conn.execute(
+                "SELECT cod_perdcomp FROM perdcomps WHERE cod_cnpj = ? AND cod_perdcomp_retificado = ?",
+                (cod_cnpj, cod_perdcomp)
+            ).fetchone()
+
+            conn.execute(
+                "INSERT OR REPLACE INTO perdcomps "
+                "(cod_cnpj, cod_perdcomp, sha256, cod_perdcomp_retificado, retificado_por, versao_regras, info, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    cod_cnpj, cod_perdcomp, sha256, retificado, retificador[0] if retificador else None,
+                    self.versao, json.dumps(info, ensure_ascii=False), agora
+                )
+            )
+            if retificado is not None:
+                conn.execute(
+                    "UPDATE perdcomps SET retificado_por = ?, atualizado_em = ? WHERE cod_cnpj = ? AND cod_perdcomp = ?",
+                    (cod_perdcomp, agora, cod_cnpj, retificado)
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO arquivos (sha256, nome, cod_cnpj, cod_perdcomp, registrado_em) VALUES (?, ?, ?, ?, ?)",
+                (sha256, info.get('Arquivo') or '', cod_cnpj, cod_perdcomp, agora)
+            )
+        return 'atualizado' if existente else 'novo'
+
+    def infos(self, cnpjs=None, incluir_retificados=False):
+        """
+        Os `info` catalogados, na ordem (cod_cnpj, cod_perdcomp), prontos para
+        Processamento.montar_dataframe. `cnpjs` restringe aos CNPJs indicados.
+        """
+        consulta = "SELECT info FROM perdcomps"
+        condicoes = []
+        parametros = []
+        if cnpjs is not None:
+            cnpjs = list(cnpjs)
+            if not cnpjs:
+                return []
+            condicoes.append(f"cod_cnpj IN ({','.join('?' * len(cnpjs))})")
+            parametros.extend(cnpjs)
+        if not incluir_retificados:
+            condicoes.append("retificado_por IS NULL")
+        if condicoes:
+            consulta += " WHERE " + " AND ".join(condicoes)
+        consulta += " ORDER BY cod_cnpj, cod_perdcomp"
+
+        with closing(self._conectar()) as conn:
+            return [json.loads(info) for (info,) in conn.execute(consulta, parametros)]
+
+    def estatisticas(self):
+        with closing(self._conectar()) as conn:
+            perdcomps, retificadas, cnpjs = conn.execute(
+                "SELECT COUNT(*), COUNT(retificado_por), COUNT(DISTINCT cod_cnpj) FROM perdcomps"
+            ).fetchone()
+            arquivos = conn.execute("SELECT COUNT(*) FROM arquivos").fetchone()[0]
+        return {
+            'perdcomps': perdcomps,
+            'retificadas': retificadas,
+            'cnpjs': cnpjs,
+            'arquivos': arquivos,
+        }
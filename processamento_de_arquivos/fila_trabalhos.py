@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from processamento_de_arquivos.processamento import Processamento
+
+PASTA_PADRAO = os.path.join(os.path.expanduser("~"), ".local", "share", "extracao_perdcomp", "fila")
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+CANCELADO = 'cancelado'
+STATUS_FINAIS = (CONCLUIDO, ERRO, CANCELADO)
+
+
+class FilaTrabalhos():
+    """
+    Fila local (SQLite) de extrações em segundo plano.
+
+    A interface envia um trabalho com enviar(): os PDFs (e o TXT, se houver) são
+    gravados em `pasta/trabalhos/<id>/entrada` e o trabalho fica 'pendente'. O
+    processo trabalhador (processamento_de_arquivos.trabalhador) reserva os
+    trabalhos com reservar(), grava o andamento e, ao final, as tabelas e o Excel
+    na mesma pasta; a interface acompanha com status() e busca o resultado com
+    resultado(), mesmo depois de a aba ter sido fechada.
+
+    O status segue pendente -> executando -> concluido | erro; um trabalho
+    pendente pode ser cancelado.
+    """
+
+    def __init__(self, pasta=PASTA_PADRAO):
+        self.pasta = pasta
+        self.caminho = os.path.join(pasta, "fila.sqlite3")
+        os.makedirs(os.path.join(pasta, "trabalhos"), exist_ok=True)
+        with closing(self._conectar()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS trabalhos (
+                    id TEXT PRIMARY KEY,
+                    usuario TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    parametros TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    concluidos INTEGER NOT NULL DEFAULT 0,
+                    mensagem TEXT,
+                    resultado TEXT,
+                    criado_em REAL NOT NULL,
+                    iniciado_em REAL,
+                    concluido_em REAL,
+                    sinal_em REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_trabalhos_status ON trabalhos (status, criado_em)")
+
+    def _conectar(self):
+        # Uma conexão por operação, como em CacheResultados; isolation_level=None
+        # para controlar as transações de reserva com BEGIN IMMEDIATE
+        return sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+
+    def pasta_trabalho(self, id_trabalho):
+        return os.path.join(self.pasta, "trabalhos", id_trabalho)
+
+    def enviar(self, uploaded_files, txt_bytes=None, usuario='anonimo', parametros=None):
+        """
+        Grava os arquivos enviados na pasta do trabalho e o coloca na fila.
+        `uploaded_files` são objetos de arquivo com `.name` (como os do Streamlit);
+        `parametros` vai para o trabalhador (motor, motor_excel, ...). Retorna o id.
+        """
+        id_trabalho = uuid.uuid4().hex
+        pasta_entrada = os.path.join(self.pasta_trabalho(id_trabalho), "entrada")
+        os.makedirs(pasta_entrada)
+        arquivos = Processamento.gravar_em_disco(uploaded_files, pasta_entrada)
+        with open(os.path.join(pasta_entrada, "arquivos.json"), "w", encoding="utf-8") as arquivo:
+            json.dump(arquivos, arquivo, ensure_ascii=False)
+        if txt_bytes is not None:
+            with open(os.path.join(pasta_entrada, "situacao.txt"), "wb") as arquivo:
+                arquivo.write(txt_bytes)
+
+        with closing(self._conectar()) as conn:
+            conn.execute(
+                "INSERT INTO trabalhos (id, usuario, status, parametros, total, criado_em) VALUES (?, ?, ?, ?, ?, ?)",
+                (id_trabalho, usuario, PENDENTE, json.dumps(parametros or {}), len(arquivos), time.time())
+            )
+        return id_trabalho
+
+    def entrada(self, id_trabalho):
+        """([(nome, caminho do PDF)], caminho do TXT ou None) de um trabalho."""
+        pasta_entrada = os.path.join(self.pasta_trabalho(id_trabalho), "entrada")
+        with open(os.path.join(pasta_entrada, "arquivos.json"), encoding="utf-8") as arquivo:
+            arquivos = [tuple(item) for item in json.load(arquivo)]
+        caminho_txt = os.path.join(pasta_entrada, "situacao.txt")
+        return arquivos, caminho_txt if os.path.exists(caminho_txt) else None
+
+    def reservar(self, max_simultaneos=2, max_por_usuario=1):
+        """
+        Passa o próximo trabalho para 'executando' e retorna o seu status, ou None.
+        No máximo `max_simultaneos` trabalhos executam ao mesmo tempo e cada
+        usuário tem no máximo `max_por_usuario` em execução; entre os pendentes,
+        vem primeiro o usuário com menos trabalhos em execução e, dentro dele, o
+        mais antigo. A reserva é atômica entre processos trabalhadores.
+        """
+        with closing(self._conectar()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                em_execucao = conn.execute(
+                    "SELECT COUNT(*) FROM trabalhos WHERE status = ?", (EXECUTANDO,)
+                ).fetchone()[0]
+                linha = None
+                if em_execucao < max_simultaneos:
+                    linha = conn.execute("""
+                        SELECT t.id FROM trabalhos t
+                        LEFT JOIN (
+                            SELECT usuario, COUNT(*) AS n FROM trabalhos WHERE status = ? GROUP BY usuario
+                        ) e ON e.usuario = t.usuario
+                        WHERE t.status = ? AND COALESCE(e.n, 0) < ?
+                        ORDER BY COALESCE(e.n, 0), t.criado_em, t.rowid
+                        LIMIT 1
+                    """, (EXECUTANDO, PENDENTE, max_por_usuario)).fetchone()
+                if linha is not None:
+                    agora = time.time()
+                    conn.execute(
+                        "UPDATE trabalhos SET status = ?, iniciado_em = ?, sinal_em = ? WHERE id = ?",
+                        (EXECUTANDO, agora, agora, linha[0])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.status(linha[0]) if linha is not None else None
+
+    def sinalizar(self, ids_trabalhos):
+        """Registra que os trabalhos em execução continuam vivos."""
+        with closing(self._conectar()) as conn:
+            conn.executemany(
+                "UPDATE trabalhos SET sinal_em = ? WHERE id = ? AND status = ?",
+                [(time.time(), id_trabalho, EXECUTANDO) for id_trabalho in ids_trabalhos]
+            )
+
+    def atualizar_progresso(self, id_trabalho, concluidos):
+        with closing(self._conectar()) as conn:
+            conn.execute(
+                "UPDATE trabalhos SET concluidos = ?, sinal_em = ? WHERE id = ?",
+                (concluidos, time.time(), id_trabalho)
+            )
+
+    def concluir(self, id_trabalho, tabelas, excel_bytes, nome_arquivo_excel, erros):
+        """Grava as tabelas e o Excel na pasta do trabalho e o marca como concluído."""
+        pasta = self.pasta_trabalho(id_trabalho)
+        pd.to_pickle(tabelas, os.path.join(pasta, "tabelas.pkl"))
+        with open(os.path.join(pasta, "resultado.xlsx"), "wb") as arquivo:
+            arquivo.write(excel_bytes)
+        resultado = {'nome_arquivo_excel': nome_arquivo_excel, 'erros': [list(erro) for erro in erros]}
+        self._finalizar(id_trabalho, CONCLUIDO, None, json.dumps(resultado, ensure_ascii=False))
+
+    def falhar(self, id_trabalho, mensagem):
+        self._finalizar(id_trabalho, ERRO, mensagem, None)
+
+    def _finalizar(self, id_trabalho, status, mensagem, resultado):
+        with closing(self._conectar()) as conn:
+            conn.execute(
+                "UPDATE trabalhos SET status = ?, mensagem = ?, resultado = ?, concluido_em = ? WHERE id = ?",
+                (status, mensagem, resultado, time.time(), id_trabalho)
+            )
+
+    def cancelar(self, id_trabalho):
+        """Cancela um trabalho ainda pendente; retorna False se ele já começou ou terminou."""
+        with closing(self._conectar()) as conn:
+            cursor = conn.execute(
+                "UPDATE trabalhos SET status = ?, concluido_em = ? WHERE id = ? AND status = ?",
+                (CANCELADO, time.time(), id_trabalho, PENDENTE)
+            )
+            return cursor.rowcount == 1
+
+    def status(self, id_trabalho):
+        """Dict com o estado do trabalho (e a posição na fila, se pendente), ou None."""
+        with closing(self._conectar()) as conn:
+            conn.row_factory = sqlite3.Row
+            linha = conn.execute("SELECT * FROM trabalhos WHERE id = ?", (id_trabalho,)).fetchone()
+            if linha is None:
+                return None
+            status = dict(linha)
+            status['parametros'] = json.loads(status['parametros'])
+            status['resultado'] = json.loads(status['resultado']) if status['resultado'] else None
+            status['posicao'] = None
+            if status['status'] == PENDENTE:
+                status['posicao'] = conn.execute(
+                    "SELECT COUNT(*) FROM trabalhos WHERE status = ? AND (criado_em < ? OR (criado_em = ? AND id < ?))",
+                    (PENDENTE, status['criado_em'], status['criado_em'], id_trabalho)
+                ).fetchone()[0] + 1
+        return status
+
+    def listar(self, usuario=None):
+        """Status dos trabalhos, do mais recente para o mais antigo."""
+        with closing(self._conectar()) as conn:
+            if usuario is None:
+                ids = conn.execute("SELECT id FROM trabalhos ORDER BY criado_em DESC").fetchall()
+            else:
+                ids = conn.execute(
+                    "SELECT id FROM trabalhos WHERE usuario = ? ORDER BY criado_em DESC", (usuario,)
+                ).fetchall()
+        return [self.status(id_trabalho) for (id_trabalho,) in ids]
+
+    def resultado(self, id_trabalho):
+        """(tabelas, excel_bytes, nome_arquivo_excel, erros) de um trabalho concluído, ou None."""
+        status = self.status(id_trabalho)
+        if status is None or status['status'] != CONCLUIDO:
+            return None
+        pasta = self.pasta_trabalho(id_trabalho)
+        tabelas = pd.read_pickle(os.path.join(pasta, "tabelas.pkl"))
+        with open(os.path.join(pasta, "resultado.xlsx"), "rb") as arquivo:
+            excel_bytes = arquivo.read()
+        erros = [tuple(erro) for erro in status['resultado']['erros']]
+        return tabelas, excel_bytes, status['resultado']['nome_arquivo_excel'], erros
+
+    def recuperar_abandonados(self, segundos_sem_sinal):
+        """Devolve à fila os trabalhos em execução cujo trabalhador parou de sinalizar."""
+        with closing(self._conectar()) as conn:
+            cursor = conn.execute(
+                "UPDATE trabalhos SET status = ?, concluidos = 0, iniciado_em = NULL WHERE status = ? AND sinal_em < ?",
+                (PENDENTE, EXECUTANDO, time.time() - segundos_sem_sinal)
+            )
+            return cursor.rowcount
+
+    def limpar(self, segundos_retencao):
+        """Remove trabalhos finalizados há mais de `segundos_retencao`, com as suas pastas."""
+        limite = time.time() - segundos_retencao
+        with closing(self._conectar()) as conn:
+            ids = [id_trabalho for (id_trabalho,) in conn.execute(
+                f"SELECT id FROM trabalhos WHERE status IN ({','.join('?' * len(STATUS_FINAIS))}) AND concluido_em < ?",
+                (*STATUS_FINAIS, limite)
+            )]
+            conn.executemany("DELETE FROM trabalhos WHERE id = ?", [(id_trabalho,) for id_trabalho in ids])
+        for id_trabalho in ids:
+            shutil.rmtree(self.pasta_trabalho(id_trabalho), ignore_errors=True)
+        return len(ids)
@@ -0,0 +1,73 @@
+"""
+Compara os motores de texto (pdfplumber x fitz) sobre um conjunto de PDFs e lista
+cada campo do `info` em que os resultados divergem.
+
+Uso:
+    python -m processamento_de_arquivos.paridade_motores <pasta_ou_arquivos.pdf ...>
+"""
+import os
+import sys
+import glob
+
+from processamento_de_arquivos.processamento import Processamento
+
+
+class ParidadeMotores():
+
+    @staticmethod
+    def comparar_info(info_a, info_b):
+        """Retorna [(campo, valor_a, valor_b)] para cada campo diferente."""
+        diferencas = []
+        for campo in sorted(set(info_a) | set(info_b)):
+            valor_a = info_a.get(campo)
+            valor_b = info_b.get(campo)
+            if valor_a != valor_b:
+                diferencas.append((campo, valor_a, valor_b))
+        return diferencas
+
+    @staticmethod
+    def comparar_motores(arquivos, motor_a='pdfplumber', motor_b='fitz'):
+        """
+        Processa cada (nome, pdf_bytes) com os dois motores.
+        Retorna uma lista de dicts: arquivo, campo, valor de cada motor.
+        """
+        relatorio = []
+        for nome, pdf_bytes in arquivos:
+            info_a = Processamento.extrair_info_pdf(pdf_bytes, motor_a)
+            info_b = Processamento.extrair_info_pdf(pdf_bytes, motor_b)
+            for campo, valor_a, valor_b in ParidadeMotores.comparar_info(info_a, info_b):
+                relatorio.append({'arquivo': nome, 'campo': campo, motor_a: valor_a, motor_b: valor_b})
+        return relatorio
+
+    @staticmethod
+    def listar_pdfs(caminhos):
+        arquivos = []
+        for caminho in caminhos:
+            if os.path.isdir(caminho):
+                arquivos.extend(sorted(glob.glob(os.path.join(caminho, "**", "*.pdf"), recursive=True)))
+            else:
+                arquivos.extend(sorted(glob.glob(caminho)))
+        return arquivos
+
+
+def main(argv=None):
+    caminhos = ParidadeMotores.listar_pdfs(argv if argv is not None else sys.argv[1:])
+    if not caminhos:
+        print("Nenhum PDF encontrado.")
+        return 2
+
+    def ler(caminho):
+        with open(caminho, "rb") as arquivo:
+            return os.path.basename(caminho), arquivo.read()
+
+    relatorio = ParidadeMotores.comparar_motores(ler(caminho) for caminho in caminhos)
+    for linha in relatorio:
+        print(f"{linha['arquivo']} | {linha['campo']} | pdfplumber={linha['pdfplumber']!r} | fitz={linha['fitz']!r}")
+
+    arquivos_divergentes = len({linha['arquivo'] for linha in relatorio})
+    print(f"{len(caminhos)} arquivo(s), {arquivos_divergentes} com divergência, {len(relatorio)} campo(s) diferente(s).")
+    return 1 if relatorio else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
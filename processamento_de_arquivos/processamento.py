@@ -1,50 +1,464 @@
-#import fitz
+import fitz
 import io
+import os
+import csv
+import codecs
+import copy
+import shutil
+import tempfile
+import signal
 import pdfplumber
 import warnings
-from regex_rules.regex_ import RegexRules
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from regex_rules.regex_ import RegexRules, REGRAS
+from regex_rules.texto_paginas import TextoPaginas
+from processamento_de_arquivos.cache_resultados import hash_pdf
 import pandas as pd
 
+# Documentos com mais páginas que o limiar são divididos em faixas de páginas,
+# extraídas em paralelo no mesmo pool dos arquivos. Cada faixa reabre o PDF (e
+# refaz a leitura das fontes), então o documento é dividido em no máximo uma
+# faixa por processo, com pelo menos PAGINAS_POR_FAIXA páginas cada
+LIMIAR_PAGINAS_FAIXAS = 120
+PAGINAS_POR_FAIXA = 40
+
+# Orçamento de tempo da análise de regras de um documento: ao estourar, o arquivo
+# sai com erro citando a regra, em vez de travar o lote. A análise normal leva
+# milissegundos por documento. Só na thread principal o orçamento interrompe uma
+# regex em andamento; fora dela (Streamlit, threads dos documentos grandes e do
+# trabalhador), a análise roda em um processo à parte, na thread principal dele
+ORCAMENTO_REGRAS_S = 60
+
+_avisou_sem_interrupcao = False
+
+# Leitura do TXT de situação: bytes usados para detectar a codificação e linhas por bloco
+TAMANHO_AMOSTRA_TXT = 1024 * 1024
+LINHAS_POR_BLOCO_TXT = 200_000
+
 
 class Processamento():
 
     @staticmethod
-    def process_pdfs_in_memory(uploaded_files):
-        all_data = []
-        for uploaded_file in uploaded_files:
-            pdf_bytes = uploaded_file.read()
-            pdf_stream = io.BytesIO(pdf_bytes)
-            with pdfplumber.open(pdf_stream) as pdf_document:
-                # Processa o documento inteiro uma única vez
-                info = RegexRules.extract_info_from_pages(pdf_document)
-                info['Arquivo'] = uploaded_file.name
-                all_data.append(info)  # Uma entrada por arquivo
+    def abrir_pdf(fonte, motor='pdfplumber'):
+        """
+        Abre o PDF com o motor de texto escolhido ('pdfplumber' ou 'fitz').
+        `fonte` são os bytes do PDF ou o caminho do arquivo; pelo caminho, o
+        arquivo é lido do disco sob demanda.
+        """
+        if isinstance(fonte, (str, os.PathLike)):
+            return fitz.open(fonte) if motor == 'fitz' else pdfplumber.open(fonte)
+        if motor == 'fitz':
+            return fitz.open(stream=fonte, filetype="pdf")
+        return pdfplumber.open(io.BytesIO(fonte))
 
-        df = pd.DataFrame(all_data)
+    @staticmethod
+    def extrair_info_pdf(fonte, motor='pdfplumber', baixa_memoria=False, cache_textos=None, sha256=None,
+                         consultar_cache=True, executor=None):
+        """
+        Extrai o dicionário `info` de um PDF a partir dos seus bytes ou do caminho.
+        Função de nível de classe para poder ser enviada aos processos do pool.
+        Com baixa_memoria=True, o layout de cada página é descartado assim que o
+        texto dela é extraído. Com um CacheTextos, o texto das páginas é lido do
+        cache (e guardado nele na primeira vez); `sha256` evita recalcular o hash e
+        consultar_cache=False só guarda, quando o chamador já consultou o cache.
+        `executor` é repassado a analisar_textos.
+        """
+        textos = Processamento.textos_pdf(fonte, motor, baixa_memoria, cache_textos, sha256, consultar_cache)
+        return Processamento.analisar_textos(textos, motor, executor)
+
+    @staticmethod
+    def textos_pdf(fonte, motor='pdfplumber', baixa_memoria=False, cache_textos=None, sha256=None, consultar_cache=True):
+        """Texto bruto de cada página do PDF, do CacheTextos quando houver um e o PDF já estiver nele."""
+        if cache_textos is not None:
+            sha256 = sha256 or hash_pdf(fonte)
+            textos = cache_textos.obter(sha256, motor) if consultar_cache else None
+            if textos is not None:
+                return textos
+        with Processamento.abrir_pdf(fonte, motor) as pdf_document:
+            # Processa o documento inteiro uma única vez
+            paginas = TextoPaginas(pdf_document, motor, liberar_paginas=baixa_memoria)
+            textos = [paginas.texto(page_num) for page_num in range(len(paginas))]
+        if cache_textos is not None:
+            cache_textos.guardar(sha256, textos, motor)
+        return textos
 
-        cols_tributos_numericos = [
-            'valor_principal_tributo',
-            'valor_multa_tributo',
-            'valor_juros_tributo',
-            'valor_total_tributo',
+    @staticmethod
+    def analisar_textos(textos, motor='pdfplumber', executor=None):
+        """
+        `info` a partir dos textos das páginas já extraídos, com o orçamento de
+        tempo das regras valendo só para a análise; `total_paginas` guarda o
+        número de páginas do PDF. Fora da thread principal, onde o orçamento não
+        interrompe uma regex em andamento, a análise é enviada a um processo do
+        `executor` e o orçamento vale lá; TempoRegrasEsgotado volta do processo com
+        a regra. Sem `executor`, é criado um pool só para esta análise: quem analisa
+        vários documentos fora da thread principal passa o de pool_analise().
+        """
+        global _avisou_sem_interrupcao
+        if not Processamento.analise_em_processo():
+            if not hasattr(signal, 'setitimer') and not _avisou_sem_interrupcao:
+                _avisou_sem_interrupcao = True
+                print("[AVISO] Sem signal.setitimer neste sistema: o orçamento de tempo das regras "
+                      "só é conferido ao fim de cada regra e não interrompe uma regex travada")
+            paginas = TextoPaginas.de_textos(textos, motor)
+            info = Processamento.com_orcamento(RegexRules.extract_info_from_pages, paginas)
+            info['total_paginas'] = len(textos)
+            return info
+
+        if executor is not None:
+            return executor.submit(Processamento.analisar_textos, textos, motor).result()
+        with Processamento.pool_analise() as executor:
+            return executor.submit(Processamento.analisar_textos, textos, motor).result()
+
+    @staticmethod
+    def analise_em_processo():
+        """True se, nesta thread, a análise das regras precisa ir para outro processo para ter orçamento."""
+        return hasattr(signal, 'setitimer') and not REGRAS.interrompe_regras()
+
+    @staticmethod
+    @contextmanager
+    def pool_analise():
+        """
+        Pool de um processo para as análises de uma chamada feitas fora da thread
+        principal, encerrado ao fim do bloco; None quando elas podem rodar na
+        própria thread. O processo só é criado na primeira análise enviada.
+        """
+        if not Processamento.analise_em_processo():
+            yield None
+            return
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            yield executor
+
+    @staticmethod
+    def com_orcamento(funcao, *args, **kwargs):
+        """
+        funcao(*args, **kwargs) com o orçamento de tempo das regras (ORCAMENTO_REGRAS_S);
+        levanta TempoRegrasEsgotado com o nome da regra se ele acabar.
+        """
+        with REGRAS.orcamento(ORCAMENTO_REGRAS_S):
+            return funcao(*args, **kwargs)
+
+    @staticmethod
+    def contar_paginas(fonte):
+        """Número de páginas do PDF (bytes ou caminho), sem extrair texto."""
+        with Processamento.abrir_pdf(fonte, 'fitz') as pdf_document:
+            return pdf_document.page_count
+
+    @staticmethod
+    def faixas_de_paginas(total_paginas, paginas_por_faixa=PAGINAS_POR_FAIXA):
+        """[(inicio, fim)] cobrindo as páginas do documento, fim exclusivo."""
+        return [
+            (inicio, min(inicio + paginas_por_faixa, total_paginas))
+            for inicio in range(0, total_paginas, paginas_por_faixa)
+        ]
+
+    @staticmethod
+    def planejar_faixas(fontes, workers):
+        """
+        Para cada PDF, as faixas de páginas em que ele será dividido, ou None
+        quando o documento é pequeno e vai inteiro para um processo só. Um PDF que
+        não abre também fica com None; o erro aparece na extração dele.
+        """
+        planos = []
+        for fonte in fontes:
+            try:
+                total_paginas = Processamento.contar_paginas(fonte)
+            except Exception:
+                total_paginas = 0
+            if total_paginas > LIMIAR_PAGINAS_FAIXAS:
+                paginas_por_faixa = max(PAGINAS_POR_FAIXA, -(-total_paginas // workers))
+                planos.append(Processamento.faixas_de_paginas(total_paginas, paginas_por_faixa))
+            else:
+                planos.append(None)
+        return planos
+
+    @staticmethod
+    def extrair_textos_faixa(fonte, inicio, fim, motor='pdfplumber', baixa_memoria=False):
+        """Textos brutos das páginas [inicio, fim) do PDF; executada nos processos do pool."""
+        with Processamento.abrir_pdf(fonte, motor) as pdf_document:
+            paginas = TextoPaginas(pdf_document, motor, liberar_paginas=baixa_memoria)
+            return [paginas.texto(page_num) for page_num in range(inicio, fim)]
+
+    @staticmethod
+    def extrair_info_pdf_em_faixas(fonte, executor, faixas, motor='pdfplumber', baixa_memoria=False, cache_textos=None, sha256=None):
+        """
+        Mesmo resultado de extrair_info_pdf, com o documento dividido em faixas de
+        páginas: o texto de cada faixa é extraído em um processo do `executor`.
+        Os textos são juntados na ordem das páginas antes do recorte dos blocos,
+        então um débito que começa em uma faixa e termina na seguinte continua
+        sendo um bloco só; a análise vai para um processo do mesmo pool, onde o
+        orçamento de tempo das regras interrompe uma regex travada. Com um
+        CacheTextos, os textos extraídos são guardados nele (a consulta é feita
+        antes, por quem decide dividir o documento).
+        """
+        futuros = [
+            executor.submit(Processamento.extrair_textos_faixa, fonte, inicio, fim, motor, baixa_memoria)
+            for inicio, fim in faixas
         ]
+        textos = [texto for futuro in futuros for texto in futuro.result()]
+        if cache_textos is not None:
+            cache_textos.guardar(sha256 or hash_pdf(fonte), textos, motor)
+        return Processamento.analisar_textos(textos, motor, executor)
+
+    @staticmethod
+    def extrair_infos(lista_pdf_bytes, workers=1, motor='pdfplumber', baixa_memoria=False, cache_textos=None, hashes=None):
+        """
+        Extrai o `info` de cada PDF, mantendo a ordem de entrada.
+        Com workers > 1 os arquivos são distribuídos em um pool de processos e os
+        documentos grandes são divididos em faixas de páginas no mesmo pool;
+        workers=None usa todos os núcleos disponíveis.
+        Com um CacheTextos, os PDFs com texto já guardado são analisados a partir
+        dele, sem serem abertos, e os demais têm o texto guardado ao ser extraído.
+        `hashes` são os SHA-256 dos PDFs, se já calculados.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if not lista_pdf_bytes:
+            return []
+
+        if hashes is None:
+            hashes = [hash_pdf(pdf_bytes) if cache_textos is not None else None for pdf_bytes in lista_pdf_bytes]
+        textos_por_hash = Processamento._consultar_cache_textos(hashes, cache_textos, motor)
+        pendentes = [indice for indice, sha256 in enumerate(hashes) if sha256 not in textos_por_hash]
+
+        # A análise feita aqui mesmo (cache de textos e workers <= 1) usa um único
+        # pool para a chamada inteira, e só fora da thread principal; ver analisar_textos
+        with Processamento.pool_analise() as pool_analise:
+            infos = [
+                Processamento.analisar_textos(textos_por_hash[sha256], motor, pool_analise)
+                if sha256 in textos_por_hash else None
+                for sha256 in hashes
+            ]
+            if not pendentes:
+                return infos
+
+            if workers <= 1:
+                for indice in pendentes:
+                    infos[indice] = Processamento.extrair_info_pdf(
+                        lista_pdf_bytes[indice], motor, baixa_memoria, cache_textos, hashes[indice],
+                        consultar_cache=False, executor=pool_analise
+                    )
+                return infos
 
-        for col in cols_tributos_numericos:
-            def converter_lista_de_numeros(item):
-                if pd.isna(item) or not item:
-                    return item
-                partes = [p.strip() for p in item.split(';')]
-                numeros_convertidos = [str(RegexRules.extrair_valor_numerico(parte)) for parte in partes]
-                return ";".join(numeros_convertidos)
-            if col in df.columns:
-                df[col] = df[col].apply(converter_lista_de_numeros)
+        planos = Processamento.planejar_faixas([lista_pdf_bytes[indice] for indice in pendentes], workers)
+        tarefas = sum(len(faixas) if faixas else 1 for faixas in planos)
+
+        # Cada documento grande é montado em uma thread, que espera pelas suas
+        # faixas no pool de processos enquanto os arquivos pequenos seguem em paralelo
+        grandes = sum(faixas is not None for faixas in planos)
+        with ProcessPoolExecutor(max_workers=min(workers, tarefas)) as executor, \
+                ThreadPoolExecutor(max_workers=max(1, grandes)) as montagem:
+            futuros = {
+                indice: executor.submit(
+                    Processamento.extrair_info_pdf, lista_pdf_bytes[indice], motor, baixa_memoria, cache_textos, hashes[indice],
+                    consultar_cache=False
+                )
+                if faixas is None else
+                montagem.submit(
+                    Processamento.extrair_info_pdf_em_faixas,
+                    lista_pdf_bytes[indice], executor, faixas, motor, baixa_memoria, cache_textos, hashes[indice]
+                )
+                for indice, faixas in zip(pendentes, planos)
+            }
+            for indice, futuro in futuros.items():
+                infos[indice] = futuro.result()
+        return infos
+
+    @staticmethod
+    def process_pdfs_in_memory(uploaded_files, workers=1, cache=None, motor='pdfplumber', baixa_memoria=False,
+                               cache_textos=None):
+        """
+        Extrai os dados de todos os PDFs enviados e monta o DataFrame de resultado.
+        Arquivos idênticos no mesmo lote são processados uma única vez e, com um
+        CacheResultados, PDFs já vistos nem chegam a ser abertos; com um
+        CacheTextos, PDFs já lidos são analisados de novo a partir do texto guardado.
+        Com baixa_memoria=True, os arquivos são gravados em uma pasta temporária e
+        lidos do disco, sem manter os bytes de todos em memória.
+        """
+        if baixa_memoria:
+            with tempfile.TemporaryDirectory(prefix="perdcomp_") as pasta:
+                arquivos = Processamento.gravar_em_disco(uploaded_files, pasta)
+                return Processamento.process_pdf_bytes(arquivos, workers, cache, motor, baixa_memoria, cache_textos)
+
+        arquivos = [(uploaded_file.name, uploaded_file.read()) for uploaded_file in uploaded_files]
+        return Processamento.process_pdf_bytes(arquivos, workers, cache, motor, cache_textos=cache_textos)
+
+    @staticmethod
+    def gravar_em_disco(uploaded_files, pasta):
+        """
+        Copia cada arquivo enviado para `pasta`, em blocos, e retorna [(nome, caminho)].
+        Os nomes no disco são sequenciais, então nomes repetidos no lote não colidem.
+        """
+        arquivos = []
+        for indice, uploaded_file in enumerate(uploaded_files):
+            caminho = os.path.join(pasta, f"{indice:05d}.pdf")
+            uploaded_file.seek(0)
+            with open(caminho, "wb") as destino:
+                shutil.copyfileobj(uploaded_file, destino, 1024 * 1024)
+            arquivos.append((uploaded_file.name, caminho))
+        return arquivos
+
+    @staticmethod
+    def _agrupar_por_hash(arquivos):
+        """Separa (nome, pdf_bytes ou caminho) em nomes, hashes e uma única fonte por hash."""
+        nomes = []
+        hashes = []
+        bytes_por_hash = {}
+        for nome, fonte in arquivos:
+            sha256 = hash_pdf(fonte)
+            nomes.append(nome)
+            hashes.append(sha256)
+            bytes_por_hash.setdefault(sha256, fonte)
+        return nomes, hashes, bytes_por_hash
+
+    @staticmethod
+    def _consultar_cache(bytes_por_hash, cache, motor):
+        """Retorna ({hash: info} encontrados no cache, [hashes que precisam ser extraídos])."""
+        info_por_hash = {}
+        pendentes = []
+        for sha256 in bytes_por_hash:
+            info = cache.obter(sha256, motor) if cache is not None else None
+            if info is not None:
+                info_por_hash[sha256] = info
+            else:
+                pendentes.append(sha256)
+        return info_por_hash, pendentes
+
+    @staticmethod
+    def _consultar_cache_textos(hashes, cache_textos, motor):
+        """{hash: textos das páginas} dos PDFs que já estão no CacheTextos."""
+        textos_por_hash = {}
+        if cache_textos is None:
+            return textos_por_hash
+        for sha256 in hashes:
+            if sha256 not in textos_por_hash:
+                textos = cache_textos.obter(sha256, motor)
+                if textos is not None:
+                    textos_por_hash[sha256] = textos
+        return textos_por_hash
+
+    @staticmethod
+    def process_pdf_bytes(arquivos, workers=1, cache=None, motor='pdfplumber', baixa_memoria=False, cache_textos=None):
+        """
+        Mesmo que process_pdfs_in_memory, recebendo uma lista de (nome, pdf_bytes);
+        no lugar dos bytes pode vir o caminho do PDF.
+        """
+        nomes, hashes, bytes_por_hash = Processamento._agrupar_por_hash(arquivos)
+        info_por_hash, pendentes = Processamento._consultar_cache(bytes_por_hash, cache, motor)
+
+        infos_extraidas = Processamento.extrair_infos(
+            [bytes_por_hash[sha256] for sha256 in pendentes], workers, motor, baixa_memoria, cache_textos, pendentes
+        )
+        for sha256, info in zip(pendentes, infos_extraidas):
+            if cache is not None:
+                cache.guardar(sha256, info, motor)
+            info_por_hash[sha256] = info
+
+        all_data = []
+        for nome, sha256 in zip(nomes, hashes):
+            info = copy.deepcopy(info_por_hash[sha256])
+            info['Arquivo'] = nome  # Uma entrada por arquivo
+            all_data.append(info)
+
+        return Processamento.montar_dataframe(all_data)
+
+    @staticmethod
+    def iterar_pdf_bytes(arquivos, workers=1, cache=None, motor='pdfplumber', baixa_memoria=False, cache_textos=None):
+        """
+        Versão em fluxo de process_pdf_bytes: gera (indice, nome, info, erro) para cada
+        arquivo assim que ele fica pronto, fora da ordem de envio. `indice` é a posição
+        do arquivo em `arquivos`; se a extração falhar, `info` é None e `erro` traz a
+        mensagem, sem interromper os demais arquivos.
+        """
+        nomes, hashes, bytes_por_hash = Processamento._agrupar_por_hash(arquivos)
+        indices_por_hash = {}
+        for indice, sha256 in enumerate(hashes):
+            indices_por_hash.setdefault(sha256, []).append(indice)
+
+        def resultados_do_hash(sha256, info, erro):
+            for indice in indices_por_hash[sha256]:
+                if erro is not None:
+                    yield indice, nomes[indice], None, erro
+                else:
+                    info_arquivo = copy.deepcopy(info)
+                    info_arquivo['Arquivo'] = nomes[indice]
+                    yield indice, nomes[indice], info_arquivo, None
+
+        info_por_hash, pendentes = Processamento._consultar_cache(bytes_por_hash, cache, motor)
+        for sha256, info in info_por_hash.items():
+            yield from resultados_do_hash(sha256, info, None)
+
+        def concluir(sha256, obter_info):
+            try:
+                info = obter_info()
+            except Exception as e:
+                print(f" ======= > LOG ERROR < ======== :  Erro ao processar o PDF: {e}")
+                return None, f"{type(e).__name__}: {e}"
+            if cache is not None:
+                cache.guardar(sha256, info, motor)
+            return info, None
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        # Análise feita aqui mesmo: um único pool para a chamada, como em extrair_infos
+        with Processamento.pool_analise() as pool_analise:
+            # PDFs com o texto no cache de textos: só a análise das regras, sem abrir o PDF
+            textos_por_hash = Processamento._consultar_cache_textos(pendentes, cache_textos, motor)
+            for sha256, textos in textos_por_hash.items():
+                info, erro = concluir(sha256, lambda: Processamento.analisar_textos(textos, motor, pool_analise))
+                yield from resultados_do_hash(sha256, info, erro)
+            pendentes = [sha256 for sha256 in pendentes if sha256 not in textos_por_hash]
+
+            if workers <= 1 or not pendentes:
+                for sha256 in pendentes:
+                    info, erro = concluir(
+                        sha256,
+                        lambda: Processamento.extrair_info_pdf(
+                            bytes_por_hash[sha256], motor, baixa_memoria, cache_textos, sha256,
+                            consultar_cache=False, executor=pool_analise
+                        )
+                    )
+                    yield from resultados_do_hash(sha256, info, erro)
+                return
+
+        planos = dict(zip(pendentes, Processamento.planejar_faixas([bytes_por_hash[sha256] for sha256 in pendentes], workers)))
+        grandes = [sha256 for sha256 in pendentes if planos[sha256] is not None]
+        tarefas = sum(len(faixas) if faixas else 1 for faixas in planos.values())
+
+        # Documentos grandes são montados em threads, como em extrair_infos; assim
+        # também entram no as_completed
+        with ProcessPoolExecutor(max_workers=min(workers, tarefas)) as executor, \
+                ThreadPoolExecutor(max_workers=max(1, len(grandes))) as montagem:
+            futuros = {}
+            for sha256 in pendentes:
+                if planos[sha256] is None:
+                    futuro = executor.submit(
+                        Processamento.extrair_info_pdf, bytes_por_hash[sha256], motor, baixa_memoria, cache_textos, sha256,
+                        consultar_cache=False
+                    )
+                else:
+                    futuro = montagem.submit(
+                        Processamento.extrair_info_pdf_em_faixas,
+                        bytes_por_hash[sha256], executor, planos[sha256], motor, baixa_memoria, cache_textos, sha256
+                    )
+                futuros[futuro] = sha256
+            for futuro in as_completed(futuros):
+                sha256 = futuros[futuro]
+                info, erro = concluir(sha256, futuro.result)
+                yield from resultados_do_hash(sha256, info, erro)
+
+    @staticmethod
+    def montar_dataframe(all_data):
+        df = pd.DataFrame(all_data)
+
+        # Os valores ficam como texto aqui; MontagemTabelas converte todas as
+        # colunas valor_* para centavos de uma vez
 
         colunas_texto = [
             'perdcomp_retificador', 'cod_perdcomp_retificacao', 'tipo_credito',
             'origem_credito_judicial', 'nome_responsavel_preenchimento', 'cod_cpf_preenchimento',
-            'cod_perdcomp_inicial', 'cod_perdcomp_cancelado', 'codigos_receita', 'data_vencimento_tributo', 'grupo_tributo', 'debito_sucedida',
-            'cnpj_detentor_debito', 'periodicidade', 'debito_controlado_processo', 'periodo_apuracao', 'data_transmissao_dctfweb', 'numero_recibo_dctfweb',
-            'categoria_dcftweb', 'periodicidade_dctfweb', 'periodo_apuracao_dctfweb'
+            'cod_perdcomp_inicial', 'cod_perdcomp_cancelado',
         ]
         for coluna in colunas_texto:
             if coluna in df.columns:
@@ -57,35 +471,55 @@ class Processamento():
 
         return df
 
+    @staticmethod
+    def detectar_codificacao(amostra):
+        """
+        Codificação de um arquivo texto a partir dos seus primeiros bytes: BOM de
+        UTF-8/UTF-16, UTF-8 válido ou, como nos exports do e-CAC, Windows-1252.
+        """
+        if amostra.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        if amostra.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return 'utf-16'
+        try:
+            # final=False: um caractere cortado no fim da amostra não conta como erro
+            codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            return 'cp1252'
+
     @staticmethod
     def ler_arquivo_txt(uploaded_file, nome_coluna1='cod_perdcomp', nome_coluna2='situacao_perdcomp'):
         """
-        Lê um arquivo TXT e retorna um DataFrame com duas colunas.
-        Supõe que o arquivo tenha duas colunas separadas por um delimitador (por exemplo, vírgula ou tabulação).
+        Lê o TXT de situação das PER/DCOMP (e-CAC) e retorna um DataFrame com duas
+        colunas: a 1ª (número da PER/DCOMP) e a 5ª (situação) do arquivo, separado
+        por ';' e com uma linha de cabeçalho. Os campos são lidos sempre pela
+        posição: linhas terminadas em ';' ou com campos a mais não deslocam as
+        colunas. O arquivo é lido em blocos de LINHAS_POR_BLOCO_TXT linhas pelo
+        parser do pandas, com a codificação detectada. Linhas sem número ou sem
+        situação são descartadas. Em caso de erro, retorna o DataFrame vazio.
         """
+        colunas = [nome_coluna1, nome_coluna2]
         try:
-            # Ler o conteúdo do arquivo
-            conteudo = uploaded_file.read().decode('utf-8')
-            
-            # Dividir o conteúdo em linhas
-            linhas = conteudo.strip().split('\n')
-            
-            # Processar cada linha para extrair as colunas
-            dados = []
-            #cabecalho = linhas[0].strip().split(';')  # Extrair o cabeçalho
-            for linha in linhas[1:]:  # Ignorar o cabeçalho
-                colunas = linha.strip().split(';')  # Usar ';' como delimitador
-                if len(colunas) >= 5:  # Verificar se há pelo menos 5 colunas
-                    dados.append([colunas[0], colunas[4]])    
-            # Criar o DataFrame
-            df = pd.DataFrame(dados, columns=['Número de PER/DCOMP', 'Situação'])
-
-            df = df.rename(columns={
-                'Número de PER/DCOMP': nome_coluna1,
-                'Situação': nome_coluna2
-            })
-            return df
-        
+            amostra = uploaded_file.read(TAMANHO_AMOSTRA_TXT)
+            uploaded_file.seek(0)
+            blocos = pd.read_csv(
+                uploaded_file, sep=';', header=0, usecols=[0, 4], dtype=str, index_col=False,
+                encoding=Processamento.detectar_codificacao(amostra), encoding_errors='replace',
+                keep_default_na=False, quoting=csv.QUOTE_NONE, chunksize=LINHAS_POR_BLOCO_TXT,
+            )
+
+            partes = []
+            for bloco in blocos:
+                bloco.columns = colunas
+                # Linhas com menos campos que o cabeçalho ficam com NaN
+                bloco = bloco.dropna().apply(lambda coluna: coluna.str.strip())
+                partes.append(bloco[(bloco[nome_coluna1] != '') & (bloco[nome_coluna2] != '')])
+
+            if not partes:
+                return pd.DataFrame(columns=colunas)
+            return pd.concat(partes, ignore_index=True)
+
         except Exception as e:
             print(f" ======= > LOG ERROR < ======== :  Erro ao ler o arquivo TXT: {e}")
-            return None
+            return pd.DataFrame(columns=colunas)
@@ -0,0 +1,144 @@
+"""
+Processo trabalhador da fila de extrações (FilaTrabalhos).
+
+Executa os trabalhos enviados pela interface, até --max-simultaneos ao mesmo
+tempo e --max-por-usuario por usuário, cada um com um pool de
+--workers-por-trabalho processos de extração. Roda na mesma máquina da interface:
+
+    python -m processamento_de_arquivos.trabalhador --max-simultaneos 2 --max-por-usuario 1
+"""
+import os
+import sys
+import time
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from exportar_dados.gerar_excel import ExportarDados
+from processamento_de_arquivos.processamento import Processamento
+from processamento_de_arquivos.cache_resultados import CacheResultados
+from processamento_de_arquivos.cache_textos import CacheTextos
+from processamento_de_arquivos.fila_trabalhos import FilaTrabalhos, PASTA_PADRAO
+from limpeza_dos_dados.montagem_tabelas import MontagemTabelas
+
+# Intervalo mínimo entre gravações do andamento de um trabalho
+INTERVALO_PROGRESSO_S = 1.0
+# Intervalo entre as buscas por trabalhos abandonados (trabalhador que caiu no meio)
+INTERVALO_RECUPERACAO_S = 60.0
+
+
+def executar_trabalho(fila, trabalho, workers):
+    """Extrai os PDFs do trabalho, monta as tabelas e o Excel e grava o resultado na fila."""
+    id_trabalho = trabalho['id']
+    parametros = trabalho['parametros']
+    motor = parametros.get('motor', 'pdfplumber')
+    motor_excel = parametros.get('motor_excel', 'openpyxl')
+
+    try:
+        arquivos, caminho_txt = fila.entrada(id_trabalho)
+        infos = [None] * len(arquivos)
+        erros = []
+        ultima_gravacao = 0.0
+        # Os PDFs já estão em disco: extração pelo caminho, com o layout descartado página a página
+        eventos = Processamento.iterar_pdf_bytes(
+            arquivos, workers=workers, cache=CacheResultados(), motor=motor, baixa_memoria=True,
+            cache_textos=CacheTextos()
+        )
+        for concluidos, (indice, nome, info, erro) in enumerate(eventos, start=1):
+            if erro is not None:
+                erros.append((nome, erro))
+            else:
+                infos[indice] = info
+            if concluidos == len(arquivos) or time.monotonic() - ultima_gravacao >= INTERVALO_PROGRESSO_S:
+                ultima_gravacao = time.monotonic()
+                fila.atualizar_progresso(id_trabalho, concluidos)
+
+        infos = [info for info in infos if info is not None]
+        if not infos:
+            fila.falhar(id_trabalho, "Nenhum dos arquivos enviados pôde ser processado.")
+            return
+
+        df_txt = None
+        if caminho_txt is not None:
+            with open(caminho_txt, "rb") as arquivo_txt:
+                df_txt = Processamento.ler_arquivo_txt(arquivo_txt, 'cod_perdcomp', 'situacao_perdcomp')
+
+        df_result = Processamento.montar_dataframe(infos)
+        tabelas = MontagemTabelas.formatar_tabelas(MontagemTabelas.montar_tabelas(df_result, df_txt))
+        excel_bytes = ExportarDados.gerar_excel_em_memoria(
+            tabelas['tabela1'], tabelas['tabela2'], tabelas['tabelona'],
+            tabelas['tabela3'], tabelas['tabela4'], tabelas['tabela5'],
+            motor=motor_excel
+        ).getvalue()
+        fila.concluir(id_trabalho, tabelas, excel_bytes, MontagemTabelas.nome_arquivo_excel(tabelas['tabela1']), erros)
+
+    except Exception as e:
+        print(f" ======= > LOG ERROR < ======== :  Erro no trabalho {id_trabalho}: {e}")
+        traceback.print_exc()
+        fila.falhar(id_trabalho, f"{type(e).__name__}: {e}")
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Trabalhador da fila de extrações de PER/DCOMP.")
+    parser.add_argument("--pasta", default=PASTA_PADRAO, help="Pasta da fila (banco SQLite e arquivos dos trabalhos)")
+    parser.add_argument("--max-simultaneos", type=int, default=2, help="Trabalhos executando ao mesmo tempo")
+    parser.add_argument("--max-por-usuario", type=int, default=1, help="Trabalhos de um mesmo usuário executando ao mesmo tempo")
+    parser.add_argument("--workers-por-trabalho", type=int, default=None,
+                        help="Processos de extração de cada trabalho "
+                             "(padrão: os núcleos divididos entre os trabalhos simultâneos)")
+    parser.add_argument("--intervalo", type=float, default=1.0, help="Segundos entre consultas à fila")
+    parser.add_argument("--abandono-s", type=float, default=600.0,
+                        help="Trabalhos em execução sem sinal há mais que isso voltam para a fila")
+    parser.add_argument("--reter-horas", type=float, default=168.0, help="Tempo de guarda dos trabalhos finalizados")
+    parser.add_argument("--uma-vez", action="store_true", help="Executa os trabalhos pendentes e termina")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    fila = FilaTrabalhos(args.pasta)
+    # Cada trabalho com o seu pool: sem limite, N trabalhos simultâneos abririam N x núcleos processos
+    workers = args.workers_por_trabalho or max(1, (os.cpu_count() or 1) // args.max_simultaneos)
+
+    print(
+        f"Trabalhador da fila em {args.pasta} (até {args.max_simultaneos} trabalho(s) simultâneo(s), "
+        f"{workers} processo(s) de extração cada)"
+    )
+
+    em_execucao = {}
+    ultima_limpeza = 0.0
+    ultima_recuperacao = 0.0
+    with ThreadPoolExecutor(max_workers=args.max_simultaneos) as executor:
+        while True:
+            for futuro in [futuro for futuro in em_execucao if futuro.done()]:
+                print(f"Trabalho {em_execucao.pop(futuro)} finalizado")
+
+            fila.sinalizar(em_execucao.values())
+            # Depois do sinal, para os trabalhos deste trabalhador não contarem como
+            # abandonados, e antes da reserva, para os recuperados já entrarem nela
+            if time.monotonic() - ultima_recuperacao >= INTERVALO_RECUPERACAO_S:
+                ultima_recuperacao = time.monotonic()
+                recuperados = fila.recuperar_abandonados(args.abandono_s)
+                if recuperados:
+                    print(f"{recuperados} trabalho(s) abandonado(s) de volta à fila")
+
+            # Reserva enquanto houver vaga; a fila aplica os limites global e por usuário
+            while len(em_execucao) < args.max_simultaneos:
+                trabalho = fila.reservar(args.max_simultaneos, args.max_por_usuario)
+                if trabalho is None:
+                    break
+                print(f"Trabalho {trabalho['id']} ({trabalho['usuario']}, {trabalho['total']} arquivo(s)) iniciado")
+                futuro = executor.submit(executar_trabalho, fila, trabalho, workers)
+                em_execucao[futuro] = trabalho['id']
+
+            if time.monotonic() - ultima_limpeza >= 3600:
+                ultima_limpeza = time.monotonic()
+                fila.limpar(args.reter_horas * 3600)
+
+            if args.uma_vez and not em_execucao:
+                return 0
+            time.sleep(args.intervalo)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+# Marcadores que delimitam as seções do documento. Cada tipo de seção usa
+# alguns deles; o índice compila apenas os marcadores dos tipos pedidos em uma
+# única expressão e percorre o texto uma vez.
+MARCADORES = {
+    'debito': r'\d{3}\.\s+Débito',
+    'origem': r'ORIGEM DO CRÉDITO',
+    'periodo': r'Período\s+de\s+Apuração',
+    # Só o rótulo: o valor é medido depois, para não engolir marcadores que começam com dígitos
+    'valor_total': r'Valor\s+Total\s+(?=[\d.,])',
+    'gps': r'\d{4}\.\s+Código\s+do\s+Pagamento',
+}
+
+MARCADORES_POR_TIPO = {
+    'debito': ('debito',),
+    'origem': ('origem', 'periodo', 'valor_total'),
+    'darf': ('periodo',),
+    'gps': ('gps',),
+}
+
+TIPOS_SECAO = tuple(MARCADORES_POR_TIPO)
+
+VALOR = re.compile(r'[\d.,]+')
+
+
+@lru_cache(maxsize=None)
+def compilar_marcadores(nomes):
+    return re.compile(
+        "|".join(f"(?P<{nome}>{MARCADORES[nome]})" for nome in nomes),
+        re.IGNORECASE
+    )
+
+
+class IndiceSecoes():
+    """
+    Índice das seções de um texto (débito, DARF, GPS e origem do crédito).
+
+    O texto é percorrido uma única vez atrás dos marcadores; os blocos de cada
+    tipo são então recortados por offsets, com os mesmos limites que os
+    re.split/re.findall usados antes por RegexRules:
+      - débito: de "NNN. Débito" até o próximo débito;
+      - origem: dentro de cada trecho iniciado por "ORIGEM DO CRÉDITO", de
+        "Período de Apuração" até o primeiro "Valor Total <valor>";
+      - DARF: trechos entre dois "Período de Apuração" que citam DARF;
+      - GPS: de "NNNN. Código do Pagamento" até o próximo que inicie uma linha.
+    `secoes[tipo]` guarda a lista de (inicio, fim) de cada bloco.
+    """
+
+    def __init__(self, texto, tipos=TIPOS_SECAO):
+        for tipo in tipos:
+            if tipo not in MARCADORES_POR_TIPO:
+                raise ValueError(f"Tipo de seção desconhecido: {tipo}. Opções: {TIPOS_SECAO}")
+        self.texto = texto
+        self.tipos = tuple(tipos)
+
+        nomes = tuple(nome for nome in MARCADORES if any(nome in MARCADORES_POR_TIPO[tipo] for tipo in self.tipos))
+        self.marcadores = {nome: [] for nome in nomes}
+        for match in compilar_marcadores(nomes).finditer(texto):
+            self.marcadores[match.lastgroup].append(match.span())
+
+        self.secoes = {tipo: getattr(self, f"_secoes_{tipo}")() for tipo in self.tipos}
+
+    def blocos(self, tipo):
+        """Textos dos blocos do tipo, na ordem do documento."""
+        return [self.texto[inicio:fim] for inicio, fim in self.secoes[tipo]]
+
+    def _secoes_debito(self):
+        inicios = [inicio for inicio, _ in self.marcadores['debito']]
+        return list(zip(inicios, inicios[1:] + [len(self.texto)]))
+
+    def _secoes_origem(self):
+        inicios_origem = [inicio for inicio, _ in self.marcadores['origem']]
+        periodos = self.marcadores['periodo']
+        inicios_periodo = [inicio for inicio, _ in periodos]
+        valores_total = self.marcadores['valor_total']
+        inicios_valor_total = [inicio for inicio, _ in valores_total]
+
+        secoes = []
+        for inicio_trecho, fim_trecho in zip(inicios_origem, inicios_origem[1:] + [len(self.texto)]):
+            posicao = inicio_trecho
+            while True:
+                # Próximo "Período de Apuração" e o primeiro "Valor Total" depois dele
+                i = bisect_left(inicios_periodo, posicao)
+                if i == len(periodos) or periodos[i][1] > fim_trecho:
+                    break
+                j = bisect_left(inicios_valor_total, periodos[i][1])
+                if j == len(valores_total) or valores_total[j][1] >= fim_trecho:
+                    break
+                fim = VALOR.match(self.texto, valores_total[j][1]).end()
+                secoes.append((periodos[i][0], fim))
+                posicao = fim
+        return secoes
+
+    def _secoes_darf(self):
+        # Apenas a grafia exata com espaços simples separa os blocos de DARF
+        inicios = [
+            inicio for inicio, fim in self.marcadores['periodo']
+            if self.texto[inicio:fim].count(' ') == 2 and fim - inicio == len('Período de Apuração')
+        ]
+        limites = [0] + inicios + [len(self.texto)]
+        return [
+            (inicio, fim) for inicio, fim in zip(limites, limites[1:])
+            if "DARF" in self.texto[inicio:fim].upper()
+        ]
+
+    def _secoes_gps(self):
+        secoes = []
+        marcadores = self.marcadores['gps']
+        i = 0
+        while i < len(marcadores):
+            inicio = marcadores[i][0]
+            # O bloco termina antes do próximo código de pagamento que começa uma linha
+            fim = len(self.texto)
+            proximo = len(marcadores)
+            for k in range(i + 1, len(marcadores)):
+                if self.texto[marcadores[k][0] - 1] == '\n':
+                    fim = marcadores[k][0] - 1
+                    proximo = k
+                    break
+            secoes.append((inicio, fim))
+            i = proximo
+        return secoes
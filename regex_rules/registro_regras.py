@@ -0,0 +1,188 @@
+import re
+import json
+import time
+import signal
+import hashlib
+import threading
+from contextlib import contextmanager
+
+
+class TempoRegrasEsgotado(Exception):
+    """O orçamento de tempo das regras acabou; `regra` é a que estava sendo aplicada (ou None)."""
+
+    def __init__(self, regra, segundos):
+        super().__init__(regra, segundos)
+        self.regra = regra
+        self.segundos = segundos
+
+    def __str__(self):
+        return f"Análise passou de {self.segundos:g} s na regra {self.regra or '(fora das regras)'}"
+
+
+class _EstadoOrcamento(threading.local):
+    # Por thread: o Streamlit e a montagem dos documentos grandes aplicam as regras em threads
+    prazo = None
+    segundos = None
+    regra = None
+
+
+class RegistroRegras():
+    """
+    Registro das regexes de extração, compiladas uma vez por processo.
+
+    Cada regra tem um nome "grupo.campo" (por exemplo "darf.valor_total_darf").
+    `versao` é o hash do conteúdo do registro (nome, padrão e flags de cada
+    regra): muda quando uma regra é alterada, incluída ou removida, e não muda com
+    reformatação do código — caches e catálogos podem guardá-la junto dos dados.
+
+    Com instrumentar(), cada aplicação de uma regra passa a contar chamadas,
+    matches e tempo total, para achar as regras lentas e as que nunca casam
+    (relatorio()). Sem medição nem orçamento, o custo são dois testes de atributo
+    por chamada.
+
+    Com orcamento(segundos), a análise de um documento tem prazo: ao passar dele,
+    TempoRegrasEsgotado é levantada com o nome da regra em aplicação, em vez de a
+    regex travar o lote. Só na thread principal (e com signal.setitimer, que não
+    existe no Windows) um SIGALRM interrompe a própria regex; nas demais threads o
+    prazo é conferido apenas ao fim de cada regra, e uma regra catastrófica trava
+    a thread até terminar. Quem analisa fora da thread principal deve usar um
+    processo à parte (ver interrompe_regras e Processamento.analisar_textos).
+    """
+
+    def __init__(self):
+        self.regras = {}
+        self.instrumentado = False
+        self.medicoes = {}
+        self.estado = _EstadoOrcamento()
+        self._versao = None
+
+    def registrar(self, grupo, padroes, flags=0):
+        """Compila e registra {campo: padrão} sob `grupo`; retorna {campo: re.Pattern}."""
+        compilados = {}
+        for campo, padrao in padroes.items():
+            nome = f"{grupo}.{campo}"
+            if nome in self.regras:
+                raise ValueError(f"Regra já registrada: {nome}")
+            self.regras[nome] = compilados[campo] = re.compile(padrao, flags)
+        self._versao = None
+        return compilados
+
+    @property
+    def versao(self):
+        if self._versao is None:
+            conteudo = [(nome, padrao.pattern, padrao.flags) for nome, padrao in sorted(self.regras.items())]
+            self._versao = hashlib.sha256(json.dumps(conteudo, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+        return self._versao
+
+    def search(self, nome, texto):
+        padrao = self.regras[nome]
+        if not self.instrumentado and self.estado.prazo is None:
+            return padrao.search(texto)
+        self.aplicando(nome)
+        inicio = time.perf_counter()
+        match = padrao.search(texto)
+        self.aplicada(nome, inicio, match is not None)
+        return match
+
+    def sub(self, nome, substituto, texto):
+        padrao = self.regras[nome]
+        if not self.instrumentado and self.estado.prazo is None:
+            return padrao.sub(substituto, texto)
+        self.aplicando(nome)
+        inicio = time.perf_counter()
+        texto, substituicoes = padrao.subn(substituto, texto)
+        self.aplicada(nome, inicio, substituicoes > 0)
+        return texto
+
+    def aplicando(self, nome):
+        """Marca `nome` como a regra em aplicação, a culpada se o orçamento acabar agora."""
+        self.estado.regra = nome
+
+    def aplicada(self, nome, inicio, casou):
+        """Fim da aplicação de `nome` (iniciada em `inicio`, perf_counter): mede e confere o prazo."""
+        agora = time.perf_counter()
+        if self.instrumentado:
+            self.medir(nome, agora - inicio, casou)
+        estado = self.estado
+        if estado.prazo is not None and agora > estado.prazo:
+            raise TempoRegrasEsgotado(nome, estado.segundos)
+        estado.regra = None
+
+    @staticmethod
+    def interrompe_regras():
+        """True se o orçamento, nesta thread, interrompe uma regex em andamento (SIGALRM)."""
+        return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+    @contextmanager
+    def orcamento(self, segundos):
+        """
+        Prazo de `segundos` para as regras aplicadas dentro do bloco (None: sem
+        prazo). Um orçamento dentro de outro não muda o prazo de fora. Se
+        interrompe_regras() é False, o prazo só é conferido quando cada regra
+        termina: uma regex que não termina não é interrompida.
+        """
+        estado = self.estado
+        if segundos is None or estado.prazo is not None:
+            yield
+            return
+        sinal = self.interrompe_regras()
+        if sinal:
+            def esgotado(signum, frame):
+                raise TempoRegrasEsgotado(estado.regra, segundos)
+            tratador_anterior = signal.signal(signal.SIGALRM, esgotado)
+            signal.setitimer(signal.ITIMER_REAL, segundos)
+        estado.prazo = time.perf_counter() + segundos
+        estado.segundos = segundos
+        try:
+            yield
+        finally:
+            if sinal:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, tratador_anterior)
+            estado.prazo = estado.segundos = estado.regra = None
+
+    def medir(self, nome, segundos, casou):
+        medicao = self.medicoes.setdefault(nome, [0, 0, 0.0])
+        medicao[0] += 1
+        medicao[1] += casou
+        medicao[2] += segundos
+
+    def instrumentar(self, ativo=True):
+        """Liga a medição por regra, zerando as medições anteriores; com ativo=False, desliga e as mantém."""
+        if ativo:
+            self.medicoes = {}
+        self.instrumentado = ativo
+
+    def estatisticas(self):
+        """
+        Uma linha por regra registrada, da mais lenta para a mais rápida: chamadas,
+        matches, taxa de match e tempo total. Regras nunca aplicadas saem com 0 chamadas.
+        """
+        linhas = []
+        for nome in self.regras:
+            chamadas, matches, segundos = self.medicoes.get(nome, (0, 0, 0.0))
+            linhas.append({
+                'regra': nome,
+                'chamadas': chamadas,
+                'matches': matches,
+                'taxa_match': matches / chamadas if chamadas else None,
+                'segundos': segundos,
+            })
+        return sorted(linhas, key=lambda linha: linha['segundos'], reverse=True)
+
+    def relatorio(self, limite=15):
+        """Texto com as `limite` regras mais lentas e as regras aplicadas que nunca casaram."""
+        linhas = self.estatisticas()
+        largura = max((len(nome) for nome in self.regras), default=0)
+        texto = [f"Regras (versão {self.versao}) mais lentas:"]
+        for linha in linhas[:limite]:
+            taxa = f"{linha['taxa_match']:6.1%}" if linha['taxa_match'] is not None else "     -"
+            texto.append(
+                f"  {linha['regra']:<{largura}s} {linha['chamadas']:>7d} chamadas  {taxa} match  "
+                f"{linha['segundos'] * 1000:9.2f} ms"
+            )
+        mortas = [linha['regra'] for linha in linhas if linha['chamadas'] and not linha['matches']]
+        nunca_aplicadas = [linha['regra'] for linha in linhas if not linha['chamadas']]
+        texto.append(f"Sem nenhum match ({len(mortas)}): {', '.join(sorted(mortas)) or '-'}")
+        texto.append(f"Nunca aplicadas ({len(nunca_aplicadas)}): {', '.join(sorted(nunca_aplicadas)) or '-'}")
+        return "\n".join(texto)
@@ -0,0 +1,109 @@
+# Textos que indicam que a página tem (ou pode ter) cada seção. A busca é feita
+# no texto da página em maiúsculas, com str.find; marcadores amplos só ampliam
+# o trecho analisado, os limites exatos dos blocos continuam com IndiceSecoes.
+MARCADORES_PAGINA = {
+    'debito': ('DÉBITO',),
+    'origem': ('ORIGEM DO CRÉDITO', 'CNPJ DO PAGAMENTO'),
+    'darf': ('DARF',),
+    'gps': ('PAGAMENTO',),
+}
+
+# Rótulos dos campos do crédito (antes lidos somente da página 3)
+MARCADORES_CREDITO = (
+    'DATA INICIAL DO PERÍODO',
+    'VALOR DO SALDO NEGATIVO',
+    'CRÉDITO ORIGINAL NA DATA',
+    'CRÉDITO ATUALIZADO',
+    'SELIC ACUMULADA',
+    'SALDO DO CRÉDITO ORIGINAL',
+    'TOTAL DOS DÉBITOS DESTE DOCUMENTO',
+    'TOTAL DO CRÉDITO ORIGINAL UTILIZADO',
+    'VALOR DO PEDIDO DE RESTITUIÇÃO',
+    'CRÉDITO PASSÍVEL DE RESTITUIÇÃO',
+    'TOTAL DAS PARCELAS DE COMPOSIÇÃO DO CRÉDITO',
+    'VALOR ORIGINAL DO CRÉDITO INICIAL',
+    'FORMA DE TRIBUTAÇÃO DO LUCRO',
+    'INFORMADO EM OUTRO PER/DCOMP',
+)
+
+PAGINA_CREDITO_PADRAO = 2
+
+
+class RoteamentoPaginas():
+    """
+    Classifica as páginas de um TextoPaginas pelas seções que contêm, para que
+    cada extrator de RegexRules leia só o trecho do documento que lhe interessa.
+
+    `tipos_por_pagina[n]` é o conjunto de seções ('credito', 'debito', 'origem',
+    'darf', 'gps') marcadas na página n. O marcador de uma seção nem sempre está
+    na página onde o bloco começa ou termina (o "Período de Apuração" de um DARF
+    pode estar no fim da página anterior, um bloco de GPS pode seguir por páginas
+    sem marcador), então o intervalo vai da primeira à última página marcada,
+    estendido para os dois lados pelas páginas sem nenhum marcador e mais uma, a
+    da seção vizinha, onde o bloco pode começar ou terminar. O crédito usa a primeira sequência de páginas com seus rótulos a
+    partir da página 2 (índice 1), ou a página 3 (índice 2) quando nenhuma é
+    encontrada.
+    """
+
+    def __init__(self, paginas):
+        self.paginas = paginas
+        self.tipos_por_pagina = [self.classificar(paginas.texto(page_num)) for page_num in range(len(paginas))]
+
+    @staticmethod
+    def classificar(texto):
+        texto = (texto or "").upper()
+        tipos = {
+            tipo for tipo, marcadores in MARCADORES_PAGINA.items()
+            if any(marcador in texto for marcador in marcadores)
+        }
+        if any(marcador in texto for marcador in MARCADORES_CREDITO):
+            tipos.add('credito')
+        return tipos
+
+    def paginas_com(self, tipo):
+        return [page_num for page_num, tipos in enumerate(self.tipos_por_pagina) if tipo in tipos]
+
+    def intervalo(self, tipo):
+        """(inicio, fim) das páginas da seção, fim exclusivo; None se a seção não aparece."""
+        if tipo == 'credito':
+            return self._intervalo_credito()
+
+        marcadas = self.paginas_com(tipo)
+        if not marcadas:
+            return None
+
+        inicio = marcadas[0]
+        while inicio > 0 and not self.tipos_por_pagina[inicio - 1]:
+            inicio -= 1
+        fim = marcadas[-1] + 1
+        while fim < len(self.paginas) and not self.tipos_por_pagina[fim]:
+            fim += 1
+        return max(inicio - 1, 0), min(fim + 1, len(self.paginas))
+
+    def _intervalo_credito(self):
+        marcadas = [page_num for page_num in self.paginas_com('credito') if page_num >= 1]
+        if not marcadas:
+            if PAGINA_CREDITO_PADRAO < len(self.paginas):
+                return PAGINA_CREDITO_PADRAO, PAGINA_CREDITO_PADRAO + 1
+            return None
+
+        fim = marcadas[0] + 1
+        while fim in marcadas:
+            fim += 1
+        return marcadas[0], fim
+
+    def agrupar_por_intervalo(self, tipos):
+        """{(inicio, fim): [tipos]} para indexar uma única vez as seções que caem nas mesmas páginas."""
+        tipos_por_intervalo = {}
+        for tipo in tipos:
+            intervalo = self.intervalo(tipo)
+            if intervalo is not None:
+                tipos_por_intervalo.setdefault(intervalo, []).append(tipo)
+        return tipos_por_intervalo
+
+    def texto(self, tipo, separador="\n"):
+        """Texto bruto das páginas da seção ("" quando ela não aparece)."""
+        intervalo = self.intervalo(tipo)
+        if intervalo is None:
+            return ""
+        return self.paginas.juntar(*intervalo, separador=separador)
@@ -0,0 +1,83 @@
+import re
+
+MOTORES_TEXTO = ('pdfplumber', 'fitz')
+
+
+def clean_text(text):
+    """Normaliza o texto para facilitar a extração"""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'(?<=\d)\s+(?=\d)', '', text)
+    return text
+
+
+class TextoPaginas():
+    """
+    Camada de texto de um documento PDF.
+
+    Cada página passa pela extração de texto no máximo uma vez; o texto bruto e
+    a variante normalizada por clean_text ficam guardados e são compartilhados
+    por todos os extratores de RegexRules.
+    O atributo `extracoes` conta quantas páginas foram efetivamente extraídas.
+
+    `motor` indica o tipo de documento recebido: 'pdfplumber' (pdfplumber.PDF)
+    ou 'fitz' (fitz.Document, PyMuPDF).
+    Com liberar_paginas=True, os objetos de layout de cada página do pdfplumber
+    são descartados logo após a extração do texto, em vez de ficarem vivos até o
+    documento ser fechado.
+    """
+
+    def __init__(self, pdf_document, motor='pdfplumber', liberar_paginas=False):
+        if motor not in MOTORES_TEXTO:
+            raise ValueError(f"Motor de texto desconhecido: {motor}. Opções: {MOTORES_TEXTO}")
+        self.pdf_document = pdf_document
+        self.motor = motor
+        self.liberar_paginas = liberar_paginas
+        self.extracoes = 0
+        self._brutos = {}
+        self._limpos = {}
+
+    @classmethod
+    def de_textos(cls, textos, motor='pdfplumber'):
+        """
+        TextoPaginas sobre textos de página já extraídos (por exemplo, por faixas
+        de páginas em processos separados), sem documento aberto.
+        """
+        paginas = cls(None, motor)
+        paginas._brutos = dict(enumerate(textos))
+        return paginas
+
+    def __len__(self):
+        if self.pdf_document is None:
+            return len(self._brutos)
+        if self.motor == 'fitz':
+            return self.pdf_document.page_count
+        return len(self.pdf_document.pages)
+
+    def _extrair_texto(self, page_num):
+        if self.motor == 'fitz':
+            # sort=True ordena os blocos de cima para baixo, como o pdfplumber;
+            # o fitz termina cada linha com '\n', o pdfplumber não
+            return self.pdf_document.load_page(page_num).get_text(sort=True).rstrip("\n")
+        page = self.pdf_document.pages[page_num]
+        texto = page.extract_text()
+        if self.liberar_paginas:
+            page.close()
+        return texto
+
+    def texto(self, page_num):
+        """Texto bruto da página, extraído apenas na primeira chamada."""
+        if page_num not in self._brutos:
+            self._brutos[page_num] = self._extrair_texto(page_num)
+            self.extracoes += 1
+        return self._brutos[page_num]
+
+    def texto_limpo(self, page_num):
+        """Texto da página normalizado por clean_text."""
+        if page_num not in self._limpos:
+            self._limpos[page_num] = clean_text(self.texto(page_num))
+        return self._limpos[page_num]
+
+    def juntar(self, inicio=0, fim=None, separador="\n"):
+        """Concatena o texto bruto das páginas [inicio, fim) com o separador."""
+        fim = len(self) if fim is None else fim
+        return separador.join(self.texto(page_num) for page_num in range(inicio, fim))
@@ -0,0 +1,224 @@
+import re
+import time
+from functools import lru_cache
+
+# Caracteres com significado especial no início de um padrão
+METACARACTERES = '.^$*+?{}[]()|'
+QUANTIFICADORES_OPCIONAIS = '*?{'
+FLAGS_INLINE = re.compile(r'\(\?[aiLmsux]+\)')
+# Rótulos mais curtos que isto ("N" de "N[º°] ...") dariam candidatos demais: o
+# padrão é buscado à parte
+TAMANHO_MINIMO_ROTULO = 3
+
+
+def alternativa_externa(padrao):
+    """True se o padrão tem um '|' fora de grupos e classes (A|B no nível de cima)."""
+    nivel = 0
+    em_classe = False
+    i = 0
+    while i < len(padrao):
+        c = padrao[i]
+        if c == '\\':
+            i += 2
+            continue
+        if em_classe:
+            em_classe = c != ']'
+        elif c == '[':
+            em_classe = True
+        elif c == '(':
+            nivel += 1
+        elif c == ')':
+            nivel -= 1
+        elif c == '|' and nivel == 0:
+            return True
+        i += 1
+    return False
+
+
+def rotulo_literal(padrao, flags=0):
+    """
+    Prefixo literal por onde toda ocorrência do padrão começa ("Data de Transmissão"
+    em r"Data de Transmissão\\s*([\\d/]+)"), ou '' se o padrão não começa por um.
+    """
+    inline = FLAGS_INLINE.match(padrao)
+    if flags & re.VERBOSE or (inline and 'x' in inline.group()) or alternativa_externa(padrao):
+        return ''
+    i = inline.end() if inline else 0
+    rotulo = []
+    while i < len(padrao):
+        c = padrao[i]
+        if c == '\\':
+            # \. \/ \- são literais; \s \d \b etc. encerram o rótulo
+            if i + 1 >= len(padrao) or padrao[i + 1].isalnum():
+                break
+            literal, proximo = padrao[i + 1], i + 2
+        elif c in METACARACTERES:
+            break
+        else:
+            literal, proximo = c, i + 1
+        # "a?", "a*", "a{0,1}": o caractere pode faltar
+        if proximo < len(padrao) and padrao[proximo] in QUANTIFICADORES_OPCIONAIS:
+            break
+        rotulo.append(literal)
+        i = proximo
+    return ''.join(rotulo)
+
+
+def prefixo_sem_caixa(curto, longo):
+    """`curto` casa com o início de `longo`, ignorando maiúsculas/minúsculas."""
+    return len(curto) <= len(longo) and re.fullmatch(re.escape(curto), longo[:len(curto)], re.IGNORECASE) is not None
+
+
+@lru_cache(maxsize=None)
+def _caracteres(plano_basico):
+    faixa = range(0x10000) if plano_basico else range(0x10000, 0x110000)
+    return ''.join(chr(codigo) for codigo in faixa if not 0xD800 <= codigo < 0xE000)
+
+
+@lru_cache(maxsize=None)
+def variantes_caixa(caractere):
+    """Todos os caracteres que re.IGNORECASE considera iguais a `caractere` ('k' -> K, k e o sinal de Kelvin)."""
+    return tuple(sorted(set(re.findall(re.escape(caractere), _caracteres(ord(caractere) < 0x10000), re.IGNORECASE))))
+
+
+def alternativas_rotulo(rotulo, ignorar_caixa):
+    """
+    Alternativas da regex de rótulos para um rótulo: o primeiro caractere é
+    literal, para o re usar o filtro de primeiro caractere ao percorrer o texto, e
+    o restante fica em um lookahead com grupo (identifica o rótulo por lastindex e
+    consome só um caractere, então nenhuma ocorrência sobreposta é pulada). Se a
+    caixa é ignorada, há uma alternativa por variante do primeiro caractere.
+    """
+    resto = re.escape(rotulo[1:])
+    if not ignorar_caixa:
+        return [f"{re.escape(rotulo[0])}(?=({resto}))"]
+    return [f"{re.escape(variante)}(?=(?i:({resto})))" for variante in variantes_caixa(rotulo[0])]
+
+
+class VarreduraCampos():
+    """
+    Busca de vários campos rotulados em uma única passada pelo texto.
+
+    `padroes` é um dict {campo: regex}, como os usados por RegexRules. Os rótulos
+    literais por onde os padrões começam ("Data de Transmissão", "Principal", ...)
+    viram uma só alternação, percorrida da esquerda para a direita; em cada
+    ocorrência de um rótulo, apenas os padrões daquele rótulo são testados ali
+    (pattern.match na posição), e a varredura para quando todos os campos já foram
+    encontrados. Como todo match de um padrão começa pelo seu rótulo, o primeiro
+    match obtido assim é o mesmo de re.search (e os seguintes, os de re.findall).
+    Padrões sem rótulo literal (ou com rótulo curto demais) são buscados à parte,
+    com re.search.
+
+    Rótulos que são prefixo de outros ("Total" e "Total do Tributo") dividem a
+    mesma alternativa, que ignora a caixa se algum dos seus padrões ignorar.
+
+    `ocorrencias` indica, por campo, quantos matches não sobrepostos guardar
+    (padrão 1). Com `registro` (RegistroRegras) e `grupo`, os padrões são as
+    regras "grupo.campo" já compiladas; se o registro estiver instrumentado, cada
+    campo é buscado e medido à parte, para o tempo e a taxa de match ficarem por
+    regra. Sob o orçamento do registro (RegistroRegras.orcamento), cada teste de
+    um campo confere o prazo e fica marcado como a regra em aplicação.
+    """
+
+    def __init__(self, padroes, flags=0, ocorrencias=None, registro=None, grupo=None):
+        self.padroes = {campo: re.compile(padrao, flags) for campo, padrao in padroes.items()}
+        self.ocorrencias = {campo: 1 for campo in padroes}
+        self.ocorrencias.update(ocorrencias or {})
+        self.registro = registro
+        self.grupo = grupo
+        self.nomes = {campo: f"{grupo}.{campo}" for campo in padroes}
+        self.nome_ancoras = f"{grupo}.(rótulos)"
+
+        # Rótulo de cada campo; os mais curtos primeiro para agrupar os prefixos
+        rotulos = {campo: rotulo_literal(padrao.pattern, padrao.flags) for campo, padrao in self.padroes.items()}
+        rotulos = {campo: rotulo for campo, rotulo in rotulos.items() if len(rotulo) >= TAMANHO_MINIMO_ROTULO}
+        ancoras = []
+        campos_por_ancora = []
+        for campo in sorted(rotulos, key=lambda campo: len(rotulos[campo])):
+            for indice, ancora in enumerate(ancoras):
+                if prefixo_sem_caixa(ancora, rotulos[campo]):
+                    campos_por_ancora[indice].append(campo)
+                    break
+            else:
+                ancoras.append(rotulos[campo])
+                campos_por_ancora.append([campo])
+
+        self.ancorados = [campo for campo in padroes if campo in rotulos]
+        self.avulsos = [campo for campo in padroes if campo not in rotulos]
+
+        # Grupo (lastindex) de cada alternativa -> (campo, pattern.match, ocorrências) do rótulo
+        alternativas = []
+        self.testes_por_grupo = {}
+        for ancora, campos in zip(ancoras, campos_por_ancora):
+            ignorar_caixa = any(self.padroes[campo].flags & re.IGNORECASE for campo in campos)
+            testes = [(campo, self.padroes[campo].match, self.ocorrencias[campo]) for campo in campos]
+            for alternativa in alternativas_rotulo(ancora, ignorar_caixa):
+                alternativas.append(alternativa)
+                self.testes_por_grupo[len(alternativas)] = testes
+        self.ancoras = re.compile("|".join(alternativas)) if alternativas else None
+
+    def varrer(self, texto):
+        """{campo: [matches]} na ordem de `padroes`, com até `ocorrencias[campo]` matches cada."""
+        registro = self.registro
+        if registro is not None and registro.instrumentado:
+            return self.varrer_por_campo(texto)
+        com_prazo = registro is not None and registro.estado.prazo is not None
+
+        achados = {campo: [] for campo in self.padroes}
+        faltando = sum(self.ocorrencias[campo] for campo in self.ancorados)
+
+        if self.ancoras is not None and faltando:
+            if com_prazo:
+                registro.aplicando(self.nome_ancoras)
+            for ancora in self.ancoras.finditer(texto):
+                posicao = ancora.start()
+                for campo, match_em, limite in self.testes_por_grupo[ancora.lastindex]:
+                    matches = achados[campo]
+                    # Como em re.findall, o próximo match começa depois do anterior
+                    if matches and (len(matches) == limite or posicao < matches[-1].end()):
+                        continue
+                    if com_prazo:
+                        registro.aplicando(self.nomes[campo])
+                        inicio = time.perf_counter()
+                        match = match_em(texto, posicao)
+                        registro.aplicada(self.nomes[campo], inicio, match is not None)
+                        registro.aplicando(self.nome_ancoras)
+                    else:
+                        match = match_em(texto, posicao)
+                    if match:
+                        matches.append(match)
+                        faltando -= 1
+                if not faltando:
+                    break
+            if com_prazo:
+                registro.aplicando(None)
+
+        for campo in self.avulsos:
+            achados[campo] = self._buscar(campo, texto)
+        return achados
+
+    def varrer_por_campo(self, texto):
+        """Mesmo resultado de varrer(), com uma busca completa por campo (referência)."""
+        return {campo: self._buscar(campo, texto) for campo in self.padroes}
+
+    def _buscar(self, campo, texto):
+        registro = self.registro
+        acompanhar = registro is not None and (registro.instrumentado or registro.estado.prazo is not None)
+        if acompanhar:
+            registro.aplicando(self.nomes[campo])
+            inicio = time.perf_counter()
+        matches = []
+        for match in self.padroes[campo].finditer(texto):
+            matches.append(match)
+            if len(matches) == self.ocorrencias[campo]:
+                break
+        if acompanhar:
+            registro.aplicada(self.nomes[campo], inicio, bool(matches))
+        return matches
+
+    @staticmethod
+    def valor(match):
+        """Valor do match como o de re.findall: o grupo 1, ou o match inteiro se não houver grupos."""
+        if not match.re.groups:
+            return match.group()
+        return match.group(1) or ''